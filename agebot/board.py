@@ -3,7 +3,8 @@
 import enum
 from collections import namedtuple, Counter
 from frozendict import frozendict
-from immutable import frozenbag
+from .immutable import frozenbag
+from . import events, profiling, registry, zobrist
 
 # As a proof of concept, let's start with a board consisting of only one
 # building: Bronze. No corruption or food yet.
@@ -14,7 +15,8 @@ class IllegalActionException(Exception):
 class Board:
   """Represents the entire board, including all players' tableaux and the market row."""
 
-  def __init__(self, round_number, turn_order, acting_player, card_row, tableaux):
+  def __init__(self, round_number, turn_order, acting_player, card_row, tableaux,
+               _zobrist=None):
     """Initializes the board.
 
     Args:
@@ -24,13 +26,33 @@ class Board:
       acting_player: Whose turn it is.
       card_row: The card row.
       tableaux: A map from each player to their tableau.
+      _zobrist: The Zobrist hash of the new board, if the caller has already
+        worked it out incrementally.
     """
     self._round_number = round_number
-    self._turn_order = turn_order
+    self._turn_order = tuple(turn_order)
     self._acting_player = acting_player
     self._card_row = card_row
     self._tableaux = frozendict(tableaux)
 
+    if _zobrist is None:
+      _zobrist = self._compute_zobrist()
+    self._zobrist = _zobrist
+
+  def _compute_zobrist(self):
+    h = (zobrist.value_key(_ROUND_KEY, self._round_number) ^
+         zobrist.value_key(_ACTING_PLAYER_KEY, self._acting_player.value) ^
+         zobrist.feature_key(('turn_order', self._turn_order)) ^
+         self._card_row.zobrist_hash)
+    for (p, t) in self._tableaux.items():
+      h ^= _tableau_key(p, t)
+    return h
+
+  @property
+  def zobrist_hash(self):
+    """A 64-bit Zobrist hash of this board, maintained incrementally."""
+    return self._zobrist
+
   @property
   def round(self):
     return self._round_number
@@ -47,6 +69,10 @@ class Board:
   def tableaux(self):
     return self._tableaux
 
+  @property
+  def card_row(self):
+    return self._card_row
+
   def __repr__(self):
     return 'Board({}, {}, {}, {})'.format(
       self._round_number, self._turn_order, self._acting_player, self._tableaux)
@@ -56,14 +82,18 @@ class Board:
       '\n'.join(['{}\n{}\n'.format(p, t) for (p, t) in self._tableaux.items()]))
 
   def __hash__(self):
-    return hash((self._round_number, self._turn_order, self._acting_player, self._card_row, self._tableaux))
+    return self._zobrist
 
   def __eq__(self, other):
+    if self is other:
+      return True
     return (isinstance(other, Board) and
+      self._zobrist == other._zobrist and
       self._round_number == other._round_number and
       self._turn_order == other._turn_order and
       self._acting_player == other._acting_player and
-      self._tableaux == other._tableaux)
+      self._tableaux == other._tableaux and
+      self._card_row == other._card_row)
 
   def tableau(self, player):
     """Returns a player's tableau."""
@@ -75,69 +105,130 @@ class Board:
     This should only be used by tests.
     """
 
+    return self._replace_tableau(player, tableau)
+
+  def _replace_tableau(self, player, tableau, round_number=None, acting_player=None):
+    """Returns a new Board with one tableau replaced, updating the hash in O(1).
+
+    Args:
+      player: Whose tableau to replace.
+      tableau: The new tableau.
+      round_number: If set, the new round number.
+      acting_player: If set, the new acting player.
+    """
+    h = (self._zobrist ^
+         _tableau_key(player, self._tableaux[player]) ^
+         _tableau_key(player, tableau))
+    if round_number is None:
+      round_number = self._round_number
+    elif round_number != self._round_number:
+      h ^= (zobrist.value_key(_ROUND_KEY, self._round_number) ^
+            zobrist.value_key(_ROUND_KEY, round_number))
+    if acting_player is None:
+      acting_player = self._acting_player
+    elif acting_player != self._acting_player:
+      h ^= (zobrist.value_key(_ACTING_PLAYER_KEY, self._acting_player.value) ^
+            zobrist.value_key(_ACTING_PLAYER_KEY, acting_player.value))
+
     new_tableaux = dict(self._tableaux)
     new_tableaux[player] = tableau
-    return Board(self._round_number, self._turn_order, self._acting_player, self._card_row, new_tableaux)
+    return Board(
+      round_number,
+      self._turn_order,
+      acting_player,
+      self._card_row,
+      new_tableaux,
+      _zobrist=h)
 
   def legal_actions(self):
     """Returns legal actions for the acting player."""
     return self._tableaux[self._acting_player].legal_actions()
 
-  def play_action_phase(self, actions):
+  def iter_legal_actions(self):
+    """Lazily iterates over legal actions for the acting player."""
+    return self._tableaux[self._acting_player].iter_legal_actions()
+
+  def sample_legal_action(self, rng):
+    """Returns a uniformly random legal action for the acting player, or None."""
+    return self._tableaux[self._acting_player].sample_legal_action(rng)
+
+  def play_action_phase(self, actions, options=None):
     """Plays and resolves the action phase and end of turn for a player.
 
     Args:
       actions: A list of Actions to take.
+      options: If given, SimulatorOptions whose logger is told what happens.
     Returns:
       A new Board.
     """
+    logger = events.active_logger(options)
+    profiler = profiling.active_profiler(options)
     theBoard = self
     for a in actions:
-      theBoard = theBoard._play_action(a)
+      if profiler is not None:
+        mark = profiler.mark()
+        theBoard = theBoard._play_action(a)
+        profiler.record('action.' + type(a).__name__, mark)
+      else:
+        theBoard = theBoard._play_action(a)
+      # Only log actions which were actually played.
+      if logger is not None:
+        logger.log(events.ActionPlayed(self._acting_player, a))
 
-    return theBoard.resolve_end_of_turn_sequence()
+    return theBoard.resolve_end_of_turn_sequence(options)
 
   def _play_action(self, action):
     new_tableau = self._tableaux[self._acting_player].play_action(action)
-    new_tableaux = dict(self._tableaux)
-    new_tableaux[self._acting_player] = new_tableau
+    return self._replace_tableau(self._acting_player, new_tableau)
 
-    return Board(
-      self._round_number,
-      self._turn_order,
-      self._acting_player,
-      self._card_row,
-      new_tableaux)
-
-  def resolve_end_of_turn_sequence(self):
+  def resolve_end_of_turn_sequence(self, options=None):
     """Resolves the end of a turn and moves onto the next turn.
 
+    Args:
+      options: If given, SimulatorOptions whose logger is told what happens.
     Returns:
       A Board representing the beginning of the next turn.
     """
     updated_tableau = self._tableaux[self._acting_player]
 
+    logger = events.active_logger(options)
+    if logger is not None:
+      logger.log(events.IncomeGained(
+        self._acting_player,
+        tuple((p, updated_tableau.revenue(p)) for p in Point)))
+    profiler = profiling.active_profiler(options)
+    if profiler is not None:
+      mark = profiler.mark()
+
     # Discard excess military cards
 
     # Check for an uprising
 
     # Score science and culture
     updated_tableau = updated_tableau.score_science_and_culture()
+    if profiler is not None:
+      mark = profiler.record('end_of_turn.score_science_and_culture', mark)
 
     # Check for corruption
 
     # Gain food
     updated_tableau = updated_tableau.gain_food()
+    if profiler is not None:
+      mark = profiler.record('end_of_turn.gain_food', mark)
 
     # Consume food
 
     # Gain resources
     updated_tableau = updated_tableau.gain_resources()
+    if profiler is not None:
+      mark = profiler.record('end_of_turn.gain_resources', mark)
 
     # Draw new military cards
 
     # Reset your actions
     updated_tableau = updated_tableau.reset_actions()
+    if profiler is not None:
+      mark = profiler.record('end_of_turn.reset_actions', mark)
 
     turn_index = self._turn_order.index(self._acting_player)
     if turn_index == len(self._turn_order) - 1:
@@ -147,15 +238,11 @@ class Board:
       new_round = self._round_number
       next_player = self._turn_order[turn_index + 1]
 
-    new_tableaux = dict(self._tableaux)
-    new_tableaux[self._acting_player] = updated_tableau
-
-    return Board(
-      new_round,
-      self._turn_order,
-      next_player,
-      self._card_row,
-      new_tableaux)
+    next_board = self._replace_tableau(
+      self._acting_player, updated_tableau, new_round, next_player)
+    if profiler is not None:
+      profiler.record('end_of_turn.next_player', mark)
+    return next_board
 
   def resolve_start_of_turn(self, options):
     """Resolves the beginning of a turn.
@@ -165,13 +252,45 @@ class Board:
     Returns:
       A Board representing the action phase of the next turn.
     """
-    replenish_results = self._card_row.shift_left().replenish(options)
+    profiler = profiling.active_profiler(options)
+    if profiler is not None:
+      mark = profiler.mark()
+    shifted = self._card_row.shift_left()
+    if profiler is not None:
+      mark = profiler.record('start_of_turn.shift_left', mark)
+    replenish_results = shifted.replenish(options)
+    if profiler is not None:
+      mark = profiler.record('start_of_turn.replenish', mark)
+
+    if replenish_results.new_age is not None:
+      logger = events.active_logger(options)
+      if logger is not None:
+        logger.log(events.AgeChanged(replenish_results.new_age))
+    next_board = self._after_replenish(replenish_results)
+    if profiler is not None:
+      profiler.record('start_of_turn.antiquate', mark)
+    return next_board
+
+  def _after_replenish(self, replenish_results):
+    """Finishes the start of a turn once the card row has been replenished.
+
+    Args:
+      replenish_results: A ReplenishResult for this board's card row, after
+        shifting it left.
+    Returns:
+      A Board representing the action phase of the next turn.
+    """
+    new_card_row = replenish_results.card_row
+    h = self._zobrist ^ self._card_row.zobrist_hash ^ new_card_row.zobrist_hash
 
     # Resolve the end of an age.
     if replenish_results.new_age is not None:
-      new_tableaux = {p: t.antiquate() for (p, t) in self._tableaux.items()}
+      new_tableaux = {}
+      for (p, t) in self._tableaux.items():
+        new_tableaux[p] = t.antiquate(replenish_results.new_age)
+        h ^= _tableau_key(p, t) ^ _tableau_key(p, new_tableaux[p])
     else:
-      new_tableaux = dict(self._tableaux)
+      new_tableaux = self._tableaux
 
     # Resolve a war.
     # Make exclusive tactics available.
@@ -180,10 +299,18 @@ class Board:
       self._round_number,
       self._turn_order,
       self._acting_player,
-      replenish_results.card_row,
-      new_tableaux
+      new_card_row,
+      new_tableaux,
+      _zobrist=h
     )
 
+_ROUND_KEY = zobrist.feature_key('round')
+_ACTING_PLAYER_KEY = zobrist.feature_key('acting_player')
+
+def _tableau_key(player, tableau):
+  """The Zobrist key for a player having a given tableau."""
+  return zobrist.combine(zobrist.feature_key(player), tableau.zobrist_hash)
+
 class Player(enum.Enum):
   """Represents a player."""
   ONE = 1
@@ -224,6 +351,67 @@ class Tableau:
     else:
       self._civil_actions = civil_actions
 
+    self._known_buildings = frozenset(
+      t.building for t in self._building_technologies)
+    self._build_actions = tuple(
+      BuildAction.of(b) for b in sorted(self._known_buildings, key=lambda b: b.id))
+    self._zobrist = self._compute_zobrist()
+
+    self._revenue = dict.fromkeys(Point, 0)
+    self._category_counts = {}
+    for (b, c) in self._buildings.items():
+      for point in self._revenue:
+        self._revenue[point] += c * b.getIncome(point)
+      self._category_counts[b.category] = (
+        self._category_counts.get(b.category, 0) + c)
+
+  def _evolve(self, zobrist_hash, buildings=None, points=None, civil_actions=None,
+              revenue=None, category_counts=None):
+    """Returns a copy of this tableau with some fields replaced.
+
+    Unlike the constructor, this trusts its arguments and carries everything
+    derived from the fields left alone over to the new tableau, so each
+    transition only pays for what it changes.
+
+    Args:
+      zobrist_hash: The Zobrist hash of the new tableau.
+      buildings: The new frozendict of buildings, if they changed.
+      points: The new, filled out, point dict, if it changed.
+      civil_actions: The new number of civil actions, if it changed.
+      revenue: The new revenue map. Required if buildings changed.
+      category_counts: The new category counts. Required if buildings changed.
+    """
+    t = Tableau.__new__(Tableau)
+    t._government = self._government
+    t._building_technologies = self._building_technologies
+    t._known_buildings = self._known_buildings
+    t._build_actions = self._build_actions
+    t._buildings = self._buildings if buildings is None else buildings
+    t._points = self._points if points is None else points
+    t._civil_actions = (
+      self._civil_actions if civil_actions is None else civil_actions)
+    t._zobrist = zobrist_hash
+    t._revenue = self._revenue if revenue is None else revenue
+    t._category_counts = (
+      self._category_counts if category_counts is None else category_counts)
+    return t
+
+  def _compute_zobrist(self):
+    h = (zobrist.feature_key(self._government) ^
+         zobrist.value_key(_CIVIL_ACTIONS_KEY, self._civil_actions))
+    for (b, c) in self._buildings.items():
+      h ^= _building_key(b, c)
+    for t in self._building_technologies:
+      h ^= zobrist.feature_key(t)
+    for (p, n) in self._points.items():
+      h ^= _point_key(p, n)
+    return h
+
+  @property
+  def zobrist_hash(self):
+    """A 64-bit Zobrist hash of this tableau, maintained incrementally."""
+    return self._zobrist
+
   def __str__(self):
     return 'Tableau\n{}\n{}'.format(
       self._government.name,
@@ -231,11 +419,19 @@ class Tableau:
     )
 
   def __eq__(self, other):
+    if self is other:
+      return True
     return (isinstance(other, Tableau) and
+      self._zobrist == other._zobrist and
       self._government == other._government and
+      self._civil_actions == other._civil_actions and
+      self._points == other._points and
       self._buildings == other._buildings and
       self._building_technologies == other._building_technologies)
 
+  def __hash__(self):
+    return self._zobrist
+
   def _building_map_str(self):
     return 'Built:\n' + '\n'.join(['  ' + b.name for b in self._buildings]) + '\n'
 
@@ -245,6 +441,19 @@ class Tableau:
   def points(self, point):
     return self._points[point]
 
+  @property
+  def government(self):
+    return self._government
+
+  @property
+  def buildings(self):
+    """A map from Buildings to the number of that kind of building you have."""
+    return self._buildings
+
+  @property
+  def building_technologies(self):
+    return self._building_technologies
+
   @property
   def civil_actions(self):
     return self._civil_actions
@@ -261,8 +470,7 @@ class Tableau:
   def num_buildings_in_category(self, category):
     """Returns the number of buildings we have in a given category."""
 
-    return sum(c for (b, c) in self._buildings.items()
-               if b.category == category)
+    return self._category_counts.get(category, 0)
 
   @property
   def known_buildings(self):
@@ -272,7 +480,7 @@ class Tableau:
     say, because they're too expensive, or because you hit your urban building
     maximum for this building type.
     """
-    return tuple(t.building for t in self._building_technologies)
+    return self._known_buildings
 
   def legal_actions(self):
     """Returns a set of all legal actions for this tableau."""
@@ -282,8 +490,43 @@ class Tableau:
 
   def legal_build_actions(self):
     """Returns a set of all legal build actions."""
-    candidate_actions = [BuildAction(b) for b in self.known_buildings]
-    return frozenset(filter(self.is_action_legal, candidate_actions))
+    return frozenset(filter(self.is_action_legal, self._build_actions))
+
+  def iter_legal_actions(self):
+    """Lazily iterates over legal actions, in a fixed order.
+
+    Unlike legal_actions(), this doesn't build any sets, and the actions it
+    yields are shared singletons.
+    """
+    return filter(self.is_action_legal, self._build_actions)
+
+  def sample_legal_action(self, rng, attempts=4):
+    """Returns a uniformly random legal action, or None if there are none.
+
+    This first tries a few candidates picked at random, which is usually
+    enough and costs the same however many buildings are known. If those are
+    all illegal, it falls back to reservoir sampling over every candidate.
+
+    Args:
+      rng: A random.Random.
+      attempts: How many random candidates to try before scanning.
+    """
+    candidates = self._build_actions
+    if not candidates:
+      return None
+    for _ in range(attempts):
+      action = candidates[rng.randrange(len(candidates))]
+      if self.is_action_legal(action):
+        return action
+
+    chosen = None
+    seen = 0
+    for action in candidates:
+      if self.is_action_legal(action):
+        seen += 1
+        if rng.randrange(seen) == 0:
+          chosen = action
+    return chosen
 
   def is_action_legal(self, action):
     """Returns whether or not an action can legally be taken.
@@ -296,14 +539,14 @@ class Tableau:
     # Before doing per-action checks, check the basic prices.
     if (self._civil_actions < action.civil_cost):
       return False
-    if any(action.get_price(p) > self.points(p) for p in Point):
+    if any(action.get_price(p) > self._points[p] for p in Point):
       return False
 
     if isinstance(action, BuildAction):
-      if action.building not in self.known_buildings:
+      if action.building not in self._known_buildings:
         return False
       # Check urban building limit
-      if action.building.urban and self.num_buildings_in_category(action.building.category) >= self._government.urban_buildings:
+      if action.building.urban and self._category_counts.get(action.building.category, 0) >= self._government.urban_buildings:
         return False
     else:
       raise NotImplementedError('Unknown action type {}'.format(action))
@@ -321,39 +564,57 @@ class Tableau:
     if (not self.is_action_legal(action)):
       raise IllegalActionException('Cannot play action: {}'.format(action))
 
+    h = self._zobrist
     new_points = dict(self._points)
     for point in Point:
-      new_points[point] -= action.get_price(point)
+      price = action.get_price(point)
+      if price:
+        h ^= _point_key(point, new_points[point])
+        new_points[point] -= price
+        h ^= _point_key(point, new_points[point])
+
+    new_civil_actions = self._civil_actions - action.civil_cost
+    h ^= (zobrist.value_key(_CIVIL_ACTIONS_KEY, self._civil_actions) ^
+          zobrist.value_key(_CIVIL_ACTIONS_KEY, new_civil_actions))
 
     if isinstance(action, BuildAction):
+      building = action.building
       new_buildings = dict(self._buildings)
-      if (action.building in new_buildings):
-        new_buildings[action.building] += 1
+      if (building in new_buildings):
+        h ^= _building_key(building, new_buildings[building])
+        new_buildings[building] += 1
       else:
-        new_buildings[action.building] = 1
-
-      return Tableau(
-        self._government,
-        new_buildings,
-        self._building_technologies,
-        new_points)
+        new_buildings[building] = 1
+      h ^= _building_key(building, new_buildings[building])
+
+      new_revenue = {p: r + building.getIncome(p)
+                     for (p, r) in self._revenue.items()}
+      new_category_counts = dict(self._category_counts)
+      new_category_counts[building.category] = (
+        new_category_counts.get(building.category, 0) + 1)
+
+      return self._evolve(
+        h,
+        buildings=frozendict(new_buildings),
+        points=new_points,
+        civil_actions=new_civil_actions,
+        revenue=new_revenue,
+        category_counts=new_category_counts)
     else:
       raise NotImplementedError(str(action))
 
   def revenue(self, point):
-    return sum((c * b.getIncome(point) for (b, c) in self._buildings.items()))
+    return self._revenue[point]
 
   def add_points(self, points):
     """Add some number of points."""
+    h = self._zobrist
     new_points = dict(self._points)
     for (point, number) in points.items():
+      h ^= _point_key(point, new_points[point])
       new_points[point] += number
-    return Tableau(
-      self._government,
-      self._buildings,
-      self._building_technologies,
-      points=new_points,
-      civil_actions=self._civil_actions)
+      h ^= _point_key(point, new_points[point])
+    return self._evolve(h, points=_fill_out_points(new_points))
 
   def score_science_and_culture(self):
     """Returns this tableau updated with more science and culture."""
@@ -376,16 +637,22 @@ class Tableau:
     return self._gain_points([point])
 
   def _gain_points(self, points):
-    return self.add_points({p: self.revenue(p) for p in points})
+    return self.add_points({p: self._revenue[p] for p in points})
 
   def reset_actions(self):
     """Resets the number of available civil and military actions."""
-    return Tableau(
-      self._government,
-      self._buildings,
-      self._building_technologies,
-      points=self._points,
-      civil_actions=self.max_civil_actions)
+    h = (self._zobrist ^
+         zobrist.value_key(_CIVIL_ACTIONS_KEY, self._civil_actions) ^
+         zobrist.value_key(_CIVIL_ACTIONS_KEY, self.max_civil_actions))
+    return self._evolve(h, civil_actions=self.max_civil_actions)
+
+_CIVIL_ACTIONS_KEY = zobrist.feature_key('civil_actions')
+
+def _building_key(building, count):
+  return zobrist.value_key(zobrist.feature_key(building), count)
+
+def _point_key(point, number):
+  return zobrist.value_key(zobrist.feature_key(point), number)
 
 class Point(enum.Enum):
   """Represents a type of resource gained each turn.
@@ -436,8 +703,20 @@ class Age(enum.Enum):
       Age.THREE: Age.FOUR
     }[self]
 
-class Government:
-  """A player's current government."""
+class Government(registry.Interned):
+  """A player's current government.
+
+  Governments are interned: defining a government with the same fields as
+  an existing one returns the existing government.
+  """
+
+  _registry = registry.GOVERNMENTS
+
+  @staticmethod
+  def _flyweight_key(name, age, civil_actions, military_actions,
+                     urban_buildings, income=None, happiness=0, strength=0):
+    return (name, age, civil_actions, military_actions, urban_buildings,
+            frozendict(income or {}), happiness, strength)
 
   def __init__(self, name, age, civil_actions, military_actions, urban_buildings,
                income=None, happiness=0, strength=0):
@@ -464,13 +743,6 @@ class Government:
     """The maximum number of one category of urban buildings you can have."""
     return self._urban_buildings
 
-  def __eq__(self, other):
-    return (isinstance(other, Government) and
-            self._name == other._name)
-
-  def __hash__(self):
-    return hash(self._name)
-
 DESPOTISM = Government('Despotism', Age.ANCIENT, 4, 2, 3)
 
 CARD_ROW_PRICES = (5, 4, 4)
@@ -482,41 +754,129 @@ CARD_ROW_PRICES[1] take 2, etc.
 TOTAL_CARDS_IN_CARD_ROW = sum(CARD_ROW_PRICES)
 """The total number of cards in the card row."""
 
+SLOT_PRICES = tuple(
+  price for (price, count) in enumerate(CARD_ROW_PRICES, 1)
+  for _ in range(count))
+"""The number of civil actions it takes to take the card in each slot."""
+
 EMPTY_CARD_SLOT = object()
 """This singleton object represents an empty card slot."""
 
 class CardRow:
-  """The card row containing all civil cards."""
+  """The card row containing all civil cards.
+
+  The slots are kept in a ring buffer. Slot i of the card row is at position
+  (offset + i) % TOTAL_CARDS_IN_CARD_ROW of the buffer, and a bitmask records
+  which slots are empty; whatever the buffer holds at an empty slot is stale
+  and ignored. Shifting the row left only moves the offset and shifts the
+  mask, and taking a card only sets a bit, so neither copies the buffer.
+  """
 
-  def __init__(self, card_row, civil_decks, player_count):
+  def __init__(self, card_row, civil_decks, player_count, _zobrist=None):
     """Initializes the CardRow.
 
     Args:
       card_row: A tuple containing the cards in the card row. This must have
-        a length of precisely 14. If a slot has no card in it, it contains
+        a length of precisely 13. If a slot has no card in it, it contains
         EMPTY_CARD_SLOT instead.
       civil_decks: A CivilDecks representing the remaining cards.
       player_count: The number of players. This determines how many cards are
         replaced at the beginning of each turn.
+      _zobrist: The Zobrist hash of the new card row, if the caller has
+        already worked it out incrementally.
     """
     if len(card_row) != TOTAL_CARDS_IN_CARD_ROW:
       raise ValueError('Card row has {} cards'.format(len(card_row)))
 
-    self._card_row = card_row
+    card_row = tuple(card_row)
+    empty = 0
+    for (i, card) in enumerate(card_row):
+      if card is EMPTY_CARD_SLOT:
+        empty |= 1 << i
+    self._init(card_row, 0, empty, civil_decks, player_count, _zobrist)
+    self._cards = card_row
+
+  @classmethod
+  def _of(cls, slots, offset, empty, civil_decks, player_count, _zobrist):
+    """Returns a CardRow built straight from its ring buffer."""
+    row = cls.__new__(cls)
+    row._init(slots, offset, empty, civil_decks, player_count, _zobrist)
+    return row
+
+  def _init(self, slots, offset, empty, civil_decks, player_count, _zobrist):
+    self._slots = slots
+    self._offset = offset
+    self._empty = empty
     self._civil_decks = civil_decks
     self._player_count = player_count
+    self._zobrist = _zobrist
+    self._cards = None
+
+  def _compute_zobrist(self):
+    h = (self._civil_decks.zobrist_hash ^
+         zobrist.value_key(_PLAYER_COUNT_KEY, self._player_count))
+    for (i, card) in enumerate(self.cards):
+      h ^= _slot_key(i, card)
+    return h
+
+  @property
+  def zobrist_hash(self):
+    """A 64-bit Zobrist hash of this card row and the decks behind it.
+
+    Shifting the row moves every card to a new slot, so the hash of a shifted
+    row is only worked out if something asks for it.
+    """
+    if self._zobrist is None:
+      self._zobrist = self._compute_zobrist()
+    return self._zobrist
+
+  def __eq__(self, other):
+    if self is other:
+      return True
+    return (isinstance(other, CardRow) and
+            self.zobrist_hash == other.zobrist_hash and
+            self._player_count == other._player_count and
+            self.cards == other.cards and
+            self._civil_decks == other._civil_decks)
+
+  def __hash__(self):
+    return self.zobrist_hash
+
+  @property
+  def cards(self):
+    """A tuple of the cards in each slot, or EMPTY_CARD_SLOT."""
+    if self._cards is None:
+      self._cards = tuple(
+        self.card(i) for i in range(TOTAL_CARDS_IN_CARD_ROW))
+    return self._cards
+
+  def card(self, card_index):
+    """Returns the card in one slot, or EMPTY_CARD_SLOT."""
+    if self._empty >> card_index & 1:
+      return EMPTY_CARD_SLOT
+    return self._slots[(self._offset + card_index) % TOTAL_CARDS_IN_CARD_ROW]
+
+  @property
+  def empty_slots(self):
+    """A bitmask with bit i set if slot i is empty."""
+    return self._empty
+
+  @property
+  def civil_decks(self):
+    return self._civil_decks
+
+  @property
+  def player_count(self):
+    return self._player_count
 
   @property
   def cards_discarded_per_turn(self):
-    return {2: 4, 3: 3, 4: 2}[self._player_count]
+    return _CARDS_DISCARDED_PER_TURN[self._player_count]
 
   def get_price(self, card_index):
-    price = 1
-    for i in CARD_ROW_PRICES:
-      if i > card_index:
-        return price
-      card_index -= i
-    raise ValueError('Invalid price {}')
+    if not 0 <= card_index < TOTAL_CARDS_IN_CARD_ROW:
+      raise ValueError('Invalid card index {}'.format(card_index))
+    return SLOT_PRICES[card_index]
 
   def pick_card(self, card_index):
     """Take a card from the card row.
@@ -524,48 +884,76 @@ class CardRow:
     Returns a CardRowPickResult containing both the card picked and the
     new card row after the card picked is gone.
     """
-    card = self._card_row[card_index]
-    if card == EMPTY_CARD_SLOT:
+    card = self.card(card_index)
+    if card is EMPTY_CARD_SLOT:
       raise ValueError('No card at index {}'.format(card_index))
 
-    new_card_row = list(self._card_row)
-    new_card_row[card_index] = EMPTY_CARD_SLOT
+    h = self._zobrist
+    if h is not None:
+      h ^= _slot_key(card_index, card) ^ _slot_key(card_index, EMPTY_CARD_SLOT)
     return CardRowPickResult(
       card,
-      CardRow(tuple(new_card_row), self._civil_decks, self._player_count))
+      CardRow._of(self._slots, self._offset, self._empty | 1 << card_index,
+                  self._civil_decks, self._player_count, h))
 
   def shift_left(self):
     """Discard the leftmost cards, and shift all other cards to the left."""
-
-    new_card_row = list(self._card_row)
-    for i in range(self.cards_discarded_per_turn):
-      new_card_row[i] = EMPTY_CARD_SLOT
-
-    new_cards = []
-    for card in self._card_row[self.cards_discarded_per_turn:]:
-      new_cards.append(card)
-    while len(new_cards) < TOTAL_CARDS_IN_CARD_ROW:
-      new_cards.append(EMPTY_CARD_SLOT)
-    return CardRow(tuple(new_cards), self._civil_decks, self._player_count)
+    discarded = self.cards_discarded_per_turn
+    return CardRow._of(
+      self._slots,
+      (self._offset + discarded) % TOTAL_CARDS_IN_CARD_ROW,
+      (self._empty >> discarded) | _TRAILING_SLOTS[discarded],
+      self._civil_decks,
+      self._player_count,
+      None)
 
   def replenish(self, options):
     """Restore all empty slot cards."""
+    if not self._empty:
+      return ReplenishResult(self, None)
 
-    empty_card_slots = [i for (i, c) in self._card_row if c == EMPTY_CARD_SLOT]
-    if len(empty_card_slots) == 0:
-      return self
-
-    draw_result = self._civil_decks.draw(len(empty_card_slots), options)
-    new_card_row = list(self._card_row)
-    for (i, new_card) in zip(empty_card_slots, draw_result.cards):
-      new_card_row[i] = new_card
+    draw_result = self._civil_decks.draw(self._empty.bit_count(), options)
     return ReplenishResult(
-      CardRow(
-        tuple(new_card_row),
-        draw_result.civil_decks,
-        self._player_count),
+      self._replenished(draw_result.cards, draw_result.civil_decks),
       draw_result.new_age)
 
+  def _replenished(self, cards, civil_decks):
+    """Returns this card row with cards dealt into its empty slots in order.
+
+    Args:
+      cards: The cards drawn. If there are fewer than the empty slots, the
+        rightmost slots stay empty.
+      civil_decks: The decks left after drawing them.
+    """
+    slots = list(self._slots)
+    empty = self._empty
+    h = self._zobrist
+    if h is not None:
+      h ^= self._civil_decks.zobrist_hash ^ civil_decks.zobrist_hash
+    for card in cards:
+      if not empty:
+        break
+      lowest = empty & -empty
+      i = lowest.bit_length() - 1
+      empty ^= lowest
+      slots[(self._offset + i) % TOTAL_CARDS_IN_CARD_ROW] = card
+      if h is not None:
+        h ^= _slot_key(i, EMPTY_CARD_SLOT) ^ _slot_key(i, card)
+    return CardRow._of(tuple(slots), self._offset, empty, civil_decks,
+                       self._player_count, h)
+
+_PLAYER_COUNT_KEY = zobrist.feature_key('player_count')
+_CARDS_DISCARDED_PER_TURN = {2: 4, 3: 3, 4: 2}
+_TRAILING_SLOTS = tuple(
+  ((1 << n) - 1) << (TOTAL_CARDS_IN_CARD_ROW - n)
+  for n in range(TOTAL_CARDS_IN_CARD_ROW + 1))
+"""Bitmasks of the last n slots, which a shift by n leaves empty."""
+_SLOT_KEYS = tuple(zobrist.feature_key(('slot', i))
+                   for i in range(TOTAL_CARDS_IN_CARD_ROW))
+
+def _slot_key(index, card):
+  return zobrist.combine(_SLOT_KEYS[index], zobrist.feature_key(card))
+
 class ReplenishResult(namedtuple('ReplenishResult', ['card_row', 'new_age'])):
   """The results of replenishing the card row.
 
@@ -585,17 +973,58 @@ class CivilDecks:
   random.
   """
 
-  def __init__(self, deck_dicts):
+  def __init__(self, deck_dicts, _zobrist=None):
     """Construct a CivilDecks instance.
 
     Args:
       deck_dicts: A mapping from ages to a frozenbag of the cards remaining
         in the deck for that age.
+      _zobrist: The Zobrist hash of the new decks, if the caller has already
+        worked it out incrementally.
     """
     self._deck_dicts = frozendict(deck_dicts)
 
+    if _zobrist is None:
+      _zobrist = 0
+      for (age, deck) in self._deck_dicts.items():
+        for card in deck:
+          _zobrist ^= _deck_key(age, card, deck[card])
+    self._zobrist = _zobrist
+
+  @property
+  def zobrist_hash(self):
+    """A 64-bit Zobrist hash of the cards remaining in each deck."""
+    return self._zobrist
+
+  def __eq__(self, other):
+    if self is other:
+      return True
+    return (isinstance(other, CivilDecks) and
+            self._zobrist == other._zobrist and
+            self._deck_dicts == other._deck_dicts)
+
+  def __hash__(self):
+    return self._zobrist
+
+  def deck(self, age):
+    """Returns a frozenbag of the cards remaining in an age's deck."""
+    return self._deck_dicts[age]
+
   def draw(self, num_cards, options):
     """Draw a number of cards. Returns a DrawResult."""
+    profiler = profiling.active_profiler(options)
+    if profiler is not None:
+      mark = profiler.mark()
+      result = self._draw(num_cards, options)
+      profiler.record('civil_decks.draw', mark)
+    else:
+      result = self._draw(num_cards, options)
+    logger = events.active_logger(options)
+    if logger is not None and result.cards:
+      logger.log(events.CardsDrawn(result.cards, result.new_age))
+    return result
+
+  def _draw(self, num_cards, options):
     age_to_draw_from = self._earliest_age_with_cards()
 
     if age_to_draw_from is None:
@@ -605,24 +1034,45 @@ class CivilDecks:
     deck_to_draw_from = self._deck_dicts[age_to_draw_from]
     cards_drawn = options.rng.pick_cards(num_cards, deck_to_draw_from)
 
-    if len(cards_drawn) < num_cards and age_to_draw_from != Age.FOUR:
+    if len(cards_drawn.cards) < num_cards and age_to_draw_from != Age.FOUR:
       next_age = age_to_draw_from.next_age()
       next_age_deck = self._deck_dicts[next_age]
 
       next_age_cards = options.rng.pick_cards(
-        num_cards - len(cards_drawn), next_age_deck)
+        num_cards - len(cards_drawn.cards), next_age_deck)
 
       new_decks = dict(self._deck_dicts)
       new_decks[age_to_draw_from] = cards_drawn.deck
       new_decks[next_age] = next_age_cards.deck
 
       return DrawResult(
-        cards_drawn.cards + next_age_cards.cards,
-        CivilDecks(new_decks))
+        tuple(cards_drawn.cards) + tuple(next_age_cards.cards),
+        self._with_decks(
+          new_decks,
+          [(age_to_draw_from, c) for c in cards_drawn.cards] +
+          [(next_age, c) for c in next_age_cards.cards]),
+        next_age)
     else:
       new_decks = dict(self._deck_dicts)
       new_decks[age_to_draw_from] = cards_drawn.deck
-      return DrawResult(cards_drawn, CivilDecks(new_decks))
+      return DrawResult(
+        tuple(cards_drawn.cards),
+        self._with_decks(
+          new_decks, [(age_to_draw_from, c) for c in cards_drawn.cards]),
+        None)
+
+  def _with_decks(self, new_decks, changed):
+    """Returns new CivilDecks, updating the hash for only the cards changed.
+
+    Args:
+      new_decks: A mapping from ages to frozenbags.
+      changed: (age, card) pairs whose counts may differ from this instance.
+    """
+    h = self._zobrist
+    for (age, card) in set(changed):
+      h ^= (_deck_key(age, card, self._deck_dicts[age][card]) ^
+            _deck_key(age, card, new_decks[age][card]))
+    return CivilDecks(new_decks, _zobrist=h)
 
   def _earliest_age_with_cards(self):
     for age in Age:
@@ -630,6 +1080,11 @@ class CivilDecks:
         return age
     return None
 
+def _deck_key(age, card, count):
+  if count == 0:
+    return 0
+  return zobrist.value_key(zobrist.feature_key((age, card)), count)
+
 class DrawResult(namedtuple('DrawResult', ['cards', 'civil_decks', 'new_age'])):
   """Represents the outcome of drawing cards.
 
@@ -679,8 +1134,17 @@ class Technology(CivilCard):
     super().__init__(name, age)
     self._price = price
 
-class BuildingTechnology(Technology):
-  """A type of civil card which grants access to a building."""
+class BuildingTechnology(Technology, registry.Interned):
+  """A type of civil card which grants access to a building.
+
+  BuildingTechnologies are interned by building and price.
+  """
+
+  _registry = registry.BUILDING_TECHNOLOGIES
+
+  @staticmethod
+  def _flyweight_key(building, price):
+    return (building, price)
 
   def __init__(self, building, price):
     super().__init__(building.name, building.age, price)
@@ -690,13 +1154,6 @@ class BuildingTechnology(Technology):
   def building(self):
     return self._building
 
-  def __eq__(self, other):
-    return (isinstance(other, BuildingTechnology) and
-            self._building == other._building)
-
-  def __hash__(self):
-    return hash(self._building)
-
 class Action:
   """A type of action to be taken on a turn."""
 
@@ -726,6 +1183,21 @@ class Action:
 class BuildAction(Action):
   """An action to build a brand-new building."""
 
+  _instances = {}
+
+  @classmethod
+  def of(cls, building):
+    """Returns a shared BuildAction for a building.
+
+    BuildActions are immutable, so the engine uses one per building instead
+    of allocating a new one each time.
+    """
+    action = cls._instances.get(building)
+    if action is None:
+      action = cls(building)
+      cls._instances[building] = action
+    return action
+
   def __init__(self, building):
     super().__init__(1, 0, {Point.RESOURCES: building.price})
     self._building = building
@@ -734,6 +1206,9 @@ class BuildAction(Action):
   def building(self):
     return self._building
 
+  def __repr__(self):
+    return 'BuildAction({})'.format(self._building.name)
+
   def __eq__(self, other):
     return (isinstance(other, BuildAction) and
             self._building == other._building)
@@ -1,15 +1,37 @@
-"""Initializes the board state."""
+"""Initializes the board state.
 
+The starting decks and card row only depend on the number of players, and
+are immutable, so each is built once per player count and then shared by
+every game. startup.preload() builds them all ahead of time.
+"""
+
+import functools
 from . import board, buildings, content, immutable
 
+@functools.lru_cache(maxsize=None)
 def initial_civil_deck(age, player_count):
   """Given an age, returns the cards for that age."""
 
   return immutable.frozenbag({
-    c: d.withPlayers(player_count) for (c, d) in content.CIVIL_CARD_DISTRIBUTIONS
+    c: d.withPlayers(player_count)
+    for (c, d) in content.CIVIL_CARD_DISTRIBUTIONS.items()
     if c.age == age
   })
 
+@functools.lru_cache(maxsize=None)
+def initial_civil_decks(player_count):
+  """Returns the civil decks for every age at the start of the game."""
+  return board.CivilDecks(
+    {age: initial_civil_deck(age, player_count) for age in board.Age})
+
+@functools.lru_cache(maxsize=None)
+def initial_card_row(player_count):
+  """Returns an empty card row, which is filled at the start of the first turn."""
+  return board.CardRow(
+    (board.EMPTY_CARD_SLOT,) * board.TOTAL_CARDS_IN_CARD_ROW,
+    initial_civil_decks(player_count),
+    player_count)
+
 def initialize_tableau():
   starting_buildings = {
     buildings.AGRICULTURE: 2,
@@ -36,4 +58,5 @@ def initialize_board():
     1,
     player_order,
     player_order[0],
+    initial_card_row(len(player_order)),
     tableaux)
@@ -14,3 +14,9 @@ class BoardInitializerTest(unittest.TestCase):
     self.assertCountEqual(t.known_buildings,
       [buildings.AGRICULTURE, buildings.BRONZE,
        buildings.PHILOSOPHY, buildings.RELIGION])
+
+  def test_starting_decks_are_shared(self):
+    self.assertIs(board_initializer.initial_civil_decks(2),
+                  board_initializer.initial_civil_decks(2))
+    self.assertIs(board_initializer.initialize_board().card_row,
+                  board_initializer.initialize_board().card_row)
@@ -1,14 +1,42 @@
+import collections
+import random
 import unittest
 from .board import Player, Point, Tableau
-from . import board, buildings, board_initializer, content
+from . import board, buildings, board_initializer, content, encoding, events, options
 
 def give_free_stuff(board, points):
   return board.update_tableau(
     board.acting_player,
     board.tableau(board.acting_player).add_points(points))
 
+class ListLogger(events.Logger):
+
+  def __init__(self):
+    self.events = []
+
+  def log(self, event):
+    self.events.append(event)
+
 class BoardTest(unittest.TestCase):
 
+  def test_play_action_phase_only_logs_played_actions(self):
+    testing_board = board_initializer.initialize_board()
+    build_farm = board.BuildAction.of(buildings.AGRICULTURE)
+    played = 0
+    after = testing_board
+    while after.tableau(after.acting_player).is_action_legal(build_farm):
+      after = after._play_action(build_farm)
+      played += 1
+
+    logger = ListLogger()
+    with self.assertRaises(board.IllegalActionException):
+      testing_board.play_action_phase(
+        [build_farm] * (played + 1),
+        options.SimulatorOptions(logger, options.ActualRng(random.Random(0))))
+    self.assertEqual(
+      logger.events,
+      [events.ActionPlayed(testing_board.acting_player, build_farm)] * played)
+
   def test_repr(self):
     testing_board = board_initializer.initialize_board()
     repr(testing_board)  # no error
@@ -96,3 +124,146 @@ class BoardTest(unittest.TestCase):
     self.assertEqual(selectiveBreedingDistribution.withPlayers(2), 1)
     self.assertEqual(selectiveBreedingDistribution.withPlayers(3), 2)
     self.assertEqual(selectiveBreedingDistribution.withPlayers(4), 3)
+
+  def test_hash_maintained_with_identical_outcomes(self):
+    testing_board = give_free_stuff(
+      board_initializer.initialize_board(),
+      {Point.RESOURCES: 4})
+
+    build_farm = board.BuildAction(buildings.AGRICULTURE)
+    build_mine = board.BuildAction(buildings.BRONZE)
+    board1 = testing_board.play_action_phase([build_farm, build_mine])
+    board2 = testing_board.play_action_phase([build_mine, build_farm])
+    self.assertEqual(hash(board1), hash(board2))
+    self.assertEqual(
+      hash(board1.tableau(Player.ONE)), hash(board2.tableau(Player.ONE)))
+
+  def test_incremental_hash_matches_full_hash(self):
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(7)))
+    testing_board = board_initializer.initialize_board()
+    for _ in range(6):
+      testing_board = testing_board.resolve_start_of_turn(sim_options)
+      picked = testing_board.card_row.pick_card(0).row
+      self.assertEqual(
+        picked.zobrist_hash,
+        board.CardRow(picked.cards, picked.civil_decks, picked.player_count).zobrist_hash)
+
+      testing_board = testing_board.play_action_phase(
+        sorted(testing_board.legal_actions(), key=lambda a: a.building.name)[:1])
+      rebuilt = encoding.decode(encoding.encode(testing_board))
+      self.assertEqual(testing_board.zobrist_hash, rebuilt.zobrist_hash)
+      self.assertEqual(testing_board, rebuilt)
+
+  def test_eq_distinguishes_points(self):
+    testing_board = board_initializer.initialize_board()
+    richer = give_free_stuff(testing_board, {Point.CULTURE: 1})
+    self.assertNotEqual(testing_board, richer)
+    self.assertNotEqual(
+      testing_board.tableau(Player.ONE), richer.tableau(Player.ONE))
+
+  def test_build_spends_civil_action(self):
+    testing_board = give_free_stuff(
+      board_initializer.initialize_board(),
+      {Point.RESOURCES: 2})
+    tableau = testing_board.tableau(Player.ONE).play_action(
+      board.BuildAction(buildings.BRONZE))
+    self.assertEqual(tableau.civil_actions, tableau.max_civil_actions - 1)
+
+  def test_cached_counts_follow_play_action(self):
+    tableau = Tableau(
+      board.DESPOTISM,
+      {buildings.AGRICULTURE: 1, buildings.RELIGION: 2},
+      [content.RELIGION_CARD, content.AGRICULTURE_CARD],
+      {Point.RESOURCES: 10})
+    tableau = tableau.play_action(board.BuildAction(buildings.RELIGION))
+    tableau = tableau.play_action(board.BuildAction(buildings.AGRICULTURE))
+    tableau = tableau.add_points({Point.FOOD: 1}).reset_actions()
+
+    fresh = Tableau(
+      board.DESPOTISM,
+      tableau.buildings,
+      tableau.building_technologies,
+      {p: tableau.points(p) for p in Point},
+      tableau.civil_actions)
+    self.assertEqual(tableau, fresh)
+    for p in Point:
+      self.assertEqual(tableau.revenue(p), fresh.revenue(p))
+    self.assertEqual(tableau.num_buildings_in_category('Temple'), 3)
+    self.assertEqual(tableau.num_buildings_in_category('Farm'), 2)
+    self.assertEqual(tableau.num_buildings_in_category('Lab'), 0)
+
+    # Despotism allows three temples, so a fourth is illegal.
+    self.assertFalse(tableau.is_action_legal(board.BuildAction(buildings.RELIGION)))
+
+  def test_iter_legal_actions_matches_legal_actions(self):
+    testing_board = give_free_stuff(
+      board_initializer.initialize_board(),
+      {Point.RESOURCES: 2})
+    legal = list(testing_board.iter_legal_actions())
+    self.assertCountEqual(legal, testing_board.legal_actions())
+    self.assertIs(legal[0], board.BuildAction.of(legal[0].building))
+
+  def test_sample_legal_action(self):
+    testing_board = give_free_stuff(
+      board_initializer.initialize_board(),
+      {Point.RESOURCES: 2})
+    rng = random.Random(0)
+    samples = collections.Counter(
+      testing_board.sample_legal_action(rng) for _ in range(2000))
+    self.assertCountEqual(samples, testing_board.legal_actions())
+    for count in samples.values():
+      self.assertGreater(count, 800)
+
+  def test_sample_legal_action_with_none_legal(self):
+    testing_board = board_initializer.initialize_board()
+    self.assertIsNone(testing_board.sample_legal_action(random.Random(0)))
+
+class CardRowTest(unittest.TestCase):
+
+  def rebuild(self, card_row):
+    return board.CardRow(
+      card_row.cards, card_row.civil_decks, card_row.player_count)
+
+  def test_shift_and_replenish_match_a_fresh_row(self):
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(3)))
+    for player_count in (2, 3, 4):
+      card_row = board_initializer.initial_card_row(player_count)
+      for turn in range(12):
+        cards = card_row.cards
+        shifted = card_row.shift_left()
+        discarded = card_row.cards_discarded_per_turn
+        self.assertEqual(
+          shifted.cards,
+          cards[discarded:] + (board.EMPTY_CARD_SLOT,) * discarded)
+        self.assertEqual(shifted, self.rebuild(shifted))
+        self.assertEqual(shifted.zobrist_hash, self.rebuild(shifted).zobrist_hash)
+
+        card_row = shifted.replenish(sim_options).card_row
+        self.assertEqual(card_row, self.rebuild(card_row))
+        self.assertEqual(card_row.zobrist_hash, self.rebuild(card_row).zobrist_hash)
+        if turn % 3 == 0 and card_row.card(turn) is not board.EMPTY_CARD_SLOT:
+          card_row = card_row.pick_card(turn).row
+          self.assertIs(card_row.card(turn), board.EMPTY_CARD_SLOT)
+          self.assertEqual(
+            card_row.zobrist_hash, self.rebuild(card_row).zobrist_hash)
+
+  def test_empty_slots(self):
+    card_row = board_initializer.initial_card_row(2)
+    full = (1 << board.TOTAL_CARDS_IN_CARD_ROW) - 1
+    self.assertEqual(card_row.empty_slots, full)
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(0)))
+    card_row = card_row.replenish(sim_options).card_row
+    self.assertEqual(card_row.empty_slots, 0)
+    self.assertEqual(card_row.shift_left().empty_slots, 0b1111 << 9)
+    self.assertEqual(card_row.pick_card(2).row.empty_slots, 0b100)
+
+  def test_get_price(self):
+    card_row = board_initializer.initial_card_row(2)
+    self.assertEqual(
+      [card_row.get_price(i) for i in range(board.TOTAL_CARDS_IN_CARD_ROW)],
+      [1] * 5 + [2] * 4 + [3] * 4)
+    with self.assertRaises(ValueError):
+      card_row.get_price(board.TOTAL_CARDS_IN_CARD_ROW)
@@ -0,0 +1,28 @@
+"""Bots which decide what a player does on their turn.
+
+A bot is any object with a choose_actions(board, options) method, which is
+given a Board in its player's action phase and returns the list of Actions
+to play before ending the turn.
+"""
+
+import random
+
+
+class RandomBot:
+  """Plays uniformly random legal actions until it randomly decides to stop.
+
+  At each step, ending the turn is as likely as any one legal action.
+  """
+
+  def __init__(self, seed=None):
+    self._random = random.Random(seed)
+
+  def choose_actions(self, board, options):
+    actions = []
+    while True:
+      legal = list(board.iter_legal_actions())
+      choice = self._random.randrange(len(legal) + 1)
+      if choice == len(legal):
+        return actions
+      actions.append(legal[choice])
+      board = board._play_action(legal[choice])
@@ -2,9 +2,20 @@
 
 from frozendict import frozendict
 from .board import Point, Age, BuildingTechnology
+from . import registry
 
-class Building:
-  """Represents a type of building."""
+class Building(registry.Interned):
+  """Represents a type of building.
+
+  Buildings are interned: defining a building with the same fields as an
+  existing one returns the existing building.
+  """
+
+  _registry = registry.BUILDINGS
+
+  @staticmethod
+  def _flyweight_key(name, category, price, income, age, happiness=0, strength=0):
+    return (name, category, price, frozendict(income), age, happiness, strength)
 
   def __init__(self, name, category, price, income, age, happiness=0, strength=0):
     """Defines a new building type.
@@ -27,7 +38,6 @@ class Building:
     self._happiness = happiness
     self._strength = strength
     self._age = age
-    self._hash = None
 
   @property
   def name(self):
@@ -56,30 +66,6 @@ class Building:
     else:
       return 0
 
-  def __eq__(self, other):
-    if not isinstance(other, Building):
-      return False
-    return (self._name == other._name
-      and self._category == other._category
-      and self._price == other._price
-      and self._income == other._income
-      and self._happiness == other._happiness
-      and self._strength == other._strength
-      and self._age == other._age)
-
-  def __hash__(self):
-    if self._hash:
-      return self._hash
-    return hash((
-      self._name,
-      self._category,
-      self._price,
-      self._income,
-      self._happiness,
-      self._strength,
-      self._age
-    ))
-
 
 # Farms
 
@@ -287,4 +273,4 @@ MOVIES = Building(
   happiness=1
 )
 
-BUILDINGS = tuple(b for b in globals().values() if isinstance(b, Building))
+BUILDINGS = tuple(registry.BUILDINGS)
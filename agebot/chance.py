@@ -0,0 +1,334 @@
+"""Exact distributions over the random parts of the start of a turn.
+
+CardRow.replenish() and CivilDecks.draw() sample one outcome. Expectimax
+search and low-variance evaluation instead want every distinct outcome with
+its probability, so that a handful of weighted boards can stand in for many
+sampled rollouts.
+
+Drawing k cards from a deck is a multivariate hypergeometric draw: a multiset
+with m_c copies of each card c comes up with probability
+prod(C(n_c, m_c)) / C(N, k), and each of its distinct orderings is equally
+likely. Since replenish() fills empty slots in draw order, distinct orderings
+are distinct card rows, so both levels are enumerated here. If the current
+age's deck runs out, the rest of the cards come from the next age's deck,
+just like CivilDecks.draw().
+
+Draw distributions only depend on the decks and the number of cards drawn,
+so they are memoized on that pair. The number of ordered outcomes grows
+factorially with the number of cards drawn: filling a whole empty card row
+has billions. Multisets are far fewer, and every ordering of one is equally
+likely, so multisets are enumerated and sorted first, and orderings are only
+generated for the multisets which make the cut. Asking for the top_k most
+likely outcomes is therefore cheap for any number of cards, while asking for
+more than MAX_OUTCOMES of them raises ValueError instead of running for
+hours.
+"""
+
+import functools
+import math
+from collections import namedtuple
+from .board import Age, CivilDecks, ReplenishResult
+from .immutable import frozenbag
+
+DRAW_CACHE_SIZE = 4096
+"""How many (decks, number of cards) draw distributions are remembered."""
+
+MAX_OUTCOMES = 100000
+"""The most ordered outcomes of a draw which will be listed at once."""
+
+
+class DrawOutcome(namedtuple('DrawOutcome', [
+    'cards', 'civil_decks', 'new_age', 'probability'])):
+  """One possible result of CivilDecks.draw().
+
+  Fields:
+    cards: A tuple of the cards drawn, in draw order.
+    civil_decks: The civil decks after the draw.
+    new_age: If the draw spilled into the next age's deck, that age.
+    probability: The chance of drawing exactly these cards in this order.
+  """
+
+
+class ReplenishOutcome(namedtuple('ReplenishOutcome', [
+    'card_row', 'new_age', 'probability'])):
+  """One possible result of CardRow.replenish().
+
+  Fields:
+    card_row: The replenished card row.
+    new_age: If a new age has begun, that age.
+    probability: The chance of this outcome.
+  """
+
+
+class StartOfTurnOutcome(namedtuple('StartOfTurnOutcome', [
+    'board', 'probability'])):
+  """One possible result of Board.resolve_start_of_turn().
+
+  Fields:
+    board: The board in the next turn's action phase.
+    probability: The chance of this outcome.
+  """
+
+
+def _orderings(counts):
+  """Yields every distinct ordering of a multiset.
+
+  Args:
+    counts: A list of [card, count] pairs. It is modified while iterating
+      but restored afterwards.
+  """
+  remaining = sum(c for (_, c) in counts)
+  if remaining == 0:
+    yield ()
+    return
+  for entry in counts:
+    if entry[1] == 0:
+      continue
+    entry[1] -= 1
+    for rest in _orderings(counts):
+      yield (entry[0],) + rest
+    entry[1] += 1
+
+def _multisets(cards, deck, k, start=0):
+  """Yields every multiset of k cards from a deck, as a tuple of counts."""
+  if k == 0:
+    yield (0,) * (len(cards) - start)
+    return
+  if start == len(cards):
+    return
+  available = deck[cards[start]]
+  for m in range(min(available, k), -1, -1):
+    for rest in _multisets(cards, deck, k - m, start + 1):
+      yield (m,) + rest
+
+class _Group(namedtuple('_Group', [
+    'probability', 'parts', 'decks', 'new_age', 'count'])):
+  """Every ordering of one multiset of cards drawn.
+
+  All orderings of a multiset are equally likely, so a group stands for
+  count outcomes without listing them.
+
+  Fields:
+    probability: The chance of each single ordering.
+    parts: A tuple with one tuple of (card, count) pairs per deck drawn
+      from, in draw order.
+    decks: A tuple of (age, remaining deck) pairs for the decks drawn from.
+    new_age: If the draw spilled into the next age's deck, that age.
+    count: How many distinct orderings there are.
+  """
+
+  def draws(self):
+    """Yields a _Draw for each ordering."""
+    def orderings(parts):
+      if not parts:
+        yield ()
+        return
+      for first in _orderings([list(pair) for pair in parts[0]]):
+        for rest in orderings(parts[1:]):
+          yield first + rest
+    for cards in orderings(self.parts):
+      yield _Draw(cards, self.decks, self.new_age, self.probability)
+
+
+@functools.lru_cache(maxsize=DRAW_CACHE_SIZE)
+def _deck_groups(deck, num_cards):
+  """Lists the multisets of cards which can be drawn from a single deck.
+
+  If the deck holds fewer than num_cards cards, all of them are drawn.
+
+  Args:
+    deck: A frozenbag of cards.
+    num_cards: How many cards to draw.
+  Returns:
+    A tuple of (probability of each ordering, ((card, count), ...),
+    remaining deck, number of orderings) tuples.
+  """
+  cards = list(deck)
+  total = sum(deck[c] for c in cards)
+  k = min(num_cards, total)
+  ways = math.comb(total, k)
+
+  results = []
+  for multiset in _multisets(cards, deck, k):
+    weight = 1
+    orderings = math.factorial(k)
+    for (card, m) in zip(cards, multiset):
+      weight *= math.comb(deck[card], m)
+      orderings //= math.factorial(m)
+    remaining = frozenbag(
+      {card: deck[card] - m for (card, m) in zip(cards, multiset)})
+    results.append((
+      weight / ways / orderings,
+      tuple((card, m) for (card, m) in zip(cards, multiset) if m),
+      remaining,
+      orderings))
+  return tuple(results)
+
+@functools.lru_cache(maxsize=DRAW_CACHE_SIZE)
+def _draw_groups(civil_decks, num_cards):
+  """Lists the _Groups of civil_decks.draw(num_cards, options), most likely first."""
+  age = next((a for a in Age if civil_decks.deck(a)), None)
+  if age is None:
+    return (_Group(1.0, (), (), None, 1),)
+
+  deck = civil_decks.deck(age)
+  spills = sum(deck[c] for c in deck) < num_cards and age != Age.FOUR
+  results = []
+  for (probability, part, remaining, count) in _deck_groups(deck, num_cards):
+    if not spills:
+      results.append(
+        _Group(probability, (part,), ((age, remaining),), None, count))
+      continue
+
+    drawn = sum(m for (_, m) in part)
+    next_age = age.next_age()
+    for (next_probability, next_part, next_remaining, next_count) in (
+        _deck_groups(civil_decks.deck(next_age), num_cards - drawn)):
+      results.append(_Group(
+        probability * next_probability,
+        (part, next_part),
+        ((age, remaining), (next_age, next_remaining)),
+        next_age,
+        count * next_count))
+  results.sort(key=lambda g: g.probability, reverse=True)
+  return tuple(results)
+
+def _draws(civil_decks, num_cards, top_k=None, threshold=None):
+  """Lists the most likely outcomes of a draw as _Draws.
+
+  Only the orderings which are kept are generated, so asking for a few of
+  the most likely draws is cheap however many cards are drawn.
+
+  Args:
+    civil_decks: The decks to draw from.
+    num_cards: How many cards to draw.
+    top_k: If set, list at most this many draws.
+    threshold: If set, skip draws less likely than this, except that the
+      most likely draw is always listed.
+  Returns:
+    A list of _Draws, most likely first.
+  Throws:
+    ValueError if that would list more than MAX_OUTCOMES draws.
+  """
+  groups = _draw_groups(civil_decks, num_cards)
+  if threshold is not None:
+    kept = [g for g in groups if g.probability >= threshold]
+    if not kept:
+      (groups, top_k) = (groups[:1], 1)
+    else:
+      groups = kept
+  total = sum(g.count for g in groups)
+  if top_k is not None:
+    total = min(total, top_k)
+  if total > MAX_OUTCOMES:
+    raise ValueError(
+      'Drawing {} cards has {} outcomes; pass top_k or a higher threshold'
+      .format(num_cards, total))
+
+  results = []
+  for group in groups:
+    for draw in group.draws():
+      if len(results) == total:
+        return results
+      results.append(draw)
+  return results
+
+class _Draw(namedtuple('_Draw', ['cards', 'decks', 'new_age', 'probability'])):
+  """A DrawOutcome whose CivilDecks hasn't been built yet.
+
+  Fields:
+    cards: A tuple of the cards drawn, in draw order.
+    decks: A tuple of (age, remaining deck) pairs for the decks drawn from.
+    new_age: If the draw spilled into the next age's deck, that age.
+    probability: The chance of drawing exactly these cards in this order.
+  """
+
+  def outcome(self, civil_decks):
+    """Returns the DrawOutcome of drawing these cards from civil_decks."""
+    decks = {a: civil_decks.deck(a) for a in Age}
+    decks.update(self.decks)
+    return DrawOutcome(
+      self.cards, CivilDecks(decks), self.new_age, self.probability)
+
+
+@functools.lru_cache(maxsize=DRAW_CACHE_SIZE)
+def draw_distribution(civil_decks, num_cards):
+  """Lists every outcome of civil_decks.draw(num_cards, options).
+
+  Returns:
+    A tuple of DrawOutcomes whose probabilities sum to 1, most likely first.
+  Throws:
+    ValueError if there are more than MAX_OUTCOMES of them.
+  """
+  return tuple(d.outcome(civil_decks) for d in _draws(civil_decks, num_cards))
+
+def truncate(outcomes, top_k=None, threshold=None, renormalize=True):
+  """Keeps only the most likely outcomes.
+
+  Args:
+    outcomes: A sequence of outcomes with a probability field.
+    top_k: If set, keep at most this many outcomes.
+    threshold: If set, drop outcomes less likely than this. The most likely
+      outcome is always kept, so that callers never average over nothing.
+    renormalize: Whether to scale the kept probabilities to sum to 1.
+  Returns:
+    A list of outcomes, most likely first.
+  """
+  kept = sorted(outcomes, key=lambda o: o.probability, reverse=True)
+  if threshold is not None:
+    kept = [o for o in kept if o.probability >= threshold] or kept[:1]
+  if top_k is not None:
+    kept = kept[:top_k]
+  if renormalize and kept:
+    total = sum(o.probability for o in kept)
+    kept = [o._replace(probability=o.probability / total) for o in kept]
+  return kept
+
+def replenish_distribution(card_row, top_k=None, threshold=None):
+  """Lists every outcome of card_row.replenish(options).
+
+  Args:
+    card_row: A CardRow.
+    top_k: If set, keep only this many of the most likely outcomes.
+    threshold: If set, drop outcomes less likely than this. The most likely
+      outcome is always kept.
+  Returns:
+    A list of ReplenishOutcomes, most likely first. If any were dropped, the
+    probabilities of the rest are scaled up to sum to 1.
+  Throws:
+    ValueError if more than MAX_OUTCOMES outcomes would be kept.
+  """
+  empty_card_slots = card_row.empty_slots.bit_count()
+  if not empty_card_slots:
+    return [ReplenishOutcome(card_row, None, 1.0)]
+
+  if top_k is None and threshold is None:
+    draws = draw_distribution(card_row.civil_decks, empty_card_slots)
+  else:
+    # Only the outcomes kept pay for their decks and card rows.
+    draws = truncate(
+      [d.outcome(card_row.civil_decks) for d in _draws(
+        card_row.civil_decks, empty_card_slots, top_k, threshold)])
+  return [
+    ReplenishOutcome(
+      card_row._replenished(draw.cards, draw.civil_decks),
+      draw.new_age,
+      draw.probability)
+    for draw in draws]
+
+def start_of_turn_distribution(board, top_k=None, threshold=None):
+  """Lists every outcome of board.resolve_start_of_turn(options).
+
+  Args:
+    board: A Board after the end-of-turn sequence.
+    top_k: If set, keep only this many of the most likely outcomes.
+    threshold: If set, drop outcomes less likely than this.
+  Returns:
+    A list of StartOfTurnOutcomes, most likely first.
+  """
+  shifted = board.card_row.shift_left()
+  return [
+    StartOfTurnOutcome(
+      board._after_replenish(ReplenishResult(o.card_row, o.new_age)),
+      o.probability)
+    for o in replenish_distribution(shifted, top_k, threshold)]
@@ -0,0 +1,174 @@
+import random
+import unittest
+from collections import Counter
+from .board import Age, CardRow, CivilDecks, EMPTY_CARD_SLOT, TOTAL_CARDS_IN_CARD_ROW
+from .immutable import frozenbag
+from . import board_initializer, chance, options
+
+EMPTY_DECK = frozenbag({})
+
+def make_decks(ancient, one=None):
+  decks = {age: EMPTY_DECK for age in Age}
+  decks[Age.ANCIENT] = frozenbag(ancient)
+  if one is not None:
+    decks[Age.ONE] = frozenbag(one)
+  return CivilDecks(decks)
+
+def make_options(seed):
+  return options.SimulatorOptions(
+    None, options.ActualRng(random.Random(seed)))
+
+class DrawDistributionTest(unittest.TestCase):
+
+  def test_hypergeometric_probabilities(self):
+    decks = make_decks({'a': 2, 'b': 1})
+    results = chance.draw_distribution(decks, 2)
+    probabilities = {o.cards: o.probability for o in results}
+
+    # a a: 2/3 * 1/2; a b: 2/3 * 1/2; b a: 1/3 * 2/2.
+    self.assertEqual(set(probabilities), {('a', 'a'), ('a', 'b'), ('b', 'a')})
+    self.assertAlmostEqual(probabilities[('a', 'a')], 1 / 3)
+    self.assertAlmostEqual(probabilities[('a', 'b')], 1 / 3)
+    self.assertAlmostEqual(probabilities[('b', 'a')], 1 / 3)
+
+  def test_remaining_decks(self):
+    decks = make_decks({'a': 2, 'b': 1})
+    for o in chance.draw_distribution(decks, 2):
+      self.assertEqual(
+        Counter(o.cards) + Counter(dict(o.civil_decks.deck(Age.ANCIENT).items())),
+        Counter({'a': 2, 'b': 1}))
+      self.assertIsNone(o.new_age)
+
+  def test_spills_into_next_age(self):
+    decks = make_decks({'a': 1}, {'x': 1, 'y': 3})
+    results = chance.draw_distribution(decks, 2)
+
+    self.assertAlmostEqual(sum(o.probability for o in results), 1.0)
+    for o in results:
+      self.assertEqual(o.cards[0], 'a')
+      self.assertEqual(o.new_age, Age.ONE)
+      self.assertFalse(o.civil_decks.deck(Age.ANCIENT))
+    probabilities = {o.cards: o.probability for o in results}
+    self.assertAlmostEqual(probabilities[('a', 'y')], 0.75)
+
+  def test_no_cards_left(self):
+    decks = make_decks({})
+    self.assertEqual(
+      chance.draw_distribution(decks, 3),
+      (chance.DrawOutcome((), decks, None, 1.0),))
+
+  def test_matches_sampling(self):
+    decks = make_decks({'a': 3, 'b': 2, 'c': 1})
+    expected = {o.cards: o.probability
+                for o in chance.draw_distribution(decks, 3)}
+    self.assertAlmostEqual(sum(expected.values()), 1.0)
+
+    rng = make_options(0)
+    trials = 20000
+    seen = Counter(decks.draw(3, rng).cards for _ in range(trials))
+    self.assertLessEqual(set(seen), set(expected))
+    for (cards, p) in expected.items():
+      self.assertAlmostEqual(seen[cards] / trials, p, delta=0.02)
+
+  def test_memoized(self):
+    decks = make_decks({'a': 3, 'b': 2})
+    self.assertIs(
+      chance.draw_distribution(decks, 2),
+      chance.draw_distribution(make_decks({'a': 3, 'b': 2}), 2))
+
+class ReplenishDistributionTest(unittest.TestCase):
+
+  def make_card_row(self):
+    cards = ('x',) * (TOTAL_CARDS_IN_CARD_ROW - 2) + (EMPTY_CARD_SLOT,) * 2
+    return CardRow(cards, make_decks({'a': 2, 'b': 1, 'c': 1}), 2)
+
+  def test_full_row_unchanged(self):
+    card_row = CardRow(
+      ('x',) * TOTAL_CARDS_IN_CARD_ROW, make_decks({'a': 1}), 2)
+    self.assertEqual(
+      chance.replenish_distribution(card_row),
+      [chance.ReplenishOutcome(card_row, None, 1.0)])
+
+  def test_outcomes_match_replenish(self):
+    card_row = self.make_card_row()
+    results = chance.replenish_distribution(card_row)
+    rows = [o.card_row for o in results]
+    self.assertEqual(len(rows), len(set(rows)))
+    self.assertAlmostEqual(sum(o.probability for o in results), 1.0)
+
+    for seed in range(20):
+      sampled = card_row.replenish(make_options(seed)).card_row
+      self.assertIn(sampled, rows)
+      matching = rows[rows.index(sampled)]
+      self.assertEqual(matching.zobrist_hash, sampled.zobrist_hash)
+
+  def test_sorted_most_likely_first(self):
+    results = chance.replenish_distribution(self.make_card_row())
+    probabilities = [o.probability for o in results]
+    self.assertEqual(probabilities, sorted(probabilities, reverse=True))
+
+  def test_top_k(self):
+    results = chance.replenish_distribution(self.make_card_row(), top_k=3)
+    self.assertEqual(len(results), 3)
+    self.assertAlmostEqual(sum(o.probability for o in results), 1.0)
+    full = chance.replenish_distribution(self.make_card_row())
+    self.assertEqual([o.card_row for o in results],
+                     [o.card_row for o in full[:3]])
+
+  def test_threshold(self):
+    full = chance.replenish_distribution(self.make_card_row())
+    threshold = full[0].probability
+    results = chance.replenish_distribution(
+      self.make_card_row(), threshold=threshold)
+    self.assertEqual(
+      len(results), len([o for o in full if o.probability >= threshold]))
+    self.assertAlmostEqual(sum(o.probability for o in results), 1.0)
+
+  def test_threshold_keeps_most_likely(self):
+    full = chance.replenish_distribution(self.make_card_row())
+    results = chance.replenish_distribution(
+      self.make_card_row(), threshold=1.1)
+    self.assertEqual([o.card_row for o in results], [full[0].card_row])
+    self.assertEqual(results[0].probability, 1.0)
+
+  def test_truncate_keeps_most_likely(self):
+    outcomes = chance.draw_distribution(make_decks({'a': 2, 'b': 1}), 2)
+    self.assertEqual(
+      chance.truncate(outcomes, threshold=1.1, renormalize=False),
+      [outcomes[0]])
+
+class StartOfTurnDistributionTest(unittest.TestCase):
+
+  def test_first_turn_top_k(self):
+    # Every slot is empty, so there are far too many orderings to list.
+    board = board_initializer.initialize_board()
+    results = chance.start_of_turn_distribution(board, top_k=4)
+    self.assertEqual(len(results), 4)
+    self.assertAlmostEqual(sum(o.probability for o in results), 1.0)
+    probabilities = [o.probability for o in results]
+    self.assertEqual(probabilities, sorted(probabilities, reverse=True))
+
+  def test_first_turn_refuses_full_distribution(self):
+    with self.assertRaises(ValueError):
+      chance.start_of_turn_distribution(board_initializer.initialize_board())
+
+  def test_later_turn(self):
+    board = board_initializer.initialize_board().resolve_start_of_turn(
+      make_options(0)).resolve_end_of_turn_sequence()
+    results = chance.start_of_turn_distribution(board, top_k=50)
+    self.assertLessEqual(len(results), 50)
+
+    for o in results:
+      self.assertEqual(o.board.round, board.round)
+      self.assertEqual(o.board.tableaux, board.tableaux)
+      self.assertNotIn(EMPTY_CARD_SLOT, o.board.card_row.cards)
+
+  def test_contains_sampled_board(self):
+    board = board_initializer.initialize_board()
+    for _ in range(4):
+      board = board.resolve_start_of_turn(make_options(1))
+      board = board.resolve_end_of_turn_sequence()
+
+    boards = [o.board for o in chance.start_of_turn_distribution(board)]
+    sampled = board.resolve_start_of_turn(make_options(2))
+    self.assertIn(sampled, boards)
@@ -2,7 +2,7 @@
 
 from .board import BuildingTechnology, CardDistribution
 from .buildings import *
-from . import buildings
+from . import buildings, registry
 
 AGRICULTURE_CARD = BuildingTechnology(AGRICULTURE, 0)
 BRONZE_CARD = BuildingTechnology(BRONZE, 0)
@@ -32,7 +32,7 @@ PRO_SPORTS_CARD = BuildingTechnology(PRO_SPORTS, 7)
 MULTIMEDIA_CARD = BuildingTechnology(MULTIMEDIA, 9)
 MOVIES_CARD = BuildingTechnology(MOVIES, 10)
 
-BUILDING_CARDS = tuple(b for b in globals().values() if isinstance(b, BuildingTechnology))
+BUILDING_CARDS = tuple(registry.BUILDING_TECHNOLOGIES)
 
 CIVIL_CARD_DISTRIBUTIONS = {
   AGRICULTURE_CARD: CardDistribution(0, 0, 0),
@@ -0,0 +1,274 @@
+"""A compact binary encoding of Boards.
+
+A Board is a tree of frozendicts, frozensets and Tableau objects, which is
+convenient to work with but expensive to keep millions of in memory. An
+encoded Board is a bytes object of around a hundred bytes containing the same
+information. Search code can read fields straight out of the encoding with a
+BoardLayout, and only decode it into a full Board at the API boundary.
+
+The encoding of a Board with N players is laid out as follows. All integers
+are little-endian.
+
+  player count           u8
+  round                  u16
+  acting seat            u8   (index into the turn order)
+  turn order             u8 * N  (Player values)
+  for each seat, in turn order:
+    government           u8
+    civil actions        u8
+    points               i16 * len(Point)
+    known technologies   u32  (bit i set if the card with ID i is known)
+    building counts      u8 * len(BUILDINGS)  (indexed by building ID)
+  card row player count  u8
+  card row               u8 * TOTAL_CARDS_IN_CARD_ROW  (0 if empty, else card ID + 1)
+  deck counts            u8 * len(BUILDING_CARDS)  (indexed by card ID)
+
+Buildings, cards and governments are identified by their registry IDs, which
+for content are their positions in BUILDINGS, BUILDING_CARDS and GOVERNMENTS.
+Each card is only ever found in the deck for its own age, so the civil decks
+are stored as a single count per card.
+"""
+
+import struct
+from . import board, buildings, content, immutable, registry
+from .board import Point
+
+BUILDINGS = buildings.BUILDINGS
+"""The buildings which can be encoded, in encoding order."""
+
+BUILDING_CARDS = content.BUILDING_CARDS
+"""The cards which can be encoded, in encoding order."""
+
+GOVERNMENTS = tuple(registry.GOVERNMENTS)
+"""The governments which can be encoded, in encoding order."""
+
+POINTS = tuple(Point)
+"""The order in which points are stored in each tableau."""
+
+_PLAYERS = {p.value: p for p in board.Player}
+
+if len(BUILDING_CARDS) > 32:
+  raise RuntimeError('Too many building cards to fit in a technology bitmask')
+
+_HEADER = struct.Struct('<BHB')
+_TABLEAU_FORMAT = 'BB{}hI{}B'.format(len(POINTS), len(BUILDINGS))
+_CARD_ROW_FORMAT = 'B{}B{}B'.format(board.TOTAL_CARDS_IN_CARD_ROW, len(BUILDING_CARDS))
+
+
+class BoardLayout:
+  """Describes where each field lives in an encoded Board.
+
+  The layout depends only on the number of players, so one BoardLayout is
+  shared by every Board with that many players. Use layout_for() to get the
+  layout of an encoded Board.
+  """
+
+  def __init__(self, player_count):
+    self._player_count = player_count
+    self._struct = struct.Struct(
+      '<BHB{}B'.format(player_count) +
+      _TABLEAU_FORMAT * player_count +
+      _CARD_ROW_FORMAT)
+
+    self._seat_offset = _HEADER.size
+    self._tableau_offset = self._seat_offset + player_count
+    self._tableau_size = struct.calcsize('<' + _TABLEAU_FORMAT)
+    self._points_offset = 2
+    self._techs_offset = self._points_offset + 2 * len(POINTS)
+    self._buildings_offset = self._techs_offset + 4
+    self._card_row_offset = (
+      self._tableau_offset + self._tableau_size * player_count)
+    self._decks_offset = self._card_row_offset + 1 + board.TOTAL_CARDS_IN_CARD_ROW
+
+  @property
+  def player_count(self):
+    return self._player_count
+
+  @property
+  def size(self):
+    """The size of an encoded Board, in bytes."""
+    return self._struct.size
+
+  def pack(self, fields):
+    return self._struct.pack(*fields)
+
+  def unpack(self, data):
+    return self._struct.unpack(data)
+
+  def round(self, data):
+    return _HEADER.unpack_from(data)[1]
+
+  def acting_seat(self, data):
+    """Returns the index in the turn order of the acting player."""
+    return data[3]
+
+  def acting_player(self, data):
+    return self.player_at_seat(data, self.acting_seat(data))
+
+  def player_at_seat(self, data, seat):
+    return _PLAYERS[data[self._seat_offset + seat]]
+
+  def seat(self, data, player):
+    """Returns the index of a player in the turn order."""
+    for s in range(self._player_count):
+      if data[self._seat_offset + s] == player.value:
+        return s
+    raise KeyError(player)
+
+  def _tableau_start(self, seat):
+    return self._tableau_offset + self._tableau_size * seat
+
+  def government(self, data, seat):
+    return GOVERNMENTS[data[self._tableau_start(seat)]]
+
+  def civil_actions(self, data, seat):
+    return data[self._tableau_start(seat) + 1]
+
+  def points(self, data, seat, point):
+    offset = (self._tableau_start(seat) + self._points_offset +
+              2 * POINTS.index(point))
+    return struct.unpack_from('<h', data, offset)[0]
+
+  def known_technologies_mask(self, data, seat):
+    """Returns a bitmask; bit i is set if the player knows BUILDING_CARDS[i]."""
+    offset = self._tableau_start(seat) + self._techs_offset
+    return struct.unpack_from('<I', data, offset)[0]
+
+  def building_count(self, data, seat, building):
+    return data[self._tableau_start(seat) + self._buildings_offset +
+                building.id]
+
+  def card_row_slot(self, data, index):
+    """Returns the card in a card row slot, or EMPTY_CARD_SLOT."""
+    card_id = data[self._card_row_offset + 1 + index]
+    if card_id == 0:
+      return board.EMPTY_CARD_SLOT
+    return BUILDING_CARDS[card_id - 1]
+
+  def deck_count(self, data, card):
+    """Returns how many copies of a card remain in the civil decks."""
+    return data[self._decks_offset + card.id]
+
+
+_LAYOUTS = {}
+
+def layout(player_count):
+  """Returns the BoardLayout for Boards with this many players."""
+  if player_count not in _LAYOUTS:
+    _LAYOUTS[player_count] = BoardLayout(player_count)
+  return _LAYOUTS[player_count]
+
+def layout_for(data):
+  """Returns the BoardLayout of an encoded Board."""
+  return layout(data[0])
+
+
+def encode(the_board):
+  """Encodes a Board as bytes.
+
+  Raises:
+    ValueError: if the board contains something that can't be encoded.
+  """
+  turn_order = tuple(the_board.turn_order)
+  fields = [
+    len(turn_order),
+    the_board.round,
+    turn_order.index(the_board.acting_player)
+  ]
+  fields.extend(p.value for p in turn_order)
+
+  card_row = the_board.card_row
+  try:
+    for player in turn_order:
+      fields.extend(_encode_tableau(the_board.tableau(player)))
+
+    fields.append(card_row.player_count)
+    fields.extend(_encode_card(c) for c in card_row.cards)
+    fields.extend(_encode_decks(card_row.civil_decks))
+
+    return layout(len(turn_order)).pack(fields)
+  except (struct.error, IndexError) as e:
+    # An IndexError means a building or card was created after the content
+    # modules, so it has no slot in the encoding.
+    raise ValueError('Board cannot be encoded: {}'.format(e))
+
+def _encode_tableau(tableau):
+  tech_mask = 0
+  for t in tableau.building_technologies:
+    tech_mask |= 1 << t.id
+
+  building_counts = [0] * len(BUILDINGS)
+  for (b, c) in tableau.buildings.items():
+    building_counts[b.id] = c
+
+  return ([tableau.government.id, tableau.civil_actions] +
+          [tableau.points(p) for p in POINTS] +
+          [tech_mask] +
+          building_counts)
+
+def _encode_card(card):
+  if card == board.EMPTY_CARD_SLOT:
+    return 0
+  return card.id + 1
+
+def _encode_decks(civil_decks):
+  counts = [0] * len(BUILDING_CARDS)
+  for age in board.Age:
+    deck = civil_decks.deck(age)
+    for card in deck:
+      if card.age != age:
+        raise ValueError('{} found in the deck for {}'.format(card, age))
+      counts[card.id] = deck[card]
+  return counts
+
+
+def decode(data):
+  """Decodes bytes produced by encode() back into a Board."""
+  board_layout = layout_for(data)
+  player_count = board_layout.player_count
+  fields = iter(board_layout.unpack(data))
+
+  next(fields)  # player count
+  round_number = next(fields)
+  acting_seat = next(fields)
+  turn_order = [_PLAYERS[next(fields)] for _ in range(player_count)]
+
+  tableaux = {p: _decode_tableau(fields) for p in turn_order}
+
+  card_row_player_count = next(fields)
+  cards = tuple(_decode_card(next(fields))
+                for _ in range(board.TOTAL_CARDS_IN_CARD_ROW))
+  civil_decks = _decode_decks([next(fields) for _ in BUILDING_CARDS])
+
+  return board.Board(
+    round_number,
+    turn_order,
+    turn_order[acting_seat],
+    board.CardRow(cards, civil_decks, card_row_player_count),
+    tableaux)
+
+def _decode_tableau(fields):
+  government = GOVERNMENTS[next(fields)]
+  civil_actions = next(fields)
+  points = {p: next(fields) for p in POINTS}
+  tech_mask = next(fields)
+  building_counts = [next(fields) for _ in BUILDINGS]
+
+  return board.Tableau(
+    government,
+    {b: c for (b, c) in zip(BUILDINGS, building_counts) if c},
+    [t for (i, t) in enumerate(BUILDING_CARDS) if tech_mask & (1 << i)],
+    points,
+    civil_actions)
+
+def _decode_card(card_id):
+  if card_id == 0:
+    return board.EMPTY_CARD_SLOT
+  return BUILDING_CARDS[card_id - 1]
+
+def _decode_decks(counts):
+  decks = {age: {} for age in board.Age}
+  for (card, count) in zip(BUILDING_CARDS, counts):
+    decks[card.age][card] = count
+  return board.CivilDecks(
+    {age: immutable.frozenbag(d) for (age, d) in decks.items()})
@@ -0,0 +1,70 @@
+import random
+import unittest
+from .board import Player, Point
+from . import board, board_initializer, buildings, content, encoding, events, options
+
+def play_a_few_turns(testing_board, turns):
+  sim_options = options.SimulatorOptions(
+    events.NULL_LOGGER, options.ActualRng(random.Random(4)))
+  for _ in range(turns):
+    testing_board = testing_board.resolve_start_of_turn(sim_options)
+    testing_board = testing_board.play_action_phase(
+      sorted(testing_board.legal_actions(), key=lambda a: a.building.name)[:1])
+  return testing_board
+
+class EncodingTest(unittest.TestCase):
+
+  def test_round_trip(self):
+    testing_board = play_a_few_turns(board_initializer.initialize_board(), 5)
+    data = encoding.encode(testing_board)
+    decoded = encoding.decode(data)
+
+    self.assertEqual(decoded, testing_board)
+    self.assertEqual(encoding.encode(decoded), data)
+    self.assertEqual(decoded.card_row.cards, testing_board.card_row.cards)
+    for p in Player:
+      for point in Point:
+        self.assertEqual(decoded.tableau(p).points(point),
+                         testing_board.tableau(p).points(point))
+
+  def test_encoding_is_small(self):
+    data = encoding.encode(board_initializer.initialize_board())
+    self.assertLess(len(data), 256)
+
+  def test_read_fields_directly(self):
+    testing_board = play_a_few_turns(board_initializer.initialize_board(), 3)
+    data = encoding.encode(testing_board)
+    layout = encoding.layout_for(data)
+
+    self.assertEqual(layout.round(data), testing_board.round)
+    self.assertEqual(layout.acting_player(data), testing_board.acting_player)
+
+    seat = layout.seat(data, Player.ONE)
+    tableau = testing_board.tableau(Player.ONE)
+    self.assertEqual(layout.civil_actions(data, seat), tableau.civil_actions)
+    self.assertEqual(layout.points(data, seat, Point.FOOD),
+                     tableau.points(Point.FOOD))
+    self.assertEqual(layout.building_count(data, seat, buildings.AGRICULTURE),
+                     tableau.num_buildings(buildings.AGRICULTURE))
+    self.assertEqual(layout.building_count(data, seat, buildings.MOVIES), 0)
+
+    mask = layout.known_technologies_mask(data, seat)
+    self.assertEqual(
+      {t for (i, t) in enumerate(encoding.BUILDING_CARDS) if mask & (1 << i)},
+      set(tableau.building_technologies))
+
+    for i in range(board.TOTAL_CARDS_IN_CARD_ROW):
+      self.assertEqual(layout.card_row_slot(data, i),
+                       testing_board.card_row.cards[i])
+    self.assertEqual(
+      layout.deck_count(data, content.IRRIGATION_CARD),
+      testing_board.card_row.civil_decks.deck(board.Age.ONE)[content.IRRIGATION_CARD])
+
+  def test_negative_points(self):
+    testing_board = board_initializer.initialize_board()
+    testing_board = testing_board.update_tableau(
+      Player.ONE,
+      testing_board.tableau(Player.ONE).add_points({Point.FOOD: -3}))
+
+    decoded = encoding.decode(encoding.encode(testing_board))
+    self.assertEqual(decoded.tableau(Player.ONE).points(Point.FOOD), -3)
@@ -0,0 +1,283 @@
+"""Scores leaf Boards in batches with vectorized value models.
+
+Calling a model once per leaf spends most of its time in Python overhead. An
+EvaluationService instead collects the leaves that search threads submit,
+and once it has batch_size of them, or the oldest has waited max_wait
+seconds, scores them all with a single call to a batch evaluator. Each
+submitter gets a concurrent.futures.Future for its own value.
+
+A batch evaluator is any object with an evaluate_batch(boards) method which
+returns a NumPy vector with each board's value, between 0 and 1, for its
+acting player. LinearEvaluator and MlpEvaluator are pure-NumPy models over
+the columns of a features.Featurizer.
+"""
+
+import concurrent.futures
+import queue
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from . import features
+
+
+def _sigmoid(x):
+  return 1.0 / (1.0 + np.exp(-x))
+
+
+class LinearEvaluator:
+  """A logistic model over board features."""
+
+  def __init__(self, weights, bias=0.0, player_count=2):
+    """Creates an evaluator.
+
+    Args:
+      weights: A vector with one weight per column of
+        features.FeatureSchema(player_count).
+      bias: Added before the logistic function.
+      player_count: The number of players on the boards evaluated.
+    """
+    self._featurizer = features.Featurizer(player_count)
+    weights = np.asarray(weights, dtype=np.float32)
+    if weights.shape != (self._featurizer.schema.size,):
+      raise ValueError('Expected {} weights, not {}'.format(
+        self._featurizer.schema.size, weights.shape))
+    self._weights = weights
+    self._bias = bias
+
+  @classmethod
+  def points(cls, player_count=2):
+    """Returns a model like mcts.points_evaluator.
+
+    Culture counts fully and other points a quarter as much, as the
+    difference between the acting player and everyone else, scaled down by
+    4. With more than two players the others' points are averaged.
+    """
+    schema = features.FeatureSchema(player_count)
+    weights = np.zeros(schema.size, dtype=np.float32)
+    for seat in range(player_count):
+      sign = 1.0 if seat == 0 else -1.0 / (player_count - 1)
+      for (point, weight) in (('CULTURE', 1.0), ('SCIENCE', 0.25),
+                              ('FOOD', 0.25), ('RESOURCES', 0.25)):
+        weights[schema.index('seat{}.points.{}'.format(seat, point))] = (
+          sign * weight / 4.0)
+    return cls(weights, 0.0, player_count)
+
+  def evaluate_batch(self, boards):
+    matrix = self._featurizer.featurize(boards)
+    return _sigmoid(matrix @ self._weights + self._bias)
+
+
+class MlpEvaluator:
+  """A multilayer perceptron over board features.
+
+  Hidden layers use ReLU and the output is a single logistic unit.
+  """
+
+  def __init__(self, layers, scale=None, player_count=2):
+    """Creates an evaluator.
+
+    Args:
+      layers: A list of (weights, biases) pairs. The first weight matrix has
+        one row per feature column and the last has a single column.
+      scale: If set, a vector each feature row is multiplied by first.
+      player_count: The number of players on the boards evaluated.
+    """
+    self._featurizer = features.Featurizer(player_count)
+    self._layers = [(np.asarray(w, dtype=np.float32),
+                     np.asarray(b, dtype=np.float32)) for (w, b) in layers]
+    if self._layers[0][0].shape[0] != self._featurizer.schema.size:
+      raise ValueError('Expected {} inputs, not {}'.format(
+        self._featurizer.schema.size, self._layers[0][0].shape[0]))
+    if self._layers[-1][0].shape[1] != 1:
+      raise ValueError('The last layer must have one output')
+    self._scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+  @classmethod
+  def random(cls, hidden=(64,), seed=None, player_count=2):
+    """Returns an untrained network with small random weights."""
+    rng = np.random.default_rng(seed)
+    sizes = [features.FeatureSchema(player_count).size] + list(hidden) + [1]
+    layers = [(rng.normal(0.0, 1.0 / np.sqrt(n), (n, m)), np.zeros(m))
+              for (n, m) in zip(sizes, sizes[1:])]
+    return cls(layers, player_count=player_count)
+
+  def evaluate_batch(self, boards):
+    x = self._featurizer.featurize(boards)
+    if self._scale is not None:
+      x = x * self._scale
+    for (w, b) in self._layers[:-1]:
+      x = np.maximum(x @ w + b, 0.0)
+    (w, b) = self._layers[-1]
+    return _sigmoid(x @ w + b)[:, 0]
+
+
+class ServiceStats(namedtuple('ServiceStats', ['boards', 'batches', 'seconds'])):
+  """Counters for an EvaluationService.
+
+  Fields:
+    boards: How many boards have been evaluated.
+    batches: How many batches they were evaluated in.
+    seconds: Time spent inside the evaluator.
+  """
+
+  @property
+  def mean_batch_size(self):
+    if self.batches == 0:
+      return 0.0
+    return self.boards / self.batches
+
+
+class EvaluationService:
+  """Evaluates submitted boards in batches on a background thread.
+
+  Use as a context manager, or call close() when done.
+  """
+
+  _STOP = object()
+
+  def __init__(self, evaluator, batch_size=64, max_wait=0.001):
+    """Starts a service.
+
+    Args:
+      evaluator: An object with an evaluate_batch(boards) method. It is only
+        called from the service's thread.
+      batch_size: The most boards to evaluate at once.
+      max_wait: How many seconds the first board of a batch may wait for
+        more boards to arrive. Larger values give larger batches and more
+        throughput, at the cost of latency.
+    """
+    self._evaluator = evaluator
+    self._batch_size = batch_size
+    self._max_wait = max_wait
+    self._queue = queue.SimpleQueue()
+    self._lock = threading.Lock()
+    self._closed = False
+    self._boards = 0
+    self._batches = 0
+    self._seconds = 0.0
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  @property
+  def stats(self):
+    return ServiceStats(self._boards, self._batches, self._seconds)
+
+  def submit(self, board):
+    """Queues a board for evaluation.
+
+    Returns:
+      A Future for the board's value for its acting player.
+    Throws:
+      RuntimeError if the service has been closed.
+    """
+    future = concurrent.futures.Future()
+    with self._lock:
+      if self._closed:
+        raise RuntimeError('EvaluationService is closed')
+      self._queue.put((board, future))
+    return future
+
+  def evaluate(self, board):
+    """Returns a board's value for its acting player, waiting for it."""
+    return self.submit(board).result()
+
+  def as_evaluator(self):
+    """Returns a function (board, player) -> value for mcts.MctsSearcher.
+
+    Values for players other than the acting one are taken to be one minus
+    the acting player's value, as in a two-player game, and asking for each
+    player's value of the same board only submits it once.
+
+    Each call blocks until its batch is evaluated. Batching only helps if
+    several threads search at once: a lone search thread never fills a
+    batch, so every evaluation also waits up to max_wait. Give the service
+    max_wait=0 if it only has one searcher.
+    """
+    last = [None, None]
+    def evaluate(board, player):
+      if last[0] is not board:
+        last[1] = self.evaluate(board)
+        last[0] = board
+      value = last[1]
+      return value if player == board.acting_player else 1.0 - value
+    return evaluate
+
+  def close(self):
+    """Evaluates anything still queued, then stops the thread.
+
+    If the thread has died, anything still queued fails with a RuntimeError.
+    Later calls to submit() raise RuntimeError.
+    """
+    with self._lock:
+      if not self._closed:
+        self._closed = True
+        self._queue.put(self._STOP)
+    self._thread.join()
+    self._fail_queued()
+
+  def _fail_queued(self):
+    while True:
+      try:
+        item = self._queue.get_nowait()
+      except queue.Empty:
+        return
+      if item is not self._STOP:
+        item[1].set_exception(RuntimeError('EvaluationService is closed'))
+
+  def _run(self):
+    batch = []
+    try:
+      stopping = False
+      while not stopping:
+        item = self._queue.get()
+        if item is self._STOP:
+          return
+        batch = [item]
+        deadline = time.perf_counter() + self._max_wait
+        while len(batch) < self._batch_size:
+          timeout = deadline - time.perf_counter()
+          try:
+            item = (self._queue.get(timeout=timeout) if timeout > 0
+                    else self._queue.get_nowait())
+          except queue.Empty:
+            break
+          if item is self._STOP:
+            stopping = True
+            break
+          batch.append(item)
+        self._evaluate(batch)
+    finally:
+      # If the thread dies, refuse new work and fail everything it was given,
+      # instead of leaving callers waiting forever.
+      with self._lock:
+        self._closed = True
+      for (_, future) in batch:
+        if not future.done():
+          future.set_exception(RuntimeError('EvaluationService thread died'))
+      self._fail_queued()
+
+  def _evaluate(self, batch):
+    """Evaluates a batch, giving every future either a value or an error."""
+    try:
+      boards = [board for (board, _) in batch]
+      start = time.perf_counter()
+      values = [float(v) for v in self._evaluator.evaluate_batch(boards)]
+      if len(values) != len(batch):
+        raise ValueError('evaluate_batch returned {} values for {} boards'
+                         .format(len(values), len(batch)))
+      self._seconds += time.perf_counter() - start
+      self._boards += len(batch)
+      self._batches += 1
+    except Exception as e:
+      for (_, future) in batch:
+        future.set_exception(e)
+      return
+    for ((_, future), value) in zip(batch, values):
+      future.set_result(value)
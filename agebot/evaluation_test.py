@@ -0,0 +1,127 @@
+import random
+import threading
+import unittest
+from unittest import mock
+import numpy as np
+from .board import Player
+from . import board_initializer, evaluation, events, mcts, options, records
+
+def game_boards():
+  game = records.record_game(11, max_rounds=8)
+  return list(records.replay(game.initial_board, game.seed, game.turns))
+
+class FailingEvaluator:
+
+  def evaluate_batch(self, boards):
+    raise RuntimeError('broken model')
+
+class ShortEvaluator:
+
+  def evaluate_batch(self, boards):
+    return [0.5] * (len(boards) - 1)
+
+class EvaluatorTest(unittest.TestCase):
+
+  def test_points_model_matches_points_evaluator(self):
+    boards = game_boards()
+    values = evaluation.LinearEvaluator.points().evaluate_batch(boards)
+    for (b, v) in zip(boards, values):
+      self.assertAlmostEqual(
+        v, mcts.points_evaluator(b, b.acting_player), places=5)
+
+  def test_mlp(self):
+    boards = game_boards()
+    values = evaluation.MlpEvaluator.random(hidden=(16, 8), seed=1).evaluate_batch(
+      boards)
+    self.assertEqual(values.shape, (len(boards),))
+    self.assertTrue(np.all((values > 0) & (values < 1)))
+
+  def test_wrong_shapes(self):
+    with self.assertRaises(ValueError):
+      evaluation.LinearEvaluator(np.zeros(3))
+    with self.assertRaises(ValueError):
+      evaluation.MlpEvaluator([(np.zeros((3, 1)), np.zeros(1))])
+
+class EvaluationServiceTest(unittest.TestCase):
+
+  def test_batches_submissions(self):
+    boards = game_boards()
+    evaluator = evaluation.LinearEvaluator.points()
+    expected = evaluator.evaluate_batch(boards).tolist()
+
+    with evaluation.EvaluationService(
+        evaluation.LinearEvaluator.points(), batch_size=8, max_wait=0.5) as service:
+      futures = [service.submit(b) for b in boards]
+      values = [f.result() for f in futures]
+
+    self.assertEqual(len(values), len(expected))
+    for (v, e) in zip(values, expected):
+      self.assertAlmostEqual(v, e, places=6)
+    stats = service.stats
+    self.assertEqual(stats.boards, len(boards))
+    self.assertLess(stats.batches, len(boards))
+    self.assertLessEqual(stats.mean_batch_size, 8)
+
+  def test_errors_reach_futures(self):
+    with evaluation.EvaluationService(FailingEvaluator(), max_wait=0) as service:
+      future = service.submit(board_initializer.initialize_board())
+      with self.assertRaises(RuntimeError):
+        future.result()
+
+  def test_wrong_number_of_values(self):
+    with evaluation.EvaluationService(
+        ShortEvaluator(), batch_size=2, max_wait=0.5) as service:
+      futures = [service.submit(board_initializer.initialize_board())
+                 for _ in range(2)]
+      for future in futures:
+        with self.assertRaises(ValueError):
+          future.result(timeout=5)
+      # The thread survives bad batches.
+      futures = [service.submit(board_initializer.initialize_board())
+                 for _ in range(2)]
+      for future in futures:
+        with self.assertRaises(ValueError):
+          future.result(timeout=5)
+
+  def test_submit_after_thread_dies(self):
+    service = evaluation.EvaluationService(
+      evaluation.LinearEvaluator.points(), max_wait=0)
+    def crash(batch):
+      raise KeyError('bug')
+    service._evaluate = crash
+    with mock.patch.object(threading, 'excepthook'):
+      future = service.submit(board_initializer.initialize_board())
+      with self.assertRaises(RuntimeError):
+        future.result(timeout=5)
+      service._thread.join(timeout=5)
+    with self.assertRaises(RuntimeError):
+      service.submit(board_initializer.initialize_board())
+    service.close()
+
+  def test_close_finishes_queued_work(self):
+    service = evaluation.EvaluationService(
+      evaluation.LinearEvaluator.points(), batch_size=1000, max_wait=10.0)
+    future = service.submit(board_initializer.initialize_board())
+    service.close()
+    self.assertAlmostEqual(future.result(), 0.5)
+
+  def test_search_with_service(self):
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(4)))
+    start = board_initializer.initialize_board().resolve_start_of_turn(
+      sim_options)
+    with evaluation.EvaluationService(
+        evaluation.LinearEvaluator.points(), max_wait=0) as service:
+      result = mcts.MctsSearcher(
+        sim_options, iterations=20, seed=2,
+        evaluator=service.as_evaluator()).search(start)
+    self.assertEqual(result.iterations, 20)
+
+  def test_submit_after_close(self):
+    service = evaluation.EvaluationService(evaluation.LinearEvaluator.points())
+    service.close()
+    with self.assertRaises(RuntimeError):
+      service.submit(board_initializer.initialize_board())
+    with self.assertRaises(RuntimeError):
+      service.as_evaluator()(board_initializer.initialize_board(), Player.ONE)
+    service.close()
@@ -0,0 +1,253 @@
+"""Structured events for what happens during a game, and loggers for them.
+
+The engine reports each transition as one event object, passed to the logger
+in SimulatorOptions:
+
+  - CardsDrawn when cards are drawn from the civil decks,
+  - ActionPlayed when the acting player plays an action,
+  - IncomeGained at the end of a turn,
+  - AgeChanged when a new age begins.
+
+Building an event costs time, so the engine first asks is_enabled(); for a
+NullLogger it skips the event entirely. Other loggers should get work off
+the game loop: JsonlLogger only stores events until its buffer is full, and
+BackgroundLogger hands them to another thread.
+"""
+
+import json
+import queue
+import threading
+from collections import namedtuple
+
+
+class CardsDrawn(namedtuple('CardsDrawn', ['cards', 'new_age'])):
+  """Cards were drawn from the civil decks.
+
+  Fields:
+    cards: A tuple of the cards drawn, in order.
+    new_age: If the draw reached a new age's deck, that Age.
+  """
+
+  def to_dict(self):
+    return {
+      'event': 'draw',
+      'cards': [c.name for c in self.cards],
+      'new_age': None if self.new_age is None else self.new_age.name,
+    }
+
+
+class ActionPlayed(namedtuple('ActionPlayed', ['player', 'action'])):
+  """A player played an action, such as building a building.
+
+  Fields:
+    player: The Player who acted.
+    action: The Action played.
+  """
+
+  def to_dict(self):
+    return {
+      'event': 'build',
+      'player': self.player.name,
+      'building': self.action.building.name,
+    }
+
+
+class IncomeGained(namedtuple('IncomeGained', ['player', 'points'])):
+  """A player gained points from their buildings at the end of their turn.
+
+  Fields:
+    player: The Player whose turn ended.
+    points: A tuple of (Point, amount) pairs.
+  """
+
+  def to_dict(self):
+    return {
+      'event': 'income',
+      'player': self.player.name,
+      'points': {p.name: n for (p, n) in self.points},
+    }
+
+
+class AgeChanged(namedtuple('AgeChanged', ['age'])):
+  """A new age began.
+
+  Fields:
+    age: The new Age.
+  """
+
+  def to_dict(self):
+    return {'event': 'age_change', 'age': self.age.name}
+
+
+class Logger:
+  """The interface for event loggers."""
+
+  def is_enabled(self):
+    """Whether the engine should build and send events at all."""
+    return True
+
+  def log(self, event):
+    """Records one event."""
+    raise NotImplementedError
+
+  def flush(self):
+    """Makes sure every event logged so far has been written."""
+
+  def close(self):
+    """Flushes and releases any resources."""
+    self.flush()
+
+
+class NullLogger(Logger):
+  """Discards everything. The engine doesn't even build events for it."""
+
+  def is_enabled(self):
+    return False
+
+  def log(self, event):
+    pass
+
+NULL_LOGGER = NullLogger()
+"""A shared NullLogger."""
+
+
+def active_logger(options):
+  """Returns the logger events should be sent to, or None to skip them.
+
+  Args:
+    options: SimulatorOptions, or None.
+  """
+  if options is None:
+    return None
+  logger = options.logger
+  if logger is None or not logger.is_enabled():
+    return None
+  return logger
+
+
+class JsonlLogger(Logger):
+  """Writes events to a text file, one JSON object per line.
+
+  Events are kept as objects until buffer_size of them have been logged, and
+  only then converted and written all at once.
+  """
+
+  def __init__(self, stream, buffer_size=1024):
+    """Creates a logger.
+
+    Args:
+      stream: A writable text file. It is not closed by close().
+      buffer_size: How many events to hold before writing them out.
+    """
+    self._stream = stream
+    self._buffer_size = buffer_size
+    self._buffer = []
+
+  def log(self, event):
+    self._buffer.append(event)
+    if len(self._buffer) >= self._buffer_size:
+      self.flush()
+
+  def flush(self):
+    if self._buffer:
+      self._stream.write(''.join(
+        json.dumps(e.to_dict()) + '\n' for e in self._buffer))
+      self._buffer = []
+    self._stream.flush()
+
+
+class BackgroundLogger(Logger):
+  """Passes events to another logger on a background thread.
+
+  log() only puts the event on a queue, so a slow logger never holds up the
+  game loop. Call close() to wait for the queue to drain.
+
+  If the wrapped logger raises, the events after that are dropped, and the
+  next flush() or close() raises the same exception.
+  """
+
+  _STOP = object()
+
+  def __init__(self, logger):
+    """Creates a logger and starts its thread.
+
+    Args:
+      logger: The Logger that events are eventually passed to. It is only
+        used from the background thread.
+    """
+    self._logger = logger
+    self._queue = queue.SimpleQueue()
+    self._lock = threading.Lock()
+    self._closed = False
+    self._error = None
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def is_enabled(self):
+    return self._logger.is_enabled()
+
+  def log(self, event):
+    self._queue.put(event)
+
+  def flush(self):
+    """Blocks until every event logged so far has been passed on and flushed.
+
+    Once the logger is closed, everything has already been flushed, so this
+    does nothing.
+
+    Throws:
+      The first exception the wrapped logger raised, if any.
+    """
+    with self._lock:
+      if self._closed or not self._thread.is_alive():
+        request = None
+      else:
+        request = _FlushRequest()
+        self._queue.put(request)
+    if request is not None:
+      request.done.wait()
+    self._raise_error()
+
+  def close(self):
+    """Drains the queue and closes the wrapped logger.
+
+    Throws:
+      The first exception the wrapped logger raised, if any.
+    """
+    with self._lock:
+      if not self._closed:
+        self._closed = True
+        self._queue.put(self._STOP)
+    self._thread.join()
+    self._raise_error()
+
+  def _raise_error(self):
+    if self._error is not None:
+      raise self._error
+
+  def _run(self):
+    while True:
+      item = self._queue.get()
+      try:
+        if item is self._STOP:
+          self._logger.close()
+          return
+        if self._error is not None:
+          continue
+        if isinstance(item, _FlushRequest):
+          self._logger.flush()
+        else:
+          self._logger.log(item)
+      except Exception as e:
+        if self._error is None:
+          self._error = e
+      finally:
+        if isinstance(item, _FlushRequest):
+          item.done.set()
+
+
+class _FlushRequest:
+  __slots__ = ('done',)
+
+  def __init__(self):
+    self.done = threading.Event()
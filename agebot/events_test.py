@@ -0,0 +1,95 @@
+import io
+import json
+import unittest
+from . import events, self_play
+
+class ListLogger(events.Logger):
+
+  def __init__(self, enabled=True):
+    self.enabled = enabled
+    self.events = []
+    self.flushes = 0
+
+  def is_enabled(self):
+    return self.enabled
+
+  def log(self, event):
+    self.events.append(event)
+
+  def flush(self):
+    self.flushes += 1
+
+class FailingLogger(ListLogger):
+
+  def log(self, event):
+    super().log(event)
+    if len(self.events) == 2:
+      raise OSError('disk full')
+
+class EventsTest(unittest.TestCase):
+
+  def test_game_reports_every_kind_of_event(self):
+    logger = ListLogger()
+    result = self_play.play_game(3, max_rounds=8, logger=logger)
+
+    kinds = {type(e) for e in logger.events}
+    self.assertEqual(kinds, {events.CardsDrawn, events.ActionPlayed,
+                             events.IncomeGained, events.AgeChanged})
+    self.assertEqual(
+      len([e for e in logger.events if isinstance(e, events.ActionPlayed)]),
+      result.actions)
+    self.assertEqual(
+      len([e for e in logger.events if isinstance(e, events.IncomeGained)]),
+      2 * result.rounds)
+
+  def test_logging_does_not_change_the_game(self):
+    self.assertEqual(self_play.play_game(4, max_rounds=5, logger=ListLogger()),
+                     self_play.play_game(4, max_rounds=5))
+
+  def test_disabled_logger_gets_nothing(self):
+    logger = ListLogger(enabled=False)
+    self_play.play_game(3, max_rounds=3, logger=logger)
+    self.assertEqual(logger.events, [])
+
+  def test_jsonl_logger_buffers(self):
+    stream = io.StringIO()
+    logger = events.JsonlLogger(stream, buffer_size=1000)
+    self_play.play_game(3, max_rounds=3, logger=logger)
+    self.assertEqual(stream.getvalue(), '')
+
+    logger.close()
+    lines = [json.loads(l) for l in stream.getvalue().splitlines()]
+    self.assertGreater(len(lines), 0)
+    self.assertEqual(
+      {l['event'] for l in lines}, {'draw', 'build', 'income', 'age_change'})
+
+  def test_background_logger_keeps_order(self):
+    expected = ListLogger()
+    self_play.play_game(6, max_rounds=4, logger=expected)
+
+    inner = ListLogger()
+    logger = events.BackgroundLogger(inner)
+    self_play.play_game(6, max_rounds=4, logger=logger)
+    logger.flush()
+    self.assertEqual(inner.events, expected.events)
+    logger.close()
+    self.assertEqual(inner.flushes, 2)
+
+  def test_background_logger_flush_after_close(self):
+    inner = ListLogger()
+    logger = events.BackgroundLogger(inner)
+    logger.close()
+    logger.flush()
+    logger.close()
+    self.assertEqual(inner.flushes, 1)
+
+  def test_background_logger_reraises_errors(self):
+    inner = FailingLogger()
+    logger = events.BackgroundLogger(inner)
+    for i in range(5):
+      logger.log(i)
+    with self.assertRaisesRegex(OSError, 'disk full'):
+      logger.flush()
+    with self.assertRaisesRegex(OSError, 'disk full'):
+      logger.close()
+    self.assertEqual(inner.events, [0, 1])
@@ -0,0 +1,226 @@
+"""Depth-limited expectimax search with alpha-beta pruning for two players.
+
+Each ply of the tree is one turn:
+
+  - At a decision node the acting player picks one of the distinct ways to
+    end their action phase, as listed by outcomes.action_phase_outcomes().
+    The end-of-turn sequence then follows deterministically.
+  - At a chance node the start of the next turn refills the card row. Its
+    outcomes and their probabilities come from
+    chance.start_of_turn_distribution(), truncated to the most likely few.
+
+Values are between 0 and 1 for the acting player, so with two players a
+child's value for its own acting player v is worth 1 - v to the parent.
+Decision nodes are searched with alpha-beta; chance nodes use Star1 pruning,
+which stops averaging as soon as the outcomes seen so far prove the average
+falls outside the window.
+
+The search deepens one turn at a time until a deadline, ordering moves by
+the transposition table's best move, then killer moves for the ply, then
+the history score of the BuildActions they contain.
+"""
+
+import time
+from collections import namedtuple
+from . import chance, mcts, outcomes, transposition
+
+_EXACT = 0
+_LOWER = 1
+_UPPER = 2
+
+
+class ExpectimaxResult(namedtuple('ExpectimaxResult', [
+    'actions', 'value', 'depth', 'nodes', 'elapsed'])):
+  """The outcome of a search.
+
+  Fields:
+    actions: The chosen actions for the acting player, in canonical order.
+    value: The expected value of those actions for the acting player.
+    depth: How many turns deep the last completed iteration searched.
+    nodes: How many decision and chance nodes were visited.
+    elapsed: Wall-clock seconds spent searching.
+  """
+
+
+class _Entry(namedtuple('_Entry', ['value', 'bound', 'best'])):
+  """What the transposition table remembers about a decision node."""
+
+
+class _Timeout(Exception):
+  pass
+
+
+class ExpectimaxSearcher:
+  """Chooses a turn's actions by iteratively deepened expectimax.
+
+  The transposition table and move-ordering statistics are kept between
+  searches.
+  """
+
+  def __init__(self, seconds=1.0, max_depth=8, chance_outcomes=4,
+               evaluator=mcts.points_evaluator, table_capacity=1 << 16):
+    """Creates a searcher.
+
+    Args:
+      seconds: The wall-clock budget for each search. None for no limit, in
+        which case max_depth must be reached.
+      max_depth: The most turns to look ahead.
+      chance_outcomes: How many of the most likely starts of turn each chance
+        node considers. Their probabilities are scaled to sum to 1.
+      evaluator: A function (board, player) -> float in [0, 1], applied to
+        boards in some player's action phase.
+      table_capacity: The size of the transposition table.
+    """
+    self._seconds = seconds
+    self._max_depth = max_depth
+    self._chance_outcomes = chance_outcomes
+    self._evaluator = evaluator
+    self._table = transposition.TranspositionTable(table_capacity)
+    self._outcomes = outcomes.OutcomeCache()
+    self._chance_cache = {}
+    self._history = {}
+    self._killers = {}
+    self._deadline = None
+    self._nodes = 0
+
+  @property
+  def table(self):
+    return self._table
+
+  def search(self, board):
+    """Searches from a board in the acting player's action phase.
+
+    Returns:
+      An ExpectimaxResult. If not even one turn could be searched before
+      the deadline, its actions are empty and its depth is 0.
+    """
+    start = time.perf_counter()
+    self._deadline = None if self._seconds is None else start + self._seconds
+    self._nodes = 0
+    self._killers = {}
+    self._table.new_generation()
+
+    best = ((), self._evaluator(board, board.acting_player), 0)
+    for depth in range(1, self._max_depth + 1):
+      try:
+        (value, move) = self._decision(board, depth, 0.0, 1.0, 0)
+      except _Timeout:
+        break
+      best = (move.actions, value, depth)
+      if self._deadline is not None and time.perf_counter() >= self._deadline:
+        break
+
+    return ExpectimaxResult(
+      list(best[0]), best[1], best[2], self._nodes,
+      time.perf_counter() - start)
+
+  def _check_deadline(self):
+    self._nodes += 1
+    if (self._deadline is not None and self._nodes % 64 == 0 and
+        time.perf_counter() >= self._deadline):
+      raise _Timeout()
+
+  def _decision(self, board, depth, alpha, beta, ply):
+    """Returns (value, best move) for the acting player of a board."""
+    self._check_deadline()
+    if depth == 0:
+      return (self._evaluator(board, board.acting_player), None)
+
+    original_alpha = alpha
+    best_hint = None
+    entry = self._table.lookup(board)
+    if entry is not None:
+      stored = entry.value
+      best_hint = stored.best
+      if entry.depth >= depth:
+        if stored.bound == _EXACT:
+          return (stored.value, stored.best)
+        if stored.bound == _LOWER:
+          alpha = max(alpha, stored.value)
+        else:
+          beta = min(beta, stored.value)
+        if alpha >= beta:
+          return (stored.value, stored.best)
+
+    player = board.acting_player
+    best_value = -1.0
+    best_move = None
+    for move in self._ordered_moves(board, best_hint, ply):
+      after = board._replace_tableau(player, move.tableau)
+      value = 1.0 - self._chance(
+        after.resolve_end_of_turn_sequence(), depth - 1, 1.0 - beta,
+        1.0 - alpha, ply + 1)
+      if value > best_value:
+        best_value = value
+        best_move = move
+      if value > alpha:
+        alpha = value
+      if alpha >= beta:
+        self._record_cutoff(move, depth, ply)
+        break
+
+    if best_value <= original_alpha:
+      bound = _UPPER
+    elif best_value >= beta:
+      bound = _LOWER
+    else:
+      bound = _EXACT
+    self._table.store(board, _Entry(best_value, bound, best_move), depth)
+    return (best_value, best_move)
+
+  def _chance(self, board, depth, alpha, beta, ply):
+    """Returns the expected value of the start of a turn, with Star1 pruning.
+
+    The result is exact if it is within (alpha, beta); otherwise it is only
+    a bound on the same side of the window as the true value.
+    """
+    self._check_deadline()
+    results = self._start_of_turn(board)
+
+    total = 0.0
+    remaining = 1.0
+    for outcome in results:
+      p = outcome.probability
+      remaining -= p
+      # The window this child must fall in for the average to stay inside
+      # (alpha, beta), if every later child were as good or bad as possible.
+      child_alpha = (alpha - total - remaining) / p
+      child_beta = (beta - total) / p
+      (value, _) = self._decision(
+        outcome.board, depth, max(0.0, child_alpha), min(1.0, child_beta), ply)
+      total += p * value
+      if value <= child_alpha:
+        return total + remaining
+      if value >= child_beta:
+        return total
+    return total
+
+  def _start_of_turn(self, board):
+    results = self._chance_cache.get(board)
+    if results is None:
+      if len(self._chance_cache) >= 4096:
+        self._chance_cache.clear()
+      results = chance.start_of_turn_distribution(
+        board, top_k=self._chance_outcomes)
+      self._chance_cache[board] = results
+    return results
+
+  def _ordered_moves(self, board, best_hint, ply):
+    moves = self._outcomes.board_outcomes(board)
+    killers = self._killers.get(ply, ())
+
+    def priority(move):
+      if best_hint is not None and move.actions == best_hint.actions:
+        return (2, 0)
+      if move.actions in killers:
+        return (1, 0)
+      return (0, sum(self._history.get(a, 0) for a in move.actions))
+
+    return sorted(moves, key=priority, reverse=True)
+
+  def _record_cutoff(self, move, depth, ply):
+    for action in move.actions:
+      self._history[action] = self._history.get(action, 0) + depth * depth
+    killers = self._killers.get(ply, ())
+    if move.actions not in killers:
+      self._killers[ply] = (move.actions,) + killers[:1]
@@ -0,0 +1,63 @@
+import random
+import unittest
+from .board import Point
+from . import board_initializer, chance, events, expectimax, mcts, options, outcomes
+
+def start_board():
+  sim_options = options.SimulatorOptions(
+    events.NULL_LOGGER, options.ActualRng(random.Random(1)))
+  board = board_initializer.initialize_board().resolve_start_of_turn(
+    sim_options)
+  return board.update_tableau(
+    board.acting_player,
+    board.tableau(board.acting_player).add_points({Point.RESOURCES: 4}))
+
+def brute_force(board, depth, chance_outcomes):
+  """Plain expectimax, with no pruning or caching."""
+  if depth == 0:
+    return mcts.points_evaluator(board, board.acting_player)
+  best = 0.0
+  for move in outcomes.action_phase_outcomes(board.tableau(board.acting_player)):
+    after = board.update_tableau(
+      board.acting_player, move.tableau).resolve_end_of_turn_sequence()
+    expected = sum(
+      o.probability * brute_force(o.board, depth - 1, chance_outcomes)
+      for o in chance.start_of_turn_distribution(after, top_k=chance_outcomes))
+    best = max(best, 1.0 - expected)
+  return best
+
+class ExpectimaxTest(unittest.TestCase):
+
+  def test_matches_brute_force(self):
+    board = start_board()
+    for depth in (1, 2):
+      searcher = expectimax.ExpectimaxSearcher(
+        seconds=None, max_depth=depth, chance_outcomes=2)
+      result = searcher.search(board)
+      self.assertEqual(result.depth, depth)
+      self.assertAlmostEqual(result.value, brute_force(board, depth, 2))
+
+  def test_actions_are_legal(self):
+    board = start_board()
+    result = expectimax.ExpectimaxSearcher(
+      seconds=None, max_depth=2, chance_outcomes=2).search(board)
+    for action in result.actions:
+      self.assertTrue(board.tableau(board.acting_player).is_action_legal(action))
+      board = board._play_action(action)
+
+  def test_deadline(self):
+    result = expectimax.ExpectimaxSearcher(
+      seconds=0.05, max_depth=50).search(start_board())
+    self.assertLess(result.elapsed, 1.0)
+    self.assertLess(result.depth, 50)
+
+  def test_reuses_table(self):
+    searcher = expectimax.ExpectimaxSearcher(
+      seconds=None, max_depth=2, chance_outcomes=2)
+    board = start_board()
+    first = searcher.search(board)
+    hits = searcher.table.stats.hits
+    second = searcher.search(board)
+    self.assertGreater(searcher.table.stats.hits, hits)
+    self.assertLess(second.nodes, first.nodes)
+    self.assertAlmostEqual(first.value, second.value)
@@ -0,0 +1,211 @@
+"""Numeric features of Boards, for value functions and training.
+
+A Featurizer turns a list of Boards into one NumPy matrix with a row per
+board and a fixed set of columns, described by a FeatureSchema. Seats are
+numbered from the acting player, so seat 0 is always the player to move and
+the same column means the same thing on every board.
+
+Tableaux and card rows are immutable and shared between many boards, so
+their features are computed once, cached, and copied into place a whole
+block at a time. The output matrix is preallocated and reused between calls.
+"""
+
+import numpy as np
+from . import buildings, content
+from .board import Age, EMPTY_CARD_SLOT, Point
+
+BUILDINGS = buildings.BUILDINGS
+"""The buildings, in column order."""
+
+BUILDING_CARDS = content.BUILDING_CARDS
+"""The cards, in column order."""
+
+POINTS = tuple(Point)
+"""The points, in column order."""
+
+_AGES = tuple(Age)
+
+
+def _tableau_columns():
+  return (['civil_actions', 'max_civil_actions'] +
+          ['points.' + p.name for p in POINTS] +
+          ['revenue.' + p.name for p in POINTS] +
+          ['building.' + b.name for b in BUILDINGS] +
+          ['technology.' + t.name for t in BUILDING_CARDS])
+
+def _card_row_columns():
+  return (['age', 'card_row.empty'] +
+          ['card_row.' + t.name for t in BUILDING_CARDS])
+
+_TABLEAU_SIZE = len(_tableau_columns())
+_CARD_ROW_SIZE = len(_card_row_columns())
+
+
+class FeatureSchema:
+  """Names the columns of a feature matrix for a number of players.
+
+  Columns are, in order:
+
+    round
+    age                      the age of the deck cards are drawn from next,
+                             as an index into Age, or len(Age) once empty
+    card_row.empty           how many card row slots are empty
+    card_row.<card>          how many of each card are in the card row
+    seat<s>.<feature>        for each seat, counting from the acting player:
+      civil_actions, max_civil_actions
+      points.<point>, revenue.<point>
+      building.<building>    how many of each building the seat has
+      technology.<card>      1 if the seat knows the technology
+
+  Buildings and cards are in registry ID order, so the schema only changes
+  when content is added.
+  """
+
+  def __init__(self, player_count):
+    self._player_count = player_count
+    columns = ['round'] + _card_row_columns()
+    self._card_row_offset = 1
+    self._seat_offset = len(columns)
+    for seat in range(player_count):
+      columns.extend('seat{}.{}'.format(seat, c) for c in _tableau_columns())
+    self._columns = tuple(columns)
+    self._index = {c: i for (i, c) in enumerate(columns)}
+
+  @property
+  def player_count(self):
+    return self._player_count
+
+  @property
+  def columns(self):
+    """A tuple of the column names."""
+    return self._columns
+
+  @property
+  def size(self):
+    """The number of columns."""
+    return len(self._columns)
+
+  def index(self, column):
+    """Returns the position of a column."""
+    return self._index[column]
+
+  def seat_slice(self, seat):
+    """Returns the slice of columns holding one seat's features."""
+    start = self._seat_offset + seat * _TABLEAU_SIZE
+    return slice(start, start + _TABLEAU_SIZE)
+
+  def card_row_slice(self):
+    """Returns the slice of columns holding the age and card row."""
+    return slice(self._card_row_offset, self._card_row_offset + _CARD_ROW_SIZE)
+
+
+def tableau_features(tableau):
+  """Returns an int16 vector of one tableau's features, in schema order."""
+  vector = np.zeros(_TABLEAU_SIZE, dtype=np.int16)
+  vector[0] = tableau.civil_actions
+  vector[1] = tableau.max_civil_actions
+  for (i, p) in enumerate(POINTS):
+    vector[2 + i] = tableau.points(p)
+    vector[2 + len(POINTS) + i] = tableau.revenue(p)
+  offset = 2 + 2 * len(POINTS)
+  for (b, c) in tableau.buildings.items():
+    vector[offset + b.id] = c
+  offset += len(BUILDINGS)
+  for t in tableau.building_technologies:
+    vector[offset + t.id] = 1
+  return vector
+
+def card_row_features(card_row):
+  """Returns an int16 vector of the age and card row, in schema order."""
+  vector = np.zeros(_CARD_ROW_SIZE, dtype=np.int16)
+  decks = card_row.civil_decks
+  vector[0] = next(
+    (i for (i, age) in enumerate(_AGES) if decks.deck(age)), len(_AGES))
+  for card in card_row.cards:
+    if card == EMPTY_CARD_SLOT:
+      vector[1] += 1
+    else:
+      vector[2 + card.id] += 1
+  return vector
+
+
+class Featurizer:
+  """Builds feature matrices for batches of Boards.
+
+  The matrix returned by featurize() is a view of a buffer which the next
+  call overwrites; copy it to keep it.
+  """
+
+  def __init__(self, player_count=2, dtype=np.float32, cache_capacity=65536):
+    """Creates a featurizer.
+
+    Args:
+      player_count: The number of players on every board.
+      dtype: The type of the output matrix, such as np.float32 or np.int16.
+      cache_capacity: How many tableaux and card rows to remember features
+        for. The caches are cleared when they grow past this.
+    """
+    self._schema = FeatureSchema(player_count)
+    self._dtype = dtype
+    self._cache_capacity = cache_capacity
+    self._buffer = np.zeros((0, self._schema.size), dtype=dtype)
+    self._tableau_cache = {}
+    self._card_row_cache = {}
+
+  @property
+  def schema(self):
+    return self._schema
+
+  def featurize(self, boards):
+    """Returns a matrix with one row of features per board.
+
+    Args:
+      boards: A sequence of Boards with the featurizer's player count.
+    """
+    n = len(boards)
+    if n > len(self._buffer):
+      self._buffer = np.empty(
+        (max(n, 2 * len(self._buffer)), self._schema.size), dtype=self._dtype)
+    out = self._buffer[:n]
+    if n == 0:
+      return out
+
+    player_count = self._schema.player_count
+    seats = [[] for _ in range(player_count)]
+    card_rows = []
+    rounds = []
+    for b in boards:
+      turn_order = b.turn_order
+      if len(turn_order) != player_count:
+        raise ValueError('Expected {} players, not {}'.format(
+          player_count, len(turn_order)))
+      acting = turn_order.index(b.acting_player)
+      for seat in range(player_count):
+        seats[seat].append(self._tableau_features(
+          b.tableau(turn_order[(acting + seat) % player_count])))
+      card_rows.append(self._card_row_features(b.card_row))
+      rounds.append(b.round)
+
+    out[:, 0] = rounds
+    out[:, self._schema.card_row_slice()] = np.stack(card_rows)
+    for seat in range(player_count):
+      out[:, self._schema.seat_slice(seat)] = np.stack(seats[seat])
+    return out
+
+  def _tableau_features(self, tableau):
+    vector = self._tableau_cache.get(tableau)
+    if vector is None:
+      if len(self._tableau_cache) >= self._cache_capacity:
+        self._tableau_cache.clear()
+      vector = tableau_features(tableau)
+      self._tableau_cache[tableau] = vector
+    return vector
+
+  def _card_row_features(self, card_row):
+    vector = self._card_row_cache.get(card_row)
+    if vector is None:
+      if len(self._card_row_cache) >= self._cache_capacity:
+        self._card_row_cache.clear()
+      vector = card_row_features(card_row)
+      self._card_row_cache[card_row] = vector
+    return vector
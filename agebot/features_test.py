@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from .board import Age, Player, Point
+from . import board_initializer, features, records
+
+def game_boards():
+  game = records.record_game(7, max_rounds=6)
+  return [game.initial_board] + list(
+    records.replay(game.initial_board, game.seed, game.turns))
+
+class FeaturizerTest(unittest.TestCase):
+
+  def test_schema(self):
+    schema = features.FeatureSchema(2)
+    self.assertEqual(len(schema.columns), len(set(schema.columns)))
+    self.assertEqual(schema.columns[0], 'round')
+    self.assertEqual(
+      schema.columns[schema.seat_slice(1)][0], 'seat1.civil_actions')
+    self.assertEqual(schema.seat_slice(1).stop, schema.size)
+
+  def test_initial_board(self):
+    featurizer = features.Featurizer()
+    schema = featurizer.schema
+    row = featurizer.featurize([board_initializer.initialize_board()])[0]
+
+    self.assertEqual(row[schema.index('round')], 1)
+    self.assertEqual(row[schema.index('age')], list(Age).index(Age.ONE))
+    self.assertEqual(row[schema.index('card_row.empty')], 13)
+    self.assertEqual(row[schema.index('seat0.building.Agriculture')], 2)
+    self.assertEqual(row[schema.index('seat1.revenue.FOOD')], 2)
+    self.assertEqual(row[schema.index('seat0.technology.Religion')], 1)
+    self.assertEqual(row[schema.index('seat0.technology.Irrigation')], 0)
+
+  def test_seats_start_at_acting_player(self):
+    start = board_initializer.initialize_board()
+    board = start.update_tableau(
+      Player.TWO, start.tableau(Player.TWO).add_points({Point.CULTURE: 5}))
+    second_turn = board.resolve_end_of_turn_sequence()
+    self.assertEqual(second_turn.acting_player, Player.TWO)
+
+    schema = features.FeatureSchema(2)
+    matrix = features.Featurizer().featurize([board, second_turn])
+    self.assertEqual(matrix[0, schema.index('seat1.points.CULTURE')], 5)
+    self.assertEqual(matrix[1, schema.index('seat0.points.CULTURE')], 5)
+
+  def test_matches_uncached_features(self):
+    boards = game_boards()
+    matrix = features.Featurizer(dtype=np.int16).featurize(boards)
+    schema = features.FeatureSchema(2)
+    for (row, b) in zip(matrix, boards):
+      acting = b.turn_order.index(b.acting_player)
+      other = b.turn_order[1 - acting]
+      np.testing.assert_array_equal(
+        row[schema.seat_slice(1)], features.tableau_features(b.tableau(other)))
+      np.testing.assert_array_equal(
+        row[schema.card_row_slice()], features.card_row_features(b.card_row))
+
+  def test_buffer_is_reused(self):
+    featurizer = features.Featurizer()
+    boards = game_boards()
+    first = featurizer.featurize(boards)
+    second = featurizer.featurize(boards[:3])
+    self.assertIs(first.base, second.base)
+    self.assertEqual(second.shape, (3, featurizer.schema.size))
+    self.assertEqual(first.dtype, np.float32)
+
+  def test_wrong_player_count(self):
+    with self.assertRaises(ValueError):
+      features.Featurizer(player_count=3).featurize(
+        [board_initializer.initialize_board()])
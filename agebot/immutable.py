@@ -10,7 +10,7 @@ class frozenbag(abc.Mapping):
     if (isinstance(mapping, frozenbag)):
       self._dict = mapping._dict
     else:
-      self._dict = frozendict({k: c for (k, c) in mapping.items
+      self._dict = frozendict({k: c for (k, c) in mapping.items()
                               if c > 0})
 
 
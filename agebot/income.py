@@ -0,0 +1,78 @@
+"""Building income as a matrix, for scoring many tableaux at once.
+
+INCOME_MATRIX has one row per building in buildings.BUILDINGS and one column
+per Point, so a tableau's revenue is its building-count vector times the
+matrix. Stacking the count vectors of many tableaux turns the income of a
+whole batch of games into a single matrix product.
+"""
+
+import numpy as np
+from . import buildings
+from .board import Point
+
+BUILDINGS = buildings.BUILDINGS
+"""The buildings, in row order. Each building's row is its ID."""
+
+POINTS = tuple(Point)
+"""The points, in column order."""
+
+INCOME_MATRIX = np.array(
+  [[b.getIncome(p) for p in POINTS] for b in BUILDINGS], dtype=np.int32)
+INCOME_MATRIX.setflags(write=False)
+
+
+def building_counts(tableau, out=None):
+  """Returns a vector of how many of each building a tableau has.
+
+  Args:
+    tableau: A Tableau.
+    out: If given, an int32 vector of len(BUILDINGS) to fill in instead of
+      allocating a new one.
+  """
+  if out is None:
+    out = np.zeros(len(BUILDINGS), dtype=np.int32)
+  else:
+    out[:] = 0
+  for (b, c) in tableau.buildings.items():
+    out[b.id] = c
+  return out
+
+def revenue_vector(tableau):
+  """Returns a tableau's revenue for each Point, in POINTS order."""
+  return building_counts(tableau) @ INCOME_MATRIX
+
+def count_matrix(tableaux):
+  """Stacks the building counts of many tableaux into one matrix.
+
+  Returns:
+    An int32 array with one row per tableau and one column per building.
+  """
+  counts = np.zeros((len(tableaux), len(BUILDINGS)), dtype=np.int32)
+  for (row, tableau) in enumerate(tableaux):
+    for (b, c) in tableau.buildings.items():
+      counts[row, b.id] = c
+  return counts
+
+def batch_revenue(counts):
+  """Returns the revenue of every row of a count matrix.
+
+  Args:
+    counts: A matrix as returned by count_matrix().
+  Returns:
+    An int32 array with one row per tableau and one column per Point.
+  """
+  return counts @ INCOME_MATRIX
+
+def end_of_turn_income(boards):
+  """Returns what each board's acting player will gain at the end of the turn.
+
+  This covers science and culture, food and resources, which all come from
+  building revenue.
+
+  Args:
+    boards: A sequence of Boards.
+  Returns:
+    An int32 array with one row per board and one column per Point.
+  """
+  return batch_revenue(
+    count_matrix([b.tableau(b.acting_player) for b in boards]))
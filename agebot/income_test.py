@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from .board import Player, Point, Tableau
+from . import board, board_initializer, buildings, income
+
+class IncomeTest(unittest.TestCase):
+
+  def test_matrix_matches_buildings(self):
+    for (row, b) in enumerate(income.BUILDINGS):
+      for (column, p) in enumerate(income.POINTS):
+        self.assertEqual(income.INCOME_MATRIX[row, column], b.getIncome(p))
+
+  def test_revenue_vector_matches_tableau(self):
+    tableau = Tableau(
+      board.DESPOTISM,
+      {buildings.AGRICULTURE: 2, buildings.PRINTING_PRESS: 1, buildings.IRON: 3},
+      [])
+    self.assertEqual(
+      list(income.revenue_vector(tableau)),
+      [tableau.revenue(p) for p in income.POINTS])
+
+  def test_building_counts_reuses_buffer(self):
+    out = np.full(len(income.BUILDINGS), 7, dtype=np.int32)
+    tableau = board_initializer.initialize_tableau()
+    self.assertIs(income.building_counts(tableau, out), out)
+    self.assertEqual(out.sum(), 5)
+
+  def test_end_of_turn_income(self):
+    start = board_initializer.initialize_board()
+    second_turn = start.resolve_end_of_turn_sequence()
+    result = income.end_of_turn_income([start, second_turn])
+
+    self.assertEqual(result.shape, (2, len(Point)))
+    for (row, b) in enumerate([start, second_turn]):
+      before = b.tableau(b.acting_player)
+      after = b.resolve_end_of_turn_sequence().tableau(b.acting_player)
+      for (column, p) in enumerate(income.POINTS):
+        self.assertEqual(result[row, column], after.points(p) - before.points(p))
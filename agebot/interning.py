@@ -0,0 +1,92 @@
+"""Hash-consing for game states.
+
+Search builds the same Tableau, CardRow and Board again and again along
+different paths. An InternPool maps each structurally distinct state to one
+canonical instance, so duplicates can be dropped as soon as they are built
+and equal interned states compare equal by identity.
+
+The pool only holds weak references: once nothing else refers to a canonical
+instance it is garbage collected and its entry disappears.
+"""
+
+import weakref
+from collections import namedtuple
+from .board import Board
+
+
+class PoolStats(namedtuple('PoolStats', ['hits', 'misses', 'size'])):
+  """Counters for an InternPool.
+
+  Fields:
+    hits: Calls which returned an existing instance.
+    misses: Calls which made their argument the canonical instance.
+    size: How many canonical instances are alive.
+  """
+
+
+class InternPool:
+  """Maps equal Tableau, CardRow and Board objects to one shared instance.
+
+  Objects are looked up by their Zobrist hash and then checked for equality.
+  If two unequal objects ever share a hash, the second simply isn't interned.
+  """
+
+  def __init__(self):
+    self._pool = weakref.WeakValueDictionary()
+    self._hits = 0
+    self._misses = 0
+
+  @property
+  def stats(self):
+    return PoolStats(self._hits, self._misses, len(self._pool))
+
+  def __len__(self):
+    return len(self._pool)
+
+  def intern(self, obj):
+    """Returns the canonical instance equal to obj.
+
+    If there isn't one yet, obj becomes the canonical instance. This does not
+    intern the objects obj refers to; use intern_board() for that.
+
+    Args:
+      obj: A Tableau, CardRow or Board.
+    """
+    key = (type(obj), obj.zobrist_hash)
+    existing = self._pool.get(key)
+    if existing is not None:
+      if existing is obj or existing == obj:
+        self._hits += 1
+        return existing
+      return obj
+    self._misses += 1
+    self._pool[key] = obj
+    return obj
+
+  def intern_board(self, board):
+    """Returns the canonical instance of a board, sharing interned parts.
+
+    The board's card row and tableaux are interned first, so boards which
+    differ only in some places still share everything else.
+    """
+    key = (Board, board.zobrist_hash)
+    existing = self._pool.get(key)
+    if existing is not None and (existing is board or existing == board):
+      self._hits += 1
+      return existing
+
+    card_row = self.intern(board.card_row)
+    tableaux = {p: self.intern(t) for (p, t) in board.tableaux.items()}
+    if (card_row is not board.card_row or
+        any(t is not board.tableau(p) for (p, t) in tableaux.items())):
+      board = Board(
+        board.round,
+        board.turn_order,
+        board.acting_player,
+        card_row,
+        tableaux,
+        _zobrist=board.zobrist_hash)
+    return self.intern(board)
+
+  def clear(self):
+    self._pool.clear()
@@ -0,0 +1,57 @@
+import gc
+import random
+import unittest
+from .board import Player, Point
+from . import board, board_initializer, buildings, events, interning, mcts, options
+
+class InternPoolTest(unittest.TestCase):
+
+  def test_equal_tableaux_share_an_instance(self):
+    pool = interning.InternPool()
+    first = pool.intern(board_initializer.initialize_tableau())
+    second = pool.intern(board_initializer.initialize_tableau())
+    self.assertIs(first, second)
+    self.assertEqual(pool.stats.hits, 1)
+    self.assertEqual(pool.stats.misses, 1)
+
+  def test_unequal_objects_stay_distinct(self):
+    pool = interning.InternPool()
+    tableau = board_initializer.initialize_tableau()
+    richer = tableau.add_points({Point.FOOD: 1})
+    self.assertIs(pool.intern(tableau), tableau)
+    self.assertIs(pool.intern(richer), richer)
+    self.assertEqual(len(pool), 2)
+
+  def test_intern_board_shares_parts(self):
+    pool = interning.InternPool()
+    start = board_initializer.initialize_board()
+    start = start.update_tableau(
+      Player.ONE, start.tableau(Player.ONE).add_points({Point.RESOURCES: 4}))
+
+    build_farm = board.BuildAction(buildings.AGRICULTURE)
+    build_mine = board.BuildAction(buildings.BRONZE)
+    board1 = pool.intern_board(
+      start._play_action(build_farm)._play_action(build_mine))
+    board2 = pool.intern_board(
+      start._play_action(build_mine)._play_action(build_farm))
+    self.assertIs(board1, board2)
+
+    # The untouched tableau is shared with other boards too.
+    self.assertIs(pool.intern_board(start).tableau(Player.TWO),
+                  board1.tableau(Player.TWO))
+
+  def test_entries_are_weak(self):
+    pool = interning.InternPool()
+    pool.intern(board_initializer.initialize_tableau())
+    gc.collect()
+    self.assertEqual(len(pool), 0)
+
+  def test_mcts_with_interning(self):
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(1)))
+    start = board_initializer.initialize_board().resolve_start_of_turn(sim_options)
+    pool = interning.InternPool()
+    searcher = mcts.MctsSearcher(
+      sim_options, iterations=100, seed=1, intern_pool=pool)
+    searcher.search(start)
+    self.assertGreater(pool.stats.hits, 0)
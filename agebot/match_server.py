@@ -0,0 +1,402 @@
+"""Runs many bot-versus-bot matches concurrently on one asyncio event loop.
+
+Each match is a coroutine which alternates between resolving the start of a
+turn and awaiting the acting bot's decision. Bots are async: an AsyncBot has
+a coroutine decide(board, options) returning the actions to play. Bots that
+think in Python should not block the loop, so ExecutorBot runs an ordinary
+bot's choose_actions() in an executor; remote bots can await the network.
+
+Every decision is limited to move_timeout seconds. A bot which runs out of
+time ends its turn without acting, and any illegal actions it returns are
+skipped. A bot which raises ends its match, and the error is recorded in
+that match's result. The server counts how long decisions take and how many
+matches are running or waiting for a slot.
+
+ExecutorBots are run on a thread pool owned by the server, with a thread for
+every match that can run at once. Their clock starts when a thread picks the
+decision up, not when it is queued. A thread can't be interrupted, so a
+decision which runs out of time keeps its thread until it returns. The
+match's next decision waits up to move_timeout for it first, so each match
+holds at most one thread; if it is still busy then, the bot forfeits that
+turn as a timeout too. At the end of a match, a thread still busy after
+another move_timeout is abandoned, so a hung bot can't hold up the server.
+
+An ExecutorBot can also be given its own executor, such as a process pool.
+Other processes can't report when they start a job, so with any executor
+but a thread pool the clock starts when the decision is submitted.
+
+Matches draw their randomness from self_play.turn_options(), so a match with
+a given seed and bots that decide the same way plays out the same as it
+would in self_play.
+"""
+
+import asyncio
+import concurrent.futures
+import time
+from collections import namedtuple
+from . import board_initializer, self_play
+from .board import Point
+
+
+class MatchResult(namedtuple('MatchResult', [
+    'match_id', 'seed', 'points', 'rounds', 'turns', 'timeouts',
+    'illegal_actions', 'mean_latency', 'max_latency', 'error'])):
+  """The outcome of one match.
+
+  Fields:
+    match_id: The ID the match was started with.
+    seed: The match's seed.
+    points: A tuple with one entry per player in turn order, each a tuple of
+      that player's final points in Point order.
+    rounds: How many rounds were played.
+    turns: How many turns were played.
+    timeouts: How many decisions ran out of time.
+    illegal_actions: How many returned actions were skipped as illegal.
+    mean_latency: The mean seconds a decision took.
+    max_latency: The longest a decision took, in seconds.
+    error: If a bot raised an exception, which ended the match early, that
+      exception. Otherwise None.
+  """
+
+
+class ServerStats(namedtuple('ServerStats', [
+    'started', 'finished', 'running', 'waiting', 'max_running', 'max_waiting',
+    'decisions', 'timeouts', 'latency_p50', 'latency_p99'])):
+  """Counters for a MatchServer.
+
+  Fields:
+    started: Matches which have started playing.
+    finished: Matches which have finished.
+    running: Matches playing right now.
+    waiting: Matches queued for a free slot right now.
+    max_running: The most matches that have played at once.
+    max_waiting: The longest the queue for slots has been.
+    decisions: How many bot decisions have been awaited.
+    timeouts: How many of them ran out of time.
+    latency_p50: The median decision latency, in seconds.
+    latency_p99: The 99th percentile decision latency, in seconds.
+  """
+
+
+class AsyncBot:
+  """The interface for bots the server can drive."""
+
+  async def decide(self, board, options):
+    """Returns the list of actions to play this turn.
+
+    Args:
+      board: A Board in this bot's action phase.
+      options: The SimulatorOptions for the turn.
+    """
+    raise NotImplementedError
+
+
+class ExecutorBot(AsyncBot):
+  """Runs a synchronous bot in an executor, off the event loop.
+
+  With a thread pool the bot keeps its state between calls. With a process
+  pool the bot and board are pickled for every call, so the bot should not
+  rely on state kept between calls.
+  """
+
+  def __init__(self, bot, executor=None):
+    """Wraps a bot.
+
+    Args:
+      bot: An object with a choose_actions(board, options) method.
+      executor: A concurrent.futures.Executor. None for the MatchServer's
+        own thread pool, or the loop's default one outside a server.
+    """
+    self._bot = bot
+    self._executor = executor
+
+  async def decide(self, board, options):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+      self._executor, self._bot.choose_actions, board, options)
+
+  def _submit(self, executor, board, options, started):
+    """Starts a decision in an executor.
+
+    Args:
+      executor: The executor to use if this bot wasn't given one.
+      board: The board to decide on.
+      options: The SimulatorOptions for the turn.
+      started: A function called just before the bot starts thinking. In a
+        thread pool it is called from the worker thread; otherwise it is
+        called right away, since the job may run in another process.
+    Returns:
+      A concurrent.futures.Future for the actions.
+    """
+    executor = self._executor or executor
+    if not isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+      # Only picklable callables can be sent to a process pool.
+      started()
+      return executor.submit(self._bot.choose_actions, board, options)
+
+    def run():
+      started()
+      return self._bot.choose_actions(board, options)
+    return executor.submit(run)
+
+
+class StubBot(AsyncBot):
+  """An in-process bot for tests: waits, then builds the first legal action."""
+
+  def __init__(self, delay=0.0, build=True):
+    """Creates a bot.
+
+    Args:
+      delay: How many seconds each decision takes.
+      build: Whether to play the first legal action. If False, the bot
+        always ends its turn without acting.
+    """
+    self._delay = delay
+    self._build = build
+
+  async def decide(self, board, options):
+    await asyncio.sleep(self._delay)
+    if not self._build:
+      return []
+    return list(board.legal_actions())[:1]
+
+
+class MatchServer:
+  """Plays matches concurrently, with a limit on how many run at once.
+
+  Call close() when done, to shut down the server's thread pool.
+  """
+
+  def __init__(self, max_running=1000, move_timeout=1.0,
+               max_rounds=self_play.DEFAULT_MAX_ROUNDS):
+    """Creates a server.
+
+    Args:
+      max_running: The most matches to play at once. Others wait for a
+        slot.
+      move_timeout: How many seconds a bot has for each decision.
+      max_rounds: How many rounds each match lasts.
+    """
+    self._max_running = max_running
+    self._move_timeout = move_timeout
+    self._max_rounds = max_rounds
+    self._slots = None
+    self._executor = None
+    self._started = 0
+    self._finished = 0
+    self._running = 0
+    self._waiting = 0
+    self._max_running_seen = 0
+    self._max_waiting_seen = 0
+    self._timeouts = 0
+    self._latencies = []
+
+  @property
+  def stats(self):
+    latencies = sorted(self._latencies)
+    return ServerStats(
+      self._started,
+      self._finished,
+      self._running,
+      self._waiting,
+      self._max_running_seen,
+      self._max_waiting_seen,
+      len(latencies),
+      self._timeouts,
+      _percentile(latencies, 0.5),
+      _percentile(latencies, 0.99))
+
+  async def play_match(self, match_id, seed, bots):
+    """Plays one match once a slot is free.
+
+    Args:
+      match_id: Any ID for the match, passed through to the result.
+      seed: The match's seed.
+      bots: A mapping from each Player to their AsyncBot.
+    Returns:
+      A MatchResult.
+    """
+    if self._slots is None:
+      self._slots = asyncio.Semaphore(self._max_running)
+    self._waiting += 1
+    self._max_waiting_seen = max(self._max_waiting_seen, self._waiting)
+    try:
+      await self._slots.acquire()
+    finally:
+      self._waiting -= 1
+
+    self._started += 1
+    self._running += 1
+    self._max_running_seen = max(self._max_running_seen, self._running)
+    try:
+      return await self._play(match_id, seed, bots)
+    finally:
+      self._running -= 1
+      self._finished += 1
+      self._slots.release()
+
+  async def run(self, matches):
+    """Plays matches concurrently.
+
+    A bot raising only ends its own match. If playing a match fails for any
+    other reason, the other matches are cancelled and the error is raised.
+
+    Args:
+      matches: An iterable of (match_id, seed, bots) triples, as taken by
+        play_match().
+    Returns:
+      A list of MatchResults, in the same order.
+    """
+    tasks = [asyncio.ensure_future(self.play_match(match_id, seed, bots))
+             for (match_id, seed, bots) in matches]
+    try:
+      return await asyncio.gather(*tasks)
+    except BaseException:
+      for task in tasks:
+        task.cancel()
+      await asyncio.gather(*tasks, return_exceptions=True)
+      raise
+
+  def close(self):
+    """Shuts down the thread pool without waiting for unfinished decisions."""
+    if self._executor is not None:
+      self._executor.shutdown(wait=False, cancel_futures=True)
+      self._executor = None
+
+  async def _play(self, match_id, seed, bots):
+    game_board = board_initializer.initialize_board()
+    turn = 0
+    timeouts = 0
+    illegal = 0
+    latencies = []
+    error = None
+    pending = [None]
+    while game_board.round <= self._max_rounds:
+      sim_options = self_play.turn_options(seed, turn)
+      game_board = game_board.resolve_start_of_turn(sim_options)
+
+      try:
+        (actions, latency) = await self._decide(
+          bots[game_board.acting_player], game_board, sim_options, pending)
+      except asyncio.TimeoutError:
+        actions = []
+        latency = self._move_timeout
+        timeouts += 1
+      except Exception as e:
+        error = e
+        break
+      latencies.append(latency)
+      self._latencies.append(latency)
+
+      (legal, skipped) = _playable_actions(game_board, actions)
+      illegal += skipped
+      game_board = game_board.play_action_phase(legal, sim_options)
+      turn += 1
+
+    # Keep the match's slot until its thread is free again, unless the bot
+    # seems to be stuck.
+    await _wait_for_pending(pending, self._move_timeout)
+    self._timeouts += timeouts
+    return MatchResult(
+      match_id,
+      seed,
+      tuple(tuple(game_board.tableau(p).points(point) for point in Point)
+            for p in game_board.turn_order),
+      game_board.round - 1,
+      turn,
+      timeouts,
+      illegal,
+      sum(latencies) / len(latencies) if latencies else 0.0,
+      max(latencies, default=0.0),
+      error)
+
+  async def _decide(self, bot, board, options, pending):
+    """Awaits one decision, timing it from when the bot starts thinking.
+
+    Args:
+      bot: The AsyncBot to move.
+      board: The board to decide on.
+      options: The SimulatorOptions for the turn.
+      pending: A one-element list holding the future of this match's
+        executor job which ran out of time and may still be running, or
+        None.
+    Returns:
+      (actions, latency in seconds).
+    Throws:
+      asyncio.TimeoutError if the bot runs out of time, or if its last
+        decision is still running after another move_timeout.
+    """
+    if not isinstance(bot, ExecutorBot):
+      start = time.perf_counter()
+      actions = await asyncio.wait_for(
+        bot.decide(board, options), self._move_timeout)
+      return (actions, time.perf_counter() - start)
+
+    # Don't take a second thread while the last decision still holds one.
+    if not await _wait_for_pending(pending, self._move_timeout):
+      raise asyncio.TimeoutError()
+
+    if self._executor is None:
+      self._executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=self._max_running)
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+
+    def mark_started():
+      now = time.perf_counter()
+      loop.call_soon_threadsafe(
+        lambda: started.done() or started.set_result(now))
+
+    result = asyncio.wrap_future(
+      bot._submit(self._executor, board, options, mark_started))
+    await asyncio.wait([started, result], return_when=asyncio.FIRST_COMPLETED)
+    if not started.done():
+      # The job failed or was cancelled before it ever ran.
+      return (await result, 0.0)
+    start = started.result()
+    remaining = start + self._move_timeout - time.perf_counter()
+    try:
+      actions = await asyncio.wait_for(
+        asyncio.shield(result), max(0.0, remaining))
+    except asyncio.TimeoutError:
+      pending[0] = result
+      raise
+    return (actions, time.perf_counter() - start)
+
+
+async def _wait_for_pending(pending, timeout):
+  """Waits for a timed-out executor job to return, ignoring its result.
+
+  Args:
+    pending: A one-element list holding the job's future, or None. It is
+      cleared once the job is done.
+    timeout: The most seconds to wait.
+  Returns:
+    False if the job is still running, otherwise True.
+  """
+  if pending[0] is None:
+    return True
+  (done, _) = await asyncio.wait([pending[0]], timeout=timeout)
+  if not done:
+    return False
+  if not pending[0].cancelled():
+    pending[0].exception()
+  pending[0] = None
+  return True
+
+
+def _playable_actions(board, actions):
+  """Returns the actions that can be played in order, and how many couldn't."""
+  tableau = board.tableau(board.acting_player)
+  legal = []
+  for action in actions:
+    if tableau.is_action_legal(action):
+      tableau = tableau.play_action(action)
+      legal.append(action)
+  return (legal, len(actions) - len(legal))
+
+def _percentile(sorted_values, fraction):
+  if not sorted_values:
+    return 0.0
+  index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+  return sorted_values[index]
@@ -0,0 +1,143 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import unittest
+from .board import Player
+from . import bots, match_server, self_play, streams
+
+def stub_bots(**kwargs):
+  return {p: match_server.StubBot(**kwargs) for p in Player}
+
+class SleepyBot:
+  """A synchronous bot which sleeps, and counts how many calls overlap."""
+
+  def __init__(self, seconds):
+    self._seconds = seconds
+    self._lock = threading.Lock()
+    self.running = 0
+    self.max_running = 0
+
+  def choose_actions(self, board, options):
+    with self._lock:
+      self.running += 1
+      self.max_running = max(self.max_running, self.running)
+    time.sleep(self._seconds)
+    with self._lock:
+      self.running -= 1
+    return []
+
+class RaisingBot(match_server.AsyncBot):
+
+  async def decide(self, board, options):
+    raise ValueError('broken bot')
+
+class MatchServerTest(unittest.TestCase):
+
+  def test_many_concurrent_matches(self):
+    server = match_server.MatchServer(max_running=20, max_rounds=3)
+    matches = [(i, i, stub_bots(delay=0.001)) for i in range(100)]
+    results = asyncio.run(server.run(matches))
+
+    self.assertEqual([r.match_id for r in results], list(range(100)))
+    self.assertTrue(all(r.rounds == 3 and r.turns == 6 for r in results))
+    stats = server.stats
+    self.assertEqual(stats.finished, 100)
+    self.assertEqual(stats.running, 0)
+    self.assertEqual(stats.max_running, 20)
+    self.assertGreater(stats.max_waiting, 0)
+    self.assertEqual(stats.decisions, 600)
+    self.assertGreaterEqual(stats.latency_p99, stats.latency_p50)
+
+  def test_timeouts(self):
+    server = match_server.MatchServer(move_timeout=0.01, max_rounds=2)
+    result = asyncio.run(server.play_match('slow', 1, stub_bots(delay=1.0)))
+    self.assertEqual(result.timeouts, result.turns)
+    self.assertEqual(server.stats.timeouts, result.turns)
+
+  def test_executor_bot_matches_self_play(self):
+    seed = 12
+    root = streams.CounterRandom(seed)
+    players = {p: match_server.ExecutorBot(
+                 bots.RandomBot(root.split('bot', p.value).getrandbits(64)))
+               for p in Player}
+    server = match_server.MatchServer(max_rounds=5)
+    try:
+      result = asyncio.run(server.play_match(0, seed, players))
+    finally:
+      server.close()
+    self.assertEqual(result.points,
+                     self_play.play_game(seed, max_rounds=5).points)
+
+  def test_illegal_actions_skipped(self):
+    class GreedyBot(match_server.AsyncBot):
+      async def decide(self, board, options):
+        return list(board.legal_actions()) * 5
+
+    server = match_server.MatchServer(max_rounds=2)
+    result = asyncio.run(server.play_match(
+      0, 3, {p: GreedyBot() for p in Player}))
+    self.assertGreater(result.illegal_actions, 0)
+
+  def test_executor_clock_starts_when_a_thread_is_free(self):
+    # More matches than the default thread pool has threads.
+    bot = SleepyBot(0.05)
+    server = match_server.MatchServer(
+      max_running=64, move_timeout=0.5, max_rounds=1)
+    try:
+      matches = [(i, i, {p: match_server.ExecutorBot(bot) for p in Player})
+                 for i in range(64)]
+      results = asyncio.run(server.run(matches))
+    finally:
+      server.close()
+    self.assertEqual(sum(r.timeouts for r in results), 0)
+    self.assertLess(server.stats.latency_p99, 0.5)
+
+  def test_timed_out_executor_work_holds_one_thread_per_match(self):
+    # Each decision times out, but is done before the next one is due.
+    bot = SleepyBot(0.1)
+    server = match_server.MatchServer(
+      max_running=4, move_timeout=0.08, max_rounds=2)
+    try:
+      matches = [(i, i, {p: match_server.ExecutorBot(bot) for p in Player})
+                 for i in range(8)]
+      results = asyncio.run(server.run(matches))
+    finally:
+      server.close()
+    self.assertTrue(all(r.timeouts == r.turns == 4 for r in results))
+    self.assertLessEqual(bot.max_running, 4)
+    self.assertEqual(bot.running, 0)
+
+  def test_stuck_executor_bot_forfeits_turns(self):
+    bot = SleepyBot(0.5)
+    server = match_server.MatchServer(move_timeout=0.05, max_rounds=2)
+    start = time.perf_counter()
+    try:
+      result = asyncio.run(server.play_match(
+        0, 0, {p: match_server.ExecutorBot(bot) for p in Player}))
+    finally:
+      server.close()
+    self.assertLess(time.perf_counter() - start, 0.45)
+    self.assertEqual(result.timeouts, result.turns)
+    self.assertEqual(result.turns, 4)
+    self.assertEqual(bot.max_running, 1)
+
+  def test_executor_bot_in_process_pool(self):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+      players = {p: match_server.ExecutorBot(bots.RandomBot(p.value), executor)
+                 for p in Player}
+      server = match_server.MatchServer(move_timeout=10.0, max_rounds=3)
+      result = asyncio.run(server.play_match(0, 5, players))
+    self.assertIsNone(result.error)
+    self.assertEqual(result.timeouts, 0)
+    self.assertEqual(result.turns, 6)
+
+  def test_bot_errors_end_only_their_match(self):
+    server = match_server.MatchServer(max_rounds=2)
+    matches = [(0, 0, {p: RaisingBot() for p in Player}),
+               (1, 1, stub_bots())]
+    (broken, fine) = asyncio.run(server.run(matches))
+    self.assertIsInstance(broken.error, ValueError)
+    self.assertEqual(broken.turns, 0)
+    self.assertIsNone(fine.error)
+    self.assertEqual(fine.turns, 4)
@@ -0,0 +1,287 @@
+"""Monte Carlo Tree Search over Boards.
+
+The search tree alternates between two kinds of nodes:
+
+  - Decision nodes hold a Board in some player's action phase. Their moves
+    are the legal actions for the acting player, plus END_TURN.
+  - Chance nodes sit after END_TURN. The end-of-turn sequence is
+    deterministic, but the start of the next turn refills the card row from
+    the civil decks, so each visit samples a new start of turn and follows
+    the decision node for whichever Board comes out.
+
+Values are win-like scores in [0, 1] for a given player, produced by an
+evaluator after a short random rollout. Each node stores the total value from
+the point of view of the player who chose the move leading into it, so UCT
+can treat every level as that player maximizing.
+"""
+
+import math
+import random
+import time
+from collections import namedtuple
+from .board import Point
+
+
+class EndTurnAction:
+  """The pseudo-action of ending the action phase."""
+
+  def __repr__(self):
+    return 'END_TURN'
+
+END_TURN = EndTurnAction()
+"""The singleton EndTurnAction."""
+
+
+class SearchResult(namedtuple('SearchResult', [
+    'actions', 'iterations', 'nodes', 'elapsed', 'root_visits'])):
+  """The outcome of a search.
+
+  Fields:
+    actions: The best sequence of actions for the acting player, not
+      including END_TURN.
+    iterations: How many playouts were run.
+    nodes: How many tree nodes were created during this search.
+    elapsed: Wall-clock seconds spent searching.
+    root_visits: How many visits the root has, including any visits kept
+      from earlier searches.
+  """
+
+  @property
+  def nodes_per_second(self):
+    if self.elapsed == 0:
+      return 0.0
+    return self.nodes / self.elapsed
+
+  @property
+  def iterations_per_second(self):
+    if self.elapsed == 0:
+      return 0.0
+    return self.iterations / self.elapsed
+
+
+def points_evaluator(board, player):
+  """Scores a board for a player, between 0 and 1.
+
+  Culture is what wins the game, so it counts fully; the other points count
+  for a little, since they turn into culture later. The difference from the
+  best opponent is squashed with a logistic curve.
+  """
+  def score(tableau):
+    return (tableau.points(Point.CULTURE) +
+            0.25 * (tableau.points(Point.SCIENCE) +
+                    tableau.points(Point.FOOD) +
+                    tableau.points(Point.RESOURCES)))
+
+  my_score = score(board.tableau(player))
+  best_other = max(score(t) for (p, t) in board.tableaux.items() if p != player)
+  return 1.0 / (1.0 + math.exp(-(my_score - best_other) / 4.0))
+
+
+class _DecisionNode:
+  __slots__ = ('board', 'untried', 'children', 'visits', 'total')
+
+  def __init__(self, board):
+    self.board = board
+    self.untried = None
+    self.children = {}
+    self.visits = 0
+    self.total = 0.0
+
+
+class _ChanceNode:
+  __slots__ = ('board', 'outcomes', 'visits', 'total')
+
+  def __init__(self, board):
+    self.board = board
+    self.outcomes = {}
+    self.visits = 0
+    self.total = 0.0
+
+
+class MctsSearcher:
+  """Chooses actions for the acting player with UCT.
+
+  The searcher keeps its tree between calls to search(). If a later board
+  shows up somewhere in the old tree, that subtree becomes the new root and
+  its statistics are kept.
+  """
+
+  def __init__(self, options, iterations=1000, seconds=None,
+               exploration=math.sqrt(2), rollout_turns=4,
+               rollout_end_probability=0.25, max_chance_outcomes=8,
+               evaluator=points_evaluator, seed=None, intern_pool=None):
+    """Creates a searcher.
+
+    Args:
+      options: SimulatorOptions used to resolve the start of each turn.
+      iterations: Stop after this many playouts. None for no limit.
+      seconds: Stop after this much wall-clock time. None for no limit.
+      exploration: The UCT exploration constant.
+      rollout_turns: How many turns to play randomly past a new leaf before
+        evaluating it.
+      rollout_end_probability: During rollouts, the chance of ending the turn
+        instead of playing another random legal action.
+      max_chance_outcomes: Once a chance node has seen this many distinct
+        starts of turn, later visits revisit one of them instead of sampling
+        another, in proportion to how often each was seen.
+      evaluator: A function (board, player) -> float in [0, 1]. It is
+        called from the searching thread. An
+        evaluation.EvaluationService.as_evaluator() adapter blocks on each
+        leaf, and only batches leaves from several searchers on different
+        threads; for a single searcher, give the service max_wait=0.
+      seed: Seeds the random rollout policy.
+      intern_pool: If set, an InternPool used to share equal boards between
+        tree nodes.
+    """
+    if iterations is None and seconds is None:
+      raise ValueError('At least one of iterations and seconds must be set')
+    self._options = options
+    self._iterations = iterations
+    self._seconds = seconds
+    self._exploration = exploration
+    self._rollout_turns = rollout_turns
+    self._rollout_end_probability = rollout_end_probability
+    self._max_chance_outcomes = max_chance_outcomes
+    self._evaluator = evaluator
+    self._random = random.Random(seed)
+    self._intern_pool = intern_pool
+    self._root = None
+    self._nodes_created = 0
+
+  def search(self, board):
+    """Searches from a board in the acting player's action phase.
+
+    Returns:
+      A SearchResult.
+    """
+    self._root = self._reuse_subtree(board) or _DecisionNode(self._intern(board))
+    self._nodes_created = 0
+
+    start = time.perf_counter()
+    deadline = None if self._seconds is None else start + self._seconds
+    iterations = 0
+    while self._iterations is None or iterations < self._iterations:
+      if deadline is not None and time.perf_counter() >= deadline:
+        break
+      self._run_iteration()
+      iterations += 1
+    elapsed = time.perf_counter() - start
+
+    return SearchResult(
+      self._best_actions(),
+      iterations,
+      self._nodes_created,
+      elapsed,
+      self._root.visits)
+
+  def _reuse_subtree(self, board):
+    """Finds a decision node for this board in the previous tree, if any."""
+    if self._root is None:
+      return None
+    frontier = [self._root]
+    while frontier:
+      node = frontier.pop()
+      if isinstance(node, _DecisionNode):
+        if node.board == board:
+          return node
+        frontier.extend(node.children.values())
+      else:
+        frontier.extend(node.outcomes.values())
+    return None
+
+  def _run_iteration(self):
+    """Selects, expands, simulates and backs up one playout."""
+    path = []
+    node = self._root
+    while True:
+      path.append(node)
+      if isinstance(node, _ChanceNode):
+        node = self._sample_outcome(node)
+        continue
+      if node.untried is None:
+        node.untried = list(node.board.iter_legal_actions()) + [END_TURN]
+      if node.untried:
+        action = node.untried.pop(self._random.randrange(len(node.untried)))
+        child = self._make_child(node.board, action)
+        node.children[action] = child
+        path.append(child)
+        if isinstance(child, _ChanceNode):
+          path.append(self._sample_outcome(child))
+        break
+      node = self._select_child(node)
+
+    leaf_board = path[-1].board
+    final_board = self._rollout(leaf_board)
+    self._backup(path, final_board)
+
+  def _make_child(self, board, action):
+    self._nodes_created += 1
+    if action is END_TURN:
+      return _ChanceNode(
+        self._intern(board.resolve_end_of_turn_sequence(self._options)))
+    return _DecisionNode(self._intern(board._play_action(action)))
+
+  def _intern(self, board):
+    if self._intern_pool is None:
+      return board
+    return self._intern_pool.intern_board(board)
+
+  def _sample_outcome(self, chance_node):
+    if len(chance_node.outcomes) >= self._max_chance_outcomes:
+      outcomes = list(chance_node.outcomes.values())
+      return self._random.choices(
+        outcomes, [max(o.visits, 1) for o in outcomes])[0]
+
+    next_board = self._intern(
+      chance_node.board.resolve_start_of_turn(self._options))
+    outcome = chance_node.outcomes.get(next_board)
+    if outcome is None:
+      outcome = _DecisionNode(next_board)
+      chance_node.outcomes[next_board] = outcome
+      self._nodes_created += 1
+    return outcome
+
+  def _select_child(self, node):
+    log_visits = math.log(node.visits)
+    best = None
+    best_score = -math.inf
+    for child in node.children.values():
+      score = (child.total / child.visits +
+               self._exploration * math.sqrt(log_visits / child.visits))
+      if score > best_score:
+        best = child
+        best_score = score
+    return best
+
+  def _rollout(self, board):
+    """Plays random turns from a board and returns where it ended up."""
+    for _ in range(self._rollout_turns):
+      while self._random.random() >= self._rollout_end_probability:
+        action = board.sample_legal_action(self._random)
+        if action is None:
+          break
+        board = board._play_action(action)
+      board = board.resolve_end_of_turn_sequence(
+        self._options).resolve_start_of_turn(self._options)
+    return board
+
+  def _backup(self, path, final_board):
+    values = {p: self._evaluator(final_board, p) for p in final_board.turn_order}
+    # Each node is credited from the point of view of whoever chose to move
+    # into it: the acting player at its parent.
+    path[0].visits += 1
+    for (parent, node) in zip(path, path[1:]):
+      node.visits += 1
+      node.total += values[parent.board.acting_player]
+
+  def _best_actions(self):
+    """Follows the most visited moves from the root until the turn ends."""
+    actions = []
+    node = self._root
+    while isinstance(node, _DecisionNode) and node.children:
+      (action, child) = max(node.children.items(), key=lambda c: c[1].visits)
+      if action is END_TURN:
+        break
+      actions.append(action)
+      node = child
+    return actions
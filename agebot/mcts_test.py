@@ -0,0 +1,67 @@
+import random
+import unittest
+from .board import Player, Point
+from . import board_initializer, events, mcts, options
+
+def start_game():
+  sim_options = options.SimulatorOptions(
+    events.NULL_LOGGER, options.ActualRng(random.Random(3)))
+  return (board_initializer.initialize_board().resolve_start_of_turn(sim_options),
+          sim_options)
+
+class MctsTest(unittest.TestCase):
+
+  def test_search_returns_playable_actions(self):
+    (testing_board, sim_options) = start_game()
+    testing_board = testing_board.update_tableau(
+      Player.ONE,
+      testing_board.tableau(Player.ONE).add_points({Point.RESOURCES: 6}))
+
+    searcher = mcts.MctsSearcher(sim_options, iterations=200, seed=1)
+    result = searcher.search(testing_board)
+
+    self.assertEqual(result.iterations, 200)
+    self.assertGreater(result.nodes, 0)
+    self.assertGreater(result.nodes_per_second, 0)
+    self.assertNotIn(mcts.END_TURN, result.actions)
+    testing_board.play_action_phase(result.actions)  # no error
+
+  def test_time_budget(self):
+    (testing_board, sim_options) = start_game()
+    searcher = mcts.MctsSearcher(
+      sim_options, iterations=None, seconds=0.05, seed=1)
+    result = searcher.search(testing_board)
+    self.assertGreater(result.iterations, 0)
+    self.assertLess(result.elapsed, 1.0)
+
+  def test_needs_a_budget(self):
+    (_, sim_options) = start_game()
+    with self.assertRaises(ValueError):
+      mcts.MctsSearcher(sim_options, iterations=None, seconds=None)
+
+  def test_tree_reuse(self):
+    (testing_board, sim_options) = start_game()
+    testing_board = testing_board.update_tableau(
+      Player.ONE,
+      testing_board.tableau(Player.ONE).add_points({Point.RESOURCES: 6}))
+    searcher = mcts.MctsSearcher(sim_options, iterations=300, seed=2)
+    first = searcher.search(testing_board)
+    self.assertEqual(first.root_visits, 300)
+
+    again = searcher.search(testing_board)
+    self.assertEqual(again.root_visits, 600)
+
+    # Searching a board one action deeper keeps that subtree's visits.
+    (action,) = first.actions[:1]
+    deeper = searcher.search(testing_board._play_action(action))
+    self.assertGreater(deeper.root_visits, deeper.iterations)
+
+  def test_evaluator_is_symmetric(self):
+    (testing_board, _) = start_game()
+    self.assertAlmostEqual(
+      mcts.points_evaluator(testing_board, Player.ONE), 0.5)
+    ahead = testing_board.update_tableau(
+      Player.ONE,
+      testing_board.tableau(Player.ONE).add_points({Point.CULTURE: 5}))
+    self.assertGreater(mcts.points_evaluator(ahead, Player.ONE), 0.5)
+    self.assertLess(mcts.points_evaluator(ahead, Player.TWO), 0.5)
@@ -1,25 +1,43 @@
 """Contains classes which make it easy to modify resolution options."""
 
 from .immutable import frozenbag
+from . import events, profiling, sampling
 from collections import namedtuple
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 
 class PickCardsResult(namedtuple('PickCardsResult', ['cards', 'deck'])):
   """The result of calling pickCards."""
 
-class ConsoleLogger:
+class ConsoleLogger(events.Logger):
   """Logs to the console."""
 
-  def replenish_civil_cards(self, cards):
-    print('Drew {} from the civil deck.'.format(', '.join(card.name for card in cards)))
+  def log(self, event):
+    print(event.to_dict())
+
+def _card_order(card):
+  """Sorts cards by registry ID, or by themselves if they have none."""
+  return getattr(card, 'id', card)
 
 class ActualRng:
   """Actually resolves outcomes using pseudorandom numbers."""
 
   def __init__(self, random):
+    """Creates an ActualRng.
+
+    Args:
+      random: A random.Random, or a streams.CounterRandom for reproducible,
+        splittable streams.
+    """
     self._random = random
 
+  def split(self, *path):
+    """Returns an ActualRng drawing from an independent child stream.
+
+    This requires the underlying generator to be a streams.CounterRandom.
+    """
+    return ActualRng(self._random.split(*path))
+
   def pick_cards(self, count, mapping) -> PickCardsResult:
     """Draws cards from a set.
 
@@ -33,27 +51,16 @@ class ActualRng:
     Returns:
       The cards picked, and a frozenbag containing the remaining cards in the deck.
     """
-    cards = []
-    remainder = dict(mapping)
-    for _ in range(count):
-      if not mapping:
-        return PickCardsResult(cards, frozenbag(remainder))
-      cards.append(self._pick_card(remainder))
-
-    return PickCardsResult(cards, frozenbag(remainder))
-
-
-  def _pick_card(self, mapping):
-    """Pick a card. Edit mapping in place. Return card picked."""
-    if not mapping:
-      raise RuntimeError('bug')
-    card = self._random.choices(mapping, mapping)
-    mapping[card] -= 1
-    if (mapping[card] == 0):
-      del mapping[card]
-    return card
+    # Which card a random number picks depends on the order of the deck, so
+    # put it in a canonical order: equal decks built in different orders, such
+    # as a decoded deck and a live one, must draw the same cards.
+    sampler = sampling.FenwickSampler(
+      {card: mapping[card] for card in sorted(mapping, key=_card_order)})
+    cards = sampler.draw_many(count, self._random)
+    return PickCardsResult(cards, frozenbag(sampler.remaining()))
 
 class SimulatorOptions(NamedTuple):
   """Represents options which modify how parts of the game are resolved."""
-  logger: ConsoleLogger
+  logger: events.Logger
   rng: ActualRng
+  profiler: Optional[profiling.Profiler] = None
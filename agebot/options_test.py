@@ -0,0 +1,30 @@
+import random
+import unittest
+from collections import Counter
+from . import immutable, options
+
+class ActualRngTest(unittest.TestCase):
+
+  def test_pick_cards(self):
+    deck = immutable.frozenbag({'a': 2, 'b': 3})
+    result = options.ActualRng(random.Random(0)).pick_cards(3, deck)
+
+    self.assertEqual(len(result.cards), 3)
+    self.assertEqual(
+      Counter(result.cards) + Counter(dict(result.deck.items())),
+      Counter({'a': 2, 'b': 3}))
+
+  def test_pick_cards_ignores_deck_order(self):
+    counts = {'a': 1, 'b': 2, 'c': 3, 'd': 4}
+    forward = immutable.frozenbag(counts)
+    backward = immutable.frozenbag(dict(reversed(counts.items())))
+    for seed in range(10):
+      self.assertEqual(
+        options.ActualRng(random.Random(seed)).pick_cards(5, forward),
+        options.ActualRng(random.Random(seed)).pick_cards(5, backward))
+
+  def test_pick_more_cards_than_deck(self):
+    deck = immutable.frozenbag({'a': 1, 'b': 1})
+    result = options.ActualRng(random.Random(0)).pick_cards(5, deck)
+    self.assertCountEqual(result.cards, ['a', 'b'])
+    self.assertEqual(len(result.deck), 0)
@@ -0,0 +1,89 @@
+"""Enumerates the distinct results of an action phase.
+
+Playing build actions in a different order gives the same tableau, so a
+search which branches over every sequence of actions mostly explores
+duplicates. This module instead lists each distinct tableau the acting player
+can end their action phase with, together with one canonical action list
+which reaches it.
+
+Sequences are expanded as multisets: actions are only ever appended in the
+fixed order Tableau.iter_legal_actions() uses, so each multiset is generated
+exactly once. Once an action is unaffordable it stays unaffordable for the
+rest of the turn (resources and civil actions only go down, and building
+counts only go up), so it is pruned from every deeper branch.
+"""
+
+from collections import namedtuple
+
+
+class ActionPhaseOutcome(namedtuple('ActionPhaseOutcome', ['tableau', 'actions'])):
+  """One way an action phase can end.
+
+  Fields:
+    tableau: The acting player's tableau at the end of the action phase,
+      before the end-of-turn sequence.
+    actions: A tuple of actions which reaches that tableau, in canonical
+      order.
+  """
+
+
+def action_phase_outcomes(tableau):
+  """Lists every distinct tableau reachable in one action phase.
+
+  Args:
+    tableau: The acting player's tableau at the start of the action phase.
+  Returns:
+    A list of ActionPhaseOutcomes, starting with doing nothing.
+  """
+  results = []
+  _expand(tableau, (), tuple(tableau.iter_legal_actions()), results)
+  return results
+
+def _expand(tableau, actions, candidates, results):
+  results.append(ActionPhaseOutcome(tableau, actions))
+  for (i, action) in enumerate(candidates):
+    next_tableau = tableau.play_action(action)
+    # Only this action and later ones may follow, so that each multiset of
+    # actions is only produced in one order.
+    remaining = tuple(a for a in candidates[i:] if next_tableau.is_action_legal(a))
+    _expand(next_tableau, actions + (action,), remaining, results)
+
+
+class OutcomeCache:
+  """Memoizes action_phase_outcomes() by tableau.
+
+  Searches see the same tableau many times, for instance through
+  transpositions or after tree reuse. The cache is cleared whenever it grows
+  past its capacity.
+  """
+
+  def __init__(self, capacity=4096):
+    self._capacity = capacity
+    self._cache = {}
+    self._hits = 0
+    self._misses = 0
+
+  @property
+  def hits(self):
+    return self._hits
+
+  @property
+  def misses(self):
+    return self._misses
+
+  def outcomes(self, tableau):
+    """Returns action_phase_outcomes(tableau), computing it at most once."""
+    result = self._cache.get(tableau)
+    if result is not None:
+      self._hits += 1
+      return result
+    self._misses += 1
+    if len(self._cache) >= self._capacity:
+      self._cache.clear()
+    result = tuple(action_phase_outcomes(tableau))
+    self._cache[tableau] = result
+    return result
+
+  def board_outcomes(self, board):
+    """Returns the outcomes of the acting player's action phase on a board."""
+    return self.outcomes(board.tableau(board.acting_player))
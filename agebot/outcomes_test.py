@@ -0,0 +1,52 @@
+import unittest
+from .board import Point
+from . import board_initializer, outcomes
+
+def all_sequence_outcomes(tableau):
+  """Brute force: every tableau reachable by any sequence of actions."""
+  seen = {tableau}
+  frontier = [tableau]
+  while frontier:
+    t = frontier.pop()
+    for action in t.legal_actions():
+      next_tableau = t.play_action(action)
+      if next_tableau not in seen:
+        seen.add(next_tableau)
+        frontier.append(next_tableau)
+  return seen
+
+class OutcomesTest(unittest.TestCase):
+
+  def test_matches_brute_force(self):
+    tableau = board_initializer.initialize_tableau().add_points(
+      {Point.RESOURCES: 9})
+    results = outcomes.action_phase_outcomes(tableau)
+
+    reached = [o.tableau for o in results]
+    self.assertEqual(len(reached), len(set(reached)))
+    self.assertEqual(set(reached), all_sequence_outcomes(tableau))
+
+  def test_canonical_actions_reach_outcome(self):
+    tableau = board_initializer.initialize_tableau().add_points(
+      {Point.RESOURCES: 6})
+    for outcome in outcomes.action_phase_outcomes(tableau):
+      t = tableau
+      for action in outcome.actions:
+        t = t.play_action(action)
+      self.assertEqual(t, outcome.tableau)
+
+  def test_nothing_affordable(self):
+    tableau = board_initializer.initialize_tableau()
+    self.assertEqual(
+      outcomes.action_phase_outcomes(tableau),
+      [outcomes.ActionPhaseOutcome(tableau, ())])
+
+  def test_cache(self):
+    cache = outcomes.OutcomeCache()
+    tableau = board_initializer.initialize_tableau().add_points(
+      {Point.RESOURCES: 4})
+    first = cache.outcomes(tableau)
+    self.assertIs(cache.outcomes(
+      board_initializer.initialize_tableau().add_points({Point.RESOURCES: 4})),
+      first)
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
@@ -0,0 +1,112 @@
+"""Counts and times the phases of the turn pipeline.
+
+To profile, put a Profiler in SimulatorOptions.profiler and run games or
+searches as usual; then call report(). The engine records each phase of the
+end-of-turn sequence and the start of turn, each action played by type, and
+civil deck draws under names such as 'end_of_turn.gain_food',
+'action.BuildAction' or 'civil_decks.draw'. Phases can nest: the time spent
+drawing is also part of 'start_of_turn.replenish'.
+
+When SimulatorOptions.profiler is None, which is the default, the engine does
+nothing more than check for it.
+
+Allocations are measured with sys.getallocatedblocks(), so they count the
+net number of memory blocks a phase left allocated, not every allocation it
+made along the way.
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+
+class PhaseStats(namedtuple('PhaseStats', ['calls', 'seconds', 'allocations'])):
+  """Totals for one phase.
+
+  Fields:
+    calls: How many times the phase ran.
+    seconds: The total wall-clock time spent in it.
+    allocations: The net number of memory blocks allocated in it.
+  """
+
+  @property
+  def seconds_per_call(self):
+    if self.calls == 0:
+      return 0.0
+    return self.seconds / self.calls
+
+
+def active_profiler(options):
+  """Returns the Profiler in some SimulatorOptions, or None.
+
+  Args:
+    options: SimulatorOptions, or None.
+  """
+  if options is None:
+    return None
+  return options.profiler
+
+
+class Profiler:
+  """Accumulates PhaseStats by phase name.
+
+  The engine calls it like this, so that consecutive phases share one clock
+  reading between them:
+
+    mark = profiler.mark()
+    ... first phase ...
+    mark = profiler.record('first', mark)
+    ... second phase ...
+    profiler.record('second', mark)
+  """
+
+  def __init__(self):
+    self._calls = {}
+    self._nanoseconds = {}
+    self._allocations = {}
+
+  def mark(self):
+    """Returns the current time and allocation count, to pass to record()."""
+    return (time.perf_counter_ns(), sys.getallocatedblocks())
+
+  def record(self, phase, mark):
+    """Records that a phase ran from a mark until now.
+
+    Returns:
+      A new mark for now, for the phase which follows.
+    """
+    now = (time.perf_counter_ns(), sys.getallocatedblocks())
+    if phase in self._calls:
+      self._calls[phase] += 1
+      self._nanoseconds[phase] += now[0] - mark[0]
+      self._allocations[phase] += now[1] - mark[1]
+    else:
+      self._calls[phase] = 1
+      self._nanoseconds[phase] = now[0] - mark[0]
+      self._allocations[phase] = now[1] - mark[1]
+    return now
+
+  def stats(self):
+    """Returns a dict from phase names to PhaseStats."""
+    return {
+      phase: PhaseStats(
+        calls, self._nanoseconds[phase] / 1e9, self._allocations[phase])
+      for (phase, calls) in self._calls.items()
+    }
+
+  def reset(self):
+    self._calls.clear()
+    self._nanoseconds.clear()
+    self._allocations.clear()
+
+  def report(self):
+    """Returns a table of every phase, the most time-consuming first."""
+    rows = sorted(self.stats().items(), key=lambda r: r[1].seconds, reverse=True)
+    width = max([len('phase')] + [len(phase) for (phase, _) in rows])
+    lines = ['{:<{w}}  {:>10}  {:>12}  {:>12}  {:>12}'.format(
+      'phase', 'calls', 'total ms', 'us/call', 'allocations', w=width)]
+    for (phase, s) in rows:
+      lines.append('{:<{w}}  {:>10}  {:>12.3f}  {:>12.3f}  {:>12}'.format(
+        phase, s.calls, s.seconds * 1e3, s.seconds_per_call * 1e6,
+        s.allocations, w=width))
+    return '\n'.join(lines)
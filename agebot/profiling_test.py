@@ -0,0 +1,57 @@
+import random
+import unittest
+from . import board_initializer, events, mcts, options, profiling
+
+class ProfilerTest(unittest.TestCase):
+
+  def test_records_turn_phases(self):
+    profiler = profiling.Profiler()
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(2)), profiler)
+
+    game_board = board_initializer.initialize_board()
+    played = 0
+    for _ in range(3):
+      game_board = game_board.resolve_start_of_turn(sim_options)
+      actions = list(game_board.legal_actions())[:1]
+      played += len(actions)
+      game_board = game_board.play_action_phase(actions, sim_options)
+
+    stats = profiler.stats()
+    for phase in ('start_of_turn.shift_left', 'start_of_turn.replenish',
+                  'start_of_turn.antiquate', 'civil_decks.draw',
+                  'end_of_turn.score_science_and_culture',
+                  'end_of_turn.gain_food', 'end_of_turn.gain_resources',
+                  'end_of_turn.reset_actions', 'end_of_turn.next_player'):
+      self.assertEqual(stats[phase].calls, 3, phase)
+      self.assertGreaterEqual(stats[phase].seconds, 0)
+    self.assertEqual(stats['action.BuildAction'].calls, played)
+
+  def test_report(self):
+    profiler = profiling.Profiler()
+    mark = profiler.mark()
+    mark = profiler.record('slow', mark)
+    profiler.record('fast', mark)
+    profiler.record('fast', mark)
+
+    report = profiler.report().splitlines()
+    self.assertEqual(len(report), 3)
+    self.assertTrue(report[0].startswith('phase'))
+    self.assertEqual(profiler.stats()['fast'].calls, 2)
+
+    profiler.reset()
+    self.assertEqual(profiler.stats(), {})
+
+  def test_profiles_search_rollouts(self):
+    profiler = profiling.Profiler()
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(5)), profiler)
+    game_board = board_initializer.initialize_board().resolve_start_of_turn(
+      sim_options)
+    mcts.MctsSearcher(sim_options, iterations=20, seed=1).search(game_board)
+    self.assertGreater(profiler.stats()['end_of_turn.gain_food'].calls, 20)
+
+  def test_disabled_by_default(self):
+    sim_options = options.SimulatorOptions(
+      events.NULL_LOGGER, options.ActualRng(random.Random(2)))
+    self.assertIsNone(profiling.active_profiler(sim_options))
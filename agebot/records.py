@@ -0,0 +1,323 @@
+"""A compact binary archive of played games.
+
+Games are deterministic given their seed and the actions each player chose,
+so a game is stored as its initial Board, its seed and one list of building
+IDs per turn. Boards at later turns are rebuilt on demand by replaying the
+turns with self_play.turn_options(). To bound how much has to be replayed,
+a writer can also store a full encoded Board every few turns as a keyframe.
+
+Readers memory-map the file and only touch the bytes of the games and turns
+they ask for, so scanning an archive neither loads it into memory nor
+unpickles anything.
+
+A file is laid out as follows. All integers are little-endian.
+
+  magic                  4 bytes, b'AGBR'
+  version                u16
+  reserved               u16
+  game count             u32
+  index offset           u64
+  games, each:
+    seed                 u64
+    turn count           u16
+    keyframe interval    u16  (0 if there are no keyframes)
+    board size           u16  (the size of an encoded Board)
+    initial board        board size bytes  (see encoding.py)
+    keyframes            board size bytes each, for the Board before turns
+                         interval, 2 * interval, ... < turn count
+    turn offsets         u32 * (turn count + 1)
+    actions              u8 building ID per action; turn t's are at
+                         turn offsets [t, t + 1)
+  index                  u64 * game count  (the offset of each game)
+"""
+
+import mmap
+import struct
+from collections import namedtuple
+from . import board_initializer, bots, buildings, encoding, self_play
+from .board import BuildAction
+
+MAGIC = b'AGBR'
+VERSION = 1
+
+_FILE_HEADER = struct.Struct('<4sHHIQ')
+_GAME_HEADER = struct.Struct('<QHHH')
+_OFFSET = struct.Struct('<I')
+_INDEX_ENTRY = struct.Struct('<Q')
+
+
+class GameRecord(namedtuple('GameRecord', ['seed', 'initial_board', 'turns'])):
+  """Everything needed to replay a game.
+
+  Fields:
+    seed: The seed the game was played with.
+    initial_board: The Board before the first turn.
+    turns: A sequence with one entry per turn, each a sequence of the
+      BuildActions the acting player played that turn.
+  """
+
+
+def record_game(seed, bot_factory=bots.RandomBot,
+                max_rounds=self_play.DEFAULT_MAX_ROUNDS):
+  """Plays a game with self_play.play_game() and returns its GameRecord."""
+  turns = []
+  self_play.play_game(seed, bot_factory, max_rounds, turns=turns)
+  return GameRecord(seed, board_initializer.initialize_board(), tuple(turns))
+
+def replay(game_board, seed, turns, first_turn=0):
+  """Yields the Board after each of a sequence of turns.
+
+  Args:
+    game_board: The Board before the first turn replayed.
+    seed: The game's seed.
+    turns: The actions of each turn to replay.
+    first_turn: The index in the game of the first turn replayed.
+  """
+  for (turn, actions) in enumerate(turns, first_turn):
+    game_board = game_board.resolve_start_of_turn(
+      self_play.turn_options(seed, turn)).play_action_phase(actions)
+    yield game_board
+
+
+class RecordWriter:
+  """Writes GameRecords to an archive file.
+
+  Use as a context manager, or call close() when done: the index is only
+  written then.
+  """
+
+  def __init__(self, path, keyframe_interval=0):
+    """Creates a new archive, replacing any file already at path.
+
+    Args:
+      path: Where to write the archive.
+      keyframe_interval: Store the full Board every this many turns. 0 for
+        no keyframes.
+    """
+    self._file = open(path, 'wb')
+    self._keyframe_interval = keyframe_interval
+    self._offsets = []
+    self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def write(self, record):
+    """Appends a game to the archive.
+
+    Raises:
+      ValueError: if a board can't be encoded or an action isn't a
+        BuildAction.
+    """
+    initial = encoding.encode(record.initial_board)
+    turns = [tuple(a) for a in record.turns]
+
+    keyframes = []
+    interval = self._keyframe_interval
+    if interval:
+      for (turn, game_board) in enumerate(
+          replay(record.initial_board, record.seed, turns), 1):
+        if turn % interval == 0 and turn < len(turns):
+          keyframes.append(encoding.encode(game_board))
+
+    actions = bytearray()
+    offsets = [0]
+    for turn in turns:
+      for action in turn:
+        if not isinstance(action, BuildAction):
+          raise ValueError('Only BuildActions can be recorded, not {}'.format(action))
+        actions.append(action.building.id)
+      offsets.append(len(actions))
+
+    self._offsets.append(self._file.tell())
+    self._file.write(_GAME_HEADER.pack(
+      record.seed, len(turns), interval, len(initial)))
+    self._file.write(initial)
+    for k in keyframes:
+      self._file.write(k)
+    self._file.write(struct.pack('<{}I'.format(len(offsets)), *offsets))
+    self._file.write(actions)
+
+  def close(self):
+    if self._file.closed:
+      return
+    index_offset = self._file.tell()
+    for offset in self._offsets:
+      self._file.write(_INDEX_ENTRY.pack(offset))
+    self._file.seek(0)
+    self._file.write(_FILE_HEADER.pack(
+      MAGIC, VERSION, 0, len(self._offsets), index_offset))
+    self._file.close()
+
+def write_records(path, records, keyframe_interval=0):
+  """Writes a sequence of GameRecords to a new archive."""
+  with RecordWriter(path, keyframe_interval) as writer:
+    for record in records:
+      writer.write(record)
+
+
+class RecordReader:
+  """Random access to the games in an archive.
+
+  The file is memory-mapped, and games are only parsed when accessed.
+  """
+
+  def __init__(self, path):
+    """Opens an archive.
+
+    Raises:
+      ValueError: if the file isn't an archive this version can read.
+    """
+    with open(path, 'rb') as f:
+      self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(self._mmap) < _FILE_HEADER.size:
+      self.close()
+      raise ValueError('{} is too short to be a game archive'.format(path))
+    (magic, version, _, self._count, self._index_offset) = (
+      _FILE_HEADER.unpack_from(self._mmap))
+    if magic != MAGIC:
+      self.close()
+      raise ValueError('{} is not a game archive'.format(path))
+    if version != VERSION:
+      self.close()
+      raise ValueError('Unsupported game archive version {}'.format(version))
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def close(self):
+    self._mmap.close()
+
+  def __len__(self):
+    return self._count
+
+  def __getitem__(self, i):
+    """Returns a GameView of game i."""
+    if not 0 <= i < self._count:
+      raise IndexError('Game {} out of range'.format(i))
+    (offset,) = _INDEX_ENTRY.unpack_from(
+      self._mmap, self._index_offset + i * _INDEX_ENTRY.size)
+    return GameView(self._mmap, offset)
+
+  def __iter__(self):
+    for i in range(self._count):
+      yield self[i]
+
+
+class GameView:
+  """One game in an archive, parsed lazily.
+
+  Boards are numbered by turn: board(t) is the Board before turn t starts,
+  so board(0) is the initial board and board(len(self)) is the final one.
+  """
+
+  def __init__(self, data, offset):
+    self._data = data
+    (self._seed, self._turn_count, self._keyframe_interval, self._board_size) = (
+      _GAME_HEADER.unpack_from(data, offset))
+    self._initial_offset = offset + _GAME_HEADER.size
+    self._keyframes_offset = self._initial_offset + self._board_size
+    self._offsets_offset = (
+      self._keyframes_offset + self._keyframe_count() * self._board_size)
+    self._actions_offset = (
+      self._offsets_offset + (self._turn_count + 1) * _OFFSET.size)
+    # The last Board rebuilt, so that walking forwards through a game only
+    # replays each turn once.
+    self._cached = None
+
+  @property
+  def seed(self):
+    return self._seed
+
+  def __len__(self):
+    """The number of turns in the game."""
+    return self._turn_count
+
+  def _keyframe_count(self):
+    if not self._keyframe_interval or not self._turn_count:
+      return 0
+    return (self._turn_count - 1) // self._keyframe_interval
+
+  def _turn_bounds(self, turn):
+    if not 0 <= turn < self._turn_count:
+      raise IndexError('Turn {} out of range'.format(turn))
+    start = self._offsets_offset + turn * _OFFSET.size
+    (begin, end) = struct.unpack_from('<II', self._data, start)
+    return (self._actions_offset + begin, self._actions_offset + end)
+
+  def building_ids(self, turn):
+    """Returns the IDs of the buildings built on a turn, as bytes."""
+    (begin, end) = self._turn_bounds(turn)
+    return self._data[begin:end]
+
+  def actions(self, turn):
+    """Returns a tuple of the BuildActions played on a turn."""
+    return tuple(BuildAction.of(buildings.BUILDINGS[i])
+                 for i in self.building_ids(turn))
+
+  def encoded_board(self, turn):
+    """Returns the encoded Board before a turn, if it is stored in the file.
+
+    Returns:
+      Bytes as produced by encoding.encode(), or None if turn is neither 0
+      nor a keyframe.
+    """
+    if turn == 0:
+      start = self._initial_offset
+    else:
+      interval = self._keyframe_interval
+      if not interval or turn % interval or turn // interval > self._keyframe_count():
+        return None
+      start = self._keyframes_offset + (turn // interval - 1) * self._board_size
+    return self._data[start:start + self._board_size]
+
+  @property
+  def initial_board(self):
+    return self.board(0)
+
+  def board(self, turn):
+    """Rebuilds the Board before a turn.
+
+    This decodes the closest stored Board at or before the turn and replays
+    the turns in between.
+    """
+    if not 0 <= turn <= self._turn_count:
+      raise IndexError('Turn {} out of range'.format(turn))
+    if self._cached is not None and self._cached[0] == turn:
+      return self._cached[1]
+
+    start = 0
+    if self._keyframe_interval:
+      start = min(turn // self._keyframe_interval,
+                  self._keyframe_count()) * self._keyframe_interval
+    if self._cached is not None and start <= self._cached[0] < turn:
+      (start, game_board) = self._cached
+    else:
+      game_board = encoding.decode(self.encoded_board(start))
+
+    for game_board in replay(
+        game_board,
+        self._seed,
+        (self.actions(t) for t in range(start, turn)),
+        start):
+      pass
+    self._cached = (turn, game_board)
+    return game_board
+
+  def action_phase_board(self, turn):
+    """Rebuilds the Board in the acting player's action phase of a turn."""
+    if not 0 <= turn < self._turn_count:
+      raise IndexError('Turn {} out of range'.format(turn))
+    return self.board(turn).resolve_start_of_turn(
+      self_play.turn_options(self._seed, turn))
+
+  def boards(self):
+    """Yields the Board before every turn, and then the final Board."""
+    for turn in range(self._turn_count + 1):
+      yield self.board(turn)
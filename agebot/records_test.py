@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from .board import Point
+from . import records, self_play
+
+class RecordsTest(unittest.TestCase):
+
+  def setUp(self):
+    handle, self.path = tempfile.mkstemp()
+    os.close(handle)
+    self.addCleanup(os.remove, self.path)
+    self.games = [records.record_game(seed, max_rounds=5) for seed in (3, 4, 5)]
+
+  def test_round_trip_actions(self):
+    records.write_records(self.path, self.games)
+    with records.RecordReader(self.path) as reader:
+      self.assertEqual(len(reader), 3)
+      for (game, view) in zip(self.games, reader):
+        self.assertEqual(view.seed, game.seed)
+        self.assertEqual(len(view), len(game.turns))
+        self.assertEqual(view.initial_board, game.initial_board)
+        for (t, actions) in enumerate(game.turns):
+          self.assertEqual(view.actions(t), actions)
+
+  def test_final_board_matches_play(self):
+    records.write_records(self.path, self.games, keyframe_interval=3)
+    with records.RecordReader(self.path) as reader:
+      for (game, view) in zip(self.games, reader):
+        final = view.board(len(view))
+        expected = self_play.play_game(game.seed, max_rounds=5)
+        self.assertEqual(
+          final.tableau(final.turn_order[0]).points(Point.SCIENCE),
+          expected.final_points(0, Point.SCIENCE))
+
+  def test_keyframes_match_replay(self):
+    records.write_records(self.path, self.games, keyframe_interval=2)
+    with records.RecordReader(self.path) as reader:
+      view = reader[1]
+      game = self.games[1]
+      expected = [game.initial_board] + list(
+        records.replay(game.initial_board, game.seed, game.turns))
+
+      self.assertIsNotNone(view.encoded_board(2))
+      self.assertIsNone(view.encoded_board(3))
+      # Random access, out of order, then a forward scan.
+      for t in (7, 2, 9, 0, 5):
+        self.assertEqual(view.board(t), expected[t])
+      self.assertEqual(list(reader[1].boards()), expected)
+
+  def test_action_phase_board(self):
+    records.write_records(self.path, self.games[:1])
+    with records.RecordReader(self.path) as reader:
+      view = reader[0]
+      game_board = view.action_phase_board(4)
+      self.assertEqual(
+        game_board.play_action_phase(view.actions(4)), view.board(5))
+
+  def test_out_of_range(self):
+    records.write_records(self.path, self.games[:1])
+    with records.RecordReader(self.path) as reader:
+      with self.assertRaises(IndexError):
+        reader[1]
+      with self.assertRaises(IndexError):
+        reader[0].actions(len(reader[0]))
+
+  def test_rejects_other_files(self):
+    with open(self.path, 'wb') as f:
+      f.write(b'not an archive at all')
+    with self.assertRaises(ValueError):
+      records.RecordReader(self.path)
@@ -0,0 +1,117 @@
+"""Interns game content and gives each piece a small integer ID.
+
+Buildings, technologies and governments are flyweights: constructing one with
+the same defining fields as an existing one returns the existing object. That
+makes equality an identity check and hashing free, and it means each object
+can carry a dense ID, so the engine can index plain arrays by ID instead of
+hashing objects.
+
+IDs are assigned in the order objects are first created. Content modules
+create everything at import time in a fixed order, so the IDs of content are
+stable from one process to the next.
+"""
+
+
+class Registry:
+  """Holds every interned object of one kind, in ID order."""
+
+  def __init__(self, name):
+    """Creates an empty registry.
+
+    Args:
+      name: A unique name for this kind of object, used when pickling.
+    """
+    if name in _REGISTRIES:
+      raise ValueError('Duplicate registry {}'.format(name))
+    self._name = name
+    self._objects = []
+    self._by_key = {}
+    _REGISTRIES[name] = self
+
+  @property
+  def name(self):
+    return self._name
+
+  def intern(self, key, create):
+    """Returns the object with this key, creating it if it doesn't exist yet.
+
+    Args:
+      key: The object's defining fields.
+      create: A function which takes no arguments and returns a new, fully
+        initialized object. It is only called if there is no object with
+        this key yet, and the object it returns is given the next ID.
+    """
+    existing = self._by_key.get(key)
+    if existing is not None:
+      return existing
+    obj = create()
+    obj._id = len(self._objects)
+    self._objects.append(obj)
+    self._by_key[key] = obj
+    return obj
+
+  def __getitem__(self, object_id):
+    return self._objects[object_id]
+
+  def __len__(self):
+    return len(self._objects)
+
+  def __iter__(self):
+    return iter(tuple(self._objects))
+
+
+_REGISTRIES = {}
+
+def _lookup(registry_name, object_id):
+  """Finds an interned object. Used to unpickle Interned objects."""
+  return _REGISTRIES[registry_name][object_id]
+
+
+class _InternedType(type):
+  """Makes calling an Interned class look its object up before creating it.
+
+  Overriding __new__ alone isn't enough, since Python would still call
+  __init__ on the existing object with the new arguments.
+  """
+
+  def __call__(cls, *args, **kwargs):
+    def create():
+      obj = cls.__new__(cls)
+      obj.__init__(*args, **kwargs)
+      return obj
+    return cls._registry.intern(cls._flyweight_key(*args, **kwargs), create)
+
+
+class Interned(metaclass=_InternedType):
+  """Base class for flyweight content objects.
+
+  Subclasses set _registry and define a static _flyweight_key method, which
+  takes the same arguments as __init__ and returns a hashable key. The key
+  should include every field, so that different objects never share one.
+  Objects are equal only if they are the same object, and __init__ only runs
+  for the first object with a key.
+  """
+
+  _registry = None
+
+  @property
+  def id(self):
+    """A small integer, unique among objects of this kind."""
+    return self._id
+
+  def __hash__(self):
+    return self._id
+
+  def __reduce__(self):
+    # Unpickle to the interned object rather than to a copy of it.
+    return (_lookup, (self._registry.name, self._id))
+
+
+BUILDINGS = Registry('Building')
+"""Every Building, in ID order."""
+
+BUILDING_TECHNOLOGIES = Registry('BuildingTechnology')
+"""Every BuildingTechnology, in ID order."""
+
+GOVERNMENTS = Registry('Government')
+"""Every Government, in ID order."""
@@ -0,0 +1,58 @@
+import pickle
+import unittest
+from . import board, buildings, content, registry, zobrist
+
+_THINGS = registry.Registry('registry_test.Thing')
+
+class _Thing(registry.Interned):
+  """Interned only in _THINGS, so tests don't add to the game's content."""
+
+  _registry = _THINGS
+
+  @staticmethod
+  def _flyweight_key(name, size):
+    return (name, size)
+
+  def __init__(self, name, size):
+    self.inits = getattr(self, 'inits', 0) + 1
+
+class RegistryTest(unittest.TestCase):
+
+  def test_content_ids_are_dense(self):
+    self.assertEqual([b.id for b in buildings.BUILDINGS],
+                     list(range(len(buildings.BUILDINGS))))
+    self.assertEqual([t.id for t in content.BUILDING_CARDS],
+                     list(range(len(content.BUILDING_CARDS))))
+    self.assertIs(registry.BUILDINGS[buildings.IRON.id], buildings.IRON)
+
+  def test_flyweights(self):
+    self.assertIs(
+      buildings.Building('Iron', 'Mine', 5, {board.Point.RESOURCES: 2}, board.Age.ONE),
+      buildings.IRON)
+    self.assertIs(board.BuildingTechnology(buildings.IRON, 5), content.IRON_CARD)
+    self.assertIs(board.Government('Despotism', board.Age.ANCIENT, 4, 2, 3),
+                  board.DESPOTISM)
+
+  def test_different_fields_make_different_objects(self):
+    small = _Thing('thing', 1)
+    large = _Thing('thing', 2)
+    self.assertIsNot(small, large)
+    self.assertNotEqual(small, large)
+    self.assertEqual([t.id for t in _THINGS], list(range(len(_THINGS))))
+
+  def test_existing_objects_are_not_reinitialized(self):
+    thing = _Thing('reused', 1)
+    inits = thing.inits
+    self.assertIs(_Thing('reused', 1), thing)
+    self.assertEqual(thing.inits, inits)
+    self.assertEqual(board.DESPOTISM.civil_actions, 4)
+    self.assertEqual(board.DESPOTISM.urban_buildings, 3)
+
+  def test_zobrist_keys_differ_across_registries(self):
+    self.assertEqual(board.DESPOTISM.id, content.BUILDING_CARDS[0].id)
+    self.assertNotEqual(zobrist.feature_key(board.DESPOTISM),
+                        zobrist.feature_key(content.BUILDING_CARDS[0]))
+
+  def test_pickle_keeps_identity(self):
+    for obj in (buildings.COAL, content.COAL_CARD, board.DESPOTISM):
+      self.assertIs(pickle.loads(pickle.dumps(obj)), obj)
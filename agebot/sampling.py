@@ -0,0 +1,99 @@
+"""Weighted sampling without replacement.
+
+Drawing cards from a deck is weighted sampling without replacement: each kind
+of card is picked with probability proportional to how many copies are left,
+and picking one removes a copy. Rebuilding cumulative weights for every draw
+costs O(n) per card; a Fenwick tree over the counts makes each draw
+O(log n).
+"""
+
+
+class FenwickSampler:
+  """Draws items in proportion to their counts, removing each one drawn.
+
+  The counts are kept in a Fenwick (binary indexed) tree, so finding the item
+  for a random position among the remaining copies and decrementing its count
+  both take O(log n).
+  """
+
+  def __init__(self, counts):
+    """Creates a sampler.
+
+    Args:
+      counts: A mapping from items to non-negative integer counts.
+    """
+    self._items = list(counts)
+    self._counts = [counts[i] for i in self._items]
+    size = len(self._items)
+
+    # Build the tree in O(n): each node passes its partial sum to its parent.
+    tree = [0] + self._counts
+    for i in range(1, size + 1):
+      parent = i + (i & -i)
+      if parent <= size:
+        tree[parent] += tree[i]
+    self._tree = tree
+    self._total = sum(self._counts)
+
+    self._top_bit = 1
+    while self._top_bit * 2 <= size:
+      self._top_bit *= 2
+
+  @property
+  def total(self):
+    """How many copies remain in total."""
+    return self._total
+
+  def __len__(self):
+    return self._total
+
+  def remaining(self):
+    """Returns a dict from each item with copies left to its count."""
+    return {item: c for (item, c) in zip(self._items, self._counts) if c}
+
+  def _find(self, position):
+    """Returns the index of the item holding the copy at this position.
+
+    Positions count copies in item order, starting from 0.
+    """
+    index = 0
+    bit = self._top_bit
+    while bit:
+      next_index = index + bit
+      if next_index < len(self._tree) and self._tree[next_index] <= position:
+        index = next_index
+        position -= self._tree[next_index]
+      bit >>= 1
+    return index
+
+  def _decrement(self, index):
+    self._counts[index] -= 1
+    self._total -= 1
+    i = index + 1
+    while i < len(self._tree):
+      self._tree[i] -= 1
+      i += i & -i
+
+  def draw(self, rng):
+    """Draws one item and removes a copy of it.
+
+    Args:
+      rng: A random.Random, or anything else with a compatible randrange().
+    Raises:
+      IndexError: if nothing is left.
+    """
+    if self._total == 0:
+      raise IndexError('Nothing left to draw')
+    index = self._find(rng.randrange(self._total))
+    self._decrement(index)
+    return self._items[index]
+
+  def draw_many(self, count, rng):
+    """Draws up to count items.
+
+    If fewer than count copies are left, all of them are drawn.
+
+    Returns:
+      A list of the items drawn, in the order they were drawn.
+    """
+    return [self.draw(rng) for _ in range(min(count, self._total))]
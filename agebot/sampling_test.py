@@ -0,0 +1,34 @@
+import random
+import unittest
+from collections import Counter
+from . import sampling
+
+class FenwickSamplerTest(unittest.TestCase):
+
+  def test_draws_every_copy_exactly_once(self):
+    counts = {'a': 3, 'b': 0, 'c': 1, 'd': 5, 'e': 2}
+    sampler = sampling.FenwickSampler(counts)
+    drawn = sampler.draw_many(100, random.Random(1))
+
+    self.assertEqual(Counter(drawn), Counter({k: v for (k, v) in counts.items() if v}))
+    self.assertEqual(sampler.total, 0)
+    self.assertEqual(sampler.remaining(), {})
+    with self.assertRaises(IndexError):
+      sampler.draw(random.Random(1))
+
+  def test_remaining(self):
+    sampler = sampling.FenwickSampler({'a': 2, 'b': 1})
+    card = sampler.draw(random.Random(2))
+    expected = {'a': 2, 'b': 1}
+    expected[card] -= 1
+    self.assertEqual(sampler.remaining(), {k: v for (k, v) in expected.items() if v})
+    self.assertEqual(len(sampler), 2)
+
+  def test_first_draw_is_proportional_to_counts(self):
+    counts = {i: i for i in range(1, 9)}
+    rng = random.Random(3)
+    trials = 36000
+    firsts = Counter(sampling.FenwickSampler(counts).draw(rng) for _ in range(trials))
+    for (item, count) in counts.items():
+      expected = trials * count / 36
+      self.assertLess(abs(firsts[item] - expected), 5 * expected ** 0.5)
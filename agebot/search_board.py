@@ -0,0 +1,396 @@
+"""A mutable board for search, which plays and takes back moves in place.
+
+Board and Tableau are immutable, so every action copies the tableaux, points
+and buildings and builds new objects. That is what callers want almost
+everywhere, but a deep search only ever looks at one line of play at a time
+and pays for a whole new state at every node.
+
+A SearchBoard holds the same state in plain mutable dicts. apply(),
+end_turn() and start_turn() change it in place and push an undo record, and
+undo() pops the most recent one and restores the state before it. The
+transitions are the same as Board's, and from_board() and to_board() convert
+between the two without losing anything, hashes included.
+
+Only the per-player hashes are maintained incrementally; the board's own
+zobrist_hash is combined from them when asked for.
+"""
+
+from collections import namedtuple
+from . import events, zobrist
+from .board import (Board, BuildAction, IllegalActionException, Point, Tableau,
+                    _ACTING_PLAYER_KEY, _CIVIL_ACTIONS_KEY, _ROUND_KEY)
+
+_ACTION = 0
+_END_OF_TURN = 1
+_START_OF_TURN = 2
+
+_POINTS = tuple(Point)
+_POINT_INDEX = {p: i for (i, p) in enumerate(_POINTS)}
+
+_END_OF_TURN_POINTS = tuple(
+  _POINT_INDEX[p]
+  for p in (Point.SCIENCE, Point.CULTURE, Point.FOOD, Point.RESOURCES))
+"""The points gained at the end of a turn, in the order Board gains them.
+
+These are indices into _POINTS, as are all points inside a _Seat.
+"""
+
+
+class _ValueKeys(dict):
+  """Memoizes zobrist.value_key() for one feature, keyed by value.
+
+  Every change to a seat XORs out the key for the old value and XORs in the
+  key for the new one. Mixing those keys is most of the cost of a change, and
+  the same few values come up over and over.
+  """
+
+  __slots__ = ('_key',)
+
+  def __init__(self, key):
+    super().__init__()
+    self._key = key
+
+  def __missing__(self, value):
+    key = zobrist.value_key(self._key, value)
+    self[value] = key
+    return key
+
+# The same keys as board._point_key() and the civil actions keys Tableau uses.
+_POINT_KEYS = tuple(_ValueKeys(zobrist.feature_key(p)) for p in _POINTS)
+_CIVIL_ACTION_KEYS = _ValueKeys(_CIVIL_ACTIONS_KEY)
+
+
+class _ActionEffects(namedtuple('_ActionEffects', [
+    'prices', 'costs', 'civil_cost', 'building', 'building_keys', 'income'])):
+  """What an action checks and changes, worked out once per action.
+
+  Fields:
+    prices: The action's price of each point, in _POINTS order.
+    costs: A tuple of (point index, price) for each nonzero price.
+    civil_cost: The civil actions it takes.
+    building: The Building it builds.
+    building_keys: The _ValueKeys for how many of building there are. They
+      match board._building_key().
+    income: A tuple of (point index, income) for each point the building
+      yields.
+  """
+
+_effects = {}
+
+def _action_effects(action):
+  """Returns an action's _ActionEffects, memoized per action."""
+  effects = _effects.get(action)
+  if effects is None:
+    if not isinstance(action, BuildAction):
+      raise NotImplementedError('Unknown action type {}'.format(action))
+    building = action.building
+    prices = tuple(action.get_price(p) for p in _POINTS)
+    effects = _effects[action] = _ActionEffects(
+      prices,
+      tuple((i, price) for (i, price) in enumerate(prices) if price),
+      action.civil_cost,
+      building,
+      _ValueKeys(zobrist.feature_key(building)),
+      tuple((i, building.getIncome(p)) for (i, p) in enumerate(_POINTS)
+            if building.getIncome(p)))
+  return effects
+
+
+class _Seat:
+  """One player's mutable tableau.
+
+  Points and revenue are lists in _POINTS order rather than dicts keyed by
+  Point, since hashing an Enum member runs Python code.
+  """
+
+  __slots__ = ('government', 'building_technologies', 'known_buildings',
+               'build_actions', 'buildings', 'points', 'civil_actions',
+               'revenue', 'category_counts', 'zobrist', 'player_key')
+
+  def __init__(self, player, tableau):
+    self.government = tableau.government
+    self.building_technologies = tableau.building_technologies
+    self.known_buildings = tableau.known_buildings
+    self.build_actions = tableau._build_actions
+    self.buildings = dict(tableau.buildings)
+    self.points = [tableau.points(p) for p in _POINTS]
+    self.civil_actions = tableau.civil_actions
+    self.revenue = [tableau.revenue(p) for p in _POINTS]
+    self.category_counts = dict(tableau._category_counts)
+    self.zobrist = tableau.zobrist_hash
+    self.player_key = zobrist.feature_key(player)
+
+  def to_tableau(self):
+    return Tableau(
+      self.government,
+      self.buildings,
+      self.building_technologies,
+      points=dict(zip(_POINTS, self.points)),
+      civil_actions=self.civil_actions)
+
+  def is_action_legal(self, action):
+    """The same checks as Tableau.is_action_legal."""
+    effects = _action_effects(action)
+    if self.civil_actions < effects.civil_cost:
+      return False
+    for (price, number) in zip(effects.prices, self.points):
+      if price > number:
+        return False
+
+    building = effects.building
+    if building not in self.known_buildings:
+      return False
+    if (building.urban and
+        self.category_counts.get(building.category, 0) >=
+        self.government.urban_buildings):
+      return False
+    return True
+
+  def set_civil_actions(self, civil_actions):
+    self.zobrist ^= (_CIVIL_ACTION_KEYS[self.civil_actions] ^
+                     _CIVIL_ACTION_KEYS[civil_actions])
+    self.civil_actions = civil_actions
+
+  def add_point(self, index, number):
+    old = self.points[index]
+    self.points[index] = old + number
+    keys = _POINT_KEYS[index]
+    self.zobrist ^= keys[old] ^ keys[old + number]
+
+  def add_building(self, effects, number):
+    building = effects.building
+    keys = effects.building_keys
+    old = self.buildings.get(building, 0)
+    new = old + number
+    if old:
+      self.zobrist ^= keys[old]
+    if new:
+      self.buildings[building] = new
+      self.zobrist ^= keys[new]
+    else:
+      del self.buildings[building]
+
+    for (i, income) in effects.income:
+      self.revenue[i] += number * income
+    count = self.category_counts.get(building.category, 0) + number
+    if count:
+      self.category_counts[building.category] = count
+    else:
+      del self.category_counts[building.category]
+
+
+class SearchBoard:
+  """A Board which changes in place and can undo its changes.
+
+  Moves must be undone in the reverse order they were made.
+  """
+
+  def __init__(self, round_number, turn_order, acting_player, card_row, seats):
+    """Only call this through from_board()."""
+    self._round_number = round_number
+    self._turn_order = turn_order
+    self._acting_player = acting_player
+    self._card_row = card_row
+    self._seats = seats
+    self._turn_order_key = zobrist.feature_key(('turn_order', turn_order))
+    self._undo_stack = []
+
+  @classmethod
+  def from_board(cls, board):
+    """Returns a SearchBoard with the same state as a Board."""
+    return cls(
+      board.round,
+      board.turn_order,
+      board.acting_player,
+      board.card_row,
+      {p: _Seat(p, t) for (p, t) in board.tableaux.items()})
+
+  def to_board(self):
+    """Returns an immutable Board with this board's current state."""
+    return Board(
+      self._round_number,
+      self._turn_order,
+      self._acting_player,
+      self._card_row,
+      {p: s.to_tableau() for (p, s) in self._seats.items()})
+
+  @property
+  def round(self):
+    return self._round_number
+
+  @property
+  def turn_order(self):
+    return self._turn_order
+
+  @property
+  def acting_player(self):
+    return self._acting_player
+
+  @property
+  def card_row(self):
+    return self._card_row
+
+  @property
+  def depth(self):
+    """How many moves there are to undo."""
+    return len(self._undo_stack)
+
+  @property
+  def zobrist_hash(self):
+    """The same hash as to_board().zobrist_hash."""
+    h = (zobrist.value_key(_ROUND_KEY, self._round_number) ^
+         zobrist.value_key(_ACTING_PLAYER_KEY, self._acting_player.value) ^
+         self._turn_order_key ^
+         self._card_row.zobrist_hash)
+    for seat in self._seats.values():
+      h ^= zobrist.combine(seat.player_key, seat.zobrist)
+    return h
+
+  def tableau(self, player):
+    """Returns an immutable copy of a player's tableau."""
+    return self._seats[player].to_tableau()
+
+  def points(self, player, point):
+    return self._seats[player].points[_POINT_INDEX[point]]
+
+  def revenue(self, player, point):
+    return self._seats[player].revenue[_POINT_INDEX[point]]
+
+  def civil_actions(self, player):
+    return self._seats[player].civil_actions
+
+  def num_buildings(self, player, building):
+    return self._seats[player].buildings.get(building, 0)
+
+  def is_action_legal(self, action):
+    """Returns whether the acting player can play an action right now."""
+    return self._seats[self._acting_player].is_action_legal(action)
+
+  def iter_legal_actions(self):
+    """Lazily iterates over legal actions for the acting player.
+
+    The actions come in the same order as Tableau.iter_legal_actions().
+    Don't apply() any of them until the iteration is done.
+    """
+    seat = self._seats[self._acting_player]
+    return filter(seat.is_action_legal, seat.build_actions)
+
+  def legal_actions(self):
+    """Returns legal actions for the acting player."""
+    return frozenset(self.iter_legal_actions())
+
+  def apply(self, action):
+    """Plays an action for the acting player.
+
+    Throws:
+      IllegalActionException if the action can't be played.
+    """
+    seat = self._seats[self._acting_player]
+    if not seat.is_action_legal(action):
+      raise IllegalActionException('Cannot play action: {}'.format(action))
+
+    effects = _action_effects(action)
+    self._undo_stack.append((_ACTION, seat, effects))
+    for (i, price) in effects.costs:
+      seat.add_point(i, -price)
+    seat.set_civil_actions(seat.civil_actions - effects.civil_cost)
+    seat.add_building(effects, 1)
+
+  def end_turn(self, options=None):
+    """Resolves the end of the turn, like Board.resolve_end_of_turn_sequence.
+
+    Args:
+      options: If given, SimulatorOptions whose logger is told what happens.
+    """
+    seat = self._seats[self._acting_player]
+    logger = events.active_logger(options)
+    if logger is not None:
+      logger.log(events.IncomeGained(
+        self._acting_player, tuple(zip(_POINTS, seat.revenue))))
+
+    # Revenue doesn't change during the end of the turn, so this is the same
+    # as scoring science and culture, then gaining food, then resources.
+    gained = tuple((i, seat.revenue[i]) for i in _END_OF_TURN_POINTS)
+    self._undo_stack.append((
+      _END_OF_TURN, seat, gained, seat.civil_actions, self._round_number,
+      self._acting_player))
+    for (i, number) in gained:
+      seat.add_point(i, number)
+    seat.set_civil_actions(seat.government.civil_actions)
+
+    turn_index = self._turn_order.index(self._acting_player)
+    if turn_index == len(self._turn_order) - 1:
+      self._round_number += 1
+      self._acting_player = self._turn_order[0]
+    else:
+      self._acting_player = self._turn_order[turn_index + 1]
+
+  def play_action_phase(self, actions, options=None):
+    """Applies some actions, then ends the turn.
+
+    Each action and the end of the turn are undone separately, so this takes
+    len(actions) + 1 calls to undo().
+    """
+    logger = events.active_logger(options)
+    for a in actions:
+      self.apply(a)
+      if logger is not None:
+        logger.log(events.ActionPlayed(self._acting_player, a))
+    self.end_turn(options)
+
+  def start_turn(self, options):
+    """Resolves the start of a turn, like Board.resolve_start_of_turn.
+
+    Args:
+      options: SimulatorOptions, whose rng draws the new cards.
+    """
+    replenish_results = self._card_row.shift_left().replenish(options)
+    if replenish_results.new_age is not None:
+      logger = events.active_logger(options)
+      if logger is not None:
+        logger.log(events.AgeChanged(replenish_results.new_age))
+    self.apply_replenish(replenish_results)
+
+  def apply_replenish(self, replenish_results):
+    """Finishes the start of a turn with a known replenished card row.
+
+    This is for chance nodes, whose outcomes are already drawn.
+
+    Args:
+      replenish_results: A ReplenishResult or chance.ReplenishOutcome for
+        this board's card row, after shifting it left.
+    """
+    self._undo_stack.append((_START_OF_TURN, self._card_row))
+    self._card_row = replenish_results.card_row
+    # Tableau.antiquate() doesn't do anything yet, so neither does the end of
+    # an age here.
+
+  def undo(self):
+    """Takes back the most recent apply(), end_turn() or start_turn().
+
+    Throws:
+      IndexError if there is nothing to undo.
+    """
+    record = self._undo_stack.pop()
+    kind = record[0]
+    if kind == _ACTION:
+      (_, seat, effects) = record
+      seat.add_building(effects, -1)
+      seat.set_civil_actions(seat.civil_actions + effects.civil_cost)
+      for (i, price) in effects.costs:
+        seat.add_point(i, price)
+    elif kind == _END_OF_TURN:
+      (_, seat, gained, civil_actions, round_number, acting_player) = record
+      seat.set_civil_actions(civil_actions)
+      for (i, number) in gained:
+        seat.add_point(i, -number)
+      self._round_number = round_number
+      self._acting_player = acting_player
+    else:
+      (_, card_row) = record
+      self._card_row = card_row
+
+  def undo_to(self, depth):
+    """Undoes moves until only depth of them are left."""
+    while len(self._undo_stack) > depth:
+      self.undo()
@@ -0,0 +1,123 @@
+import random
+import unittest
+from .board import IllegalActionException, Point
+from . import (board_initializer, chance, events, options, search_board,
+               self_play)
+
+def assert_same(test, search, board):
+  test.assertEqual(search.to_board(), board)
+  test.assertEqual(search.zobrist_hash, board.zobrist_hash)
+  test.assertEqual(
+    list(search.iter_legal_actions()), list(board.iter_legal_actions()))
+
+class ListLogger(events.Logger):
+
+  def __init__(self):
+    self.events = []
+
+  def log(self, event):
+    self.events.append(event)
+
+class SearchBoardTest(unittest.TestCase):
+
+  def test_round_trip(self):
+    board = board_initializer.initialize_board()
+    search = search_board.SearchBoard.from_board(board)
+    assert_same(self, search, board)
+    self.assertEqual(search.to_board().zobrist_hash, board.zobrist_hash)
+
+  def test_matches_board_over_random_games(self):
+    for seed in range(5):
+      rng = random.Random(seed)
+      board = board_initializer.initialize_board()
+      search = search_board.SearchBoard.from_board(board)
+      history = [(search.depth, board)]
+
+      for turn in range(30):
+        sim_options = self_play.turn_options(seed, turn)
+        board = board.resolve_start_of_turn(sim_options)
+        search.start_turn(self_play.turn_options(seed, turn))
+        assert_same(self, search, board)
+        history.append((search.depth, board))
+
+        while rng.random() < 0.8:
+          action = board.sample_legal_action(rng)
+          if action is None:
+            break
+          board = board._play_action(action)
+          search.apply(action)
+          assert_same(self, search, board)
+          history.append((search.depth, board))
+
+        board = board.resolve_end_of_turn_sequence()
+        search.end_turn()
+        assert_same(self, search, board)
+        history.append((search.depth, board))
+
+      for (depth, expected) in reversed(history):
+        search.undo_to(depth)
+        assert_same(self, search, expected)
+      self.assertEqual(search.depth, 0)
+
+  def test_play_action_phase(self):
+    board = board_initializer.initialize_board()
+    board = board.update_tableau(
+      board.acting_player,
+      board.tableau(board.acting_player).add_points({Point.RESOURCES: 4}))
+    search = search_board.SearchBoard.from_board(board)
+    actions = [next(board.iter_legal_actions())] * 2
+
+    search.play_action_phase(actions)
+    assert_same(self, search, board.play_action_phase(actions))
+    self.assertEqual(search.depth, 3)
+
+  def test_play_action_phase_only_logs_played_actions(self):
+    board = board_initializer.initialize_board()
+    search = search_board.SearchBoard.from_board(board)
+    action = board.tableau(board.acting_player)._build_actions[0]
+    played = 0
+    while search.is_action_legal(action):
+      search.apply(action)
+      played += 1
+    search.undo_to(0)
+
+    logger = ListLogger()
+    with self.assertRaises(IllegalActionException):
+      search.play_action_phase(
+        [action] * (played + 1),
+        options.SimulatorOptions(logger, options.ActualRng(random.Random(0))))
+    self.assertEqual(
+      logger.events, [events.ActionPlayed(board.acting_player, action)] * played)
+    self.assertEqual(search.depth, played)
+
+  def test_apply_replenish_matches_chance_outcomes(self):
+    board = board_initializer.initialize_board().resolve_start_of_turn(
+      options.SimulatorOptions(
+        events.NULL_LOGGER, options.ActualRng(random.Random(0))))
+    board = board.resolve_end_of_turn_sequence()
+    search = search_board.SearchBoard.from_board(board)
+    shifted = board.card_row.shift_left()
+    for outcome in chance.replenish_distribution(shifted, top_k=3):
+      search.apply_replenish(outcome)
+      self.assertEqual(search.to_board(), board._after_replenish(outcome))
+      search.undo()
+      assert_same(self, search, board)
+
+  def test_illegal_action(self):
+    board = board_initializer.initialize_board()
+    search = search_board.SearchBoard.from_board(board)
+    action = board.tableau(board.acting_player)._build_actions[0]
+    for _ in range(10):
+      if not search.is_action_legal(action):
+        break
+      search.apply(action)
+    with self.assertRaises(IllegalActionException):
+      search.apply(action)
+
+  def test_conversion_does_not_share_state(self):
+    board = board_initializer.initialize_board()
+    search = search_board.SearchBoard.from_board(board)
+    tableau = search.tableau(board.acting_player)
+    search.end_turn()
+    self.assertEqual(tableau, board.tableau(board.acting_player))
+    self.assertEqual(search.to_board(), board.resolve_end_of_turn_sequence())
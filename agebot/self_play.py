@@ -0,0 +1,147 @@
+"""Plays many games between bots, spread across processes.
+
+Each game runs entirely inside one worker process, from initialize_board() to
+the last round. Only a small GameResult comes back to the parent, so the cost
+of a batch is dominated by the games themselves rather than by pickling.
+"""
+
+import concurrent.futures
+import os
+from collections import namedtuple
+from . import board_initializer, bots, events, options, startup, streams
+from .board import Point
+
+DEFAULT_MAX_ROUNDS = 20
+"""How many rounds a game lasts unless told otherwise."""
+
+
+class GameResult(namedtuple('GameResult', ['seed', 'points', 'rounds', 'actions'])):
+  """The outcome of one game.
+
+  Fields:
+    seed: The seed the game was played with. Replaying with the same seed and
+      bots gives the same game.
+    points: A tuple with one entry per player in turn order, each a tuple of
+      that player's final points in Point order.
+    rounds: How many rounds were played.
+    actions: How many actions were played in total.
+  """
+
+  def final_points(self, seat, point):
+    """Returns a player's final points of one type."""
+    return self.points[seat][list(Point).index(point)]
+
+
+def turn_options(seed, turn, logger=events.NULL_LOGGER):
+  """Returns the SimulatorOptions for the start of one turn of a game.
+
+  Each turn draws from its own stream, split from the game's seed, so any
+  turn can be replayed without replaying the ones before it.
+
+  Args:
+    seed: The game's root seed.
+    turn: The index of the turn in the game, starting at 0.
+    logger: The events.Logger to report the game to.
+  """
+  return options.SimulatorOptions(
+    logger,
+    options.ActualRng(streams.CounterRandom(seed, ('decks', turn))))
+
+
+def play_game(seed, bot_factory=bots.RandomBot, max_rounds=DEFAULT_MAX_ROUNDS,
+              turns=None, logger=events.NULL_LOGGER, bot_factories=None):
+  """Plays a game from the initial board.
+
+  Args:
+    seed: The root seed. The civil decks and each bot get their own stream
+      split from it.
+    bot_factory: Called with a seed to create the bot for each player.
+    max_rounds: The game ends after this many rounds.
+    turns: If given, a list to which a tuple of the actions played is
+      appended for every turn.
+    logger: An events.Logger to report the game to.
+    bot_factories: If given, a mapping from each Player to the factory for
+      their bot, used instead of bot_factory.
+  Returns:
+    A GameResult.
+  """
+  root = streams.CounterRandom(seed)
+  game_board = board_initializer.initialize_board()
+  if bot_factories is None:
+    bot_factories = {p: bot_factory for p in game_board.turn_order}
+  players = {p: bot_factories[p](root.split('bot', p.value).getrandbits(64))
+             for p in game_board.turn_order}
+
+  action_count = 0
+  turn = 0
+  while game_board.round <= max_rounds:
+    sim_options = turn_options(seed, turn, logger)
+    game_board = game_board.resolve_start_of_turn(sim_options)
+    actions = players[game_board.acting_player].choose_actions(
+      game_board, sim_options)
+    action_count += len(actions)
+    if turns is not None:
+      turns.append(tuple(actions))
+    game_board = game_board.play_action_phase(actions, sim_options)
+    turn += 1
+
+  return GameResult(
+    seed,
+    tuple(tuple(game_board.tableau(p).points(point) for point in Point)
+          for p in game_board.turn_order),
+    game_board.round - 1,
+    action_count)
+
+
+def _play_games(seeds, bot_factory, max_rounds):
+  return [play_game(s, bot_factory, max_rounds) for s in seeds]
+
+
+def run_games(num_games, base_seed=0, bot_factory=bots.RandomBot,
+              max_rounds=DEFAULT_MAX_ROUNDS, workers=None, games_per_task=None):
+  """Plays a batch of games in a process pool.
+
+  Game i is played with seed base_seed + i, so a batch is reproducible no
+  matter how many workers run it.
+
+  With more than one worker, this calls startup.preload(freeze=True) first,
+  so objects alive in this process are never collected afterwards. Call it
+  from a process which mostly just runs batches.
+
+  Args:
+    num_games: How many games to play.
+    base_seed: The seed of the first game.
+    bot_factory: Called with a seed to create each bot. This must be
+      picklable, such as a class defined at module level.
+    max_rounds: How many rounds each game lasts.
+    workers: How many processes to use. Defaults to the number of CPUs. If 1,
+      games are played in this process.
+    games_per_task: How many games to send to a worker at a time. Defaults to
+      enough for each worker to get a few tasks, which keeps the workers busy
+      without paying for a round trip per game.
+  Returns:
+    A list of GameResults, in seed order.
+  """
+  seeds = list(range(base_seed, base_seed + num_games))
+  if workers is None:
+    workers = os.cpu_count() or 1
+  if workers == 1:
+    return _play_games(seeds, bot_factory, max_rounds)
+
+  if games_per_task is None:
+    games_per_task = max(1, -(-num_games // (workers * 4)))
+  chunks = [seeds[i:i + games_per_task]
+            for i in range(0, num_games, games_per_task)]
+
+  # Build the shared starting state once, and freeze it so that forked
+  # workers keep sharing it instead of copying it on their first collection.
+  startup.preload(freeze=True)
+  results = []
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+    for chunk_results in executor.map(
+        _play_games,
+        chunks,
+        [bot_factory] * len(chunks),
+        [max_rounds] * len(chunks)):
+      results.extend(chunk_results)
+  return results
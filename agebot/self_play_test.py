@@ -0,0 +1,23 @@
+import unittest
+from .board import Point
+from . import self_play
+
+class SelfPlayTest(unittest.TestCase):
+
+  def test_play_game(self):
+    result = self_play.play_game(5, max_rounds=6)
+    self.assertEqual(result.seed, 5)
+    self.assertEqual(result.rounds, 6)
+    self.assertEqual(len(result.points), 2)
+    self.assertGreaterEqual(result.actions, 0)
+    self.assertGreater(result.final_points(0, Point.SCIENCE), 0)
+
+  def test_games_are_reproducible(self):
+    self.assertEqual(self_play.play_game(9, max_rounds=5),
+                     self_play.play_game(9, max_rounds=5))
+
+  def test_run_games_in_pool_matches_serial(self):
+    serial = self_play.run_games(6, base_seed=100, max_rounds=4, workers=1)
+    pooled = self_play.run_games(6, base_seed=100, max_rounds=4, workers=2)
+    self.assertEqual(serial, pooled)
+    self.assertEqual([r.seed for r in pooled], list(range(100, 106)))
@@ -0,0 +1,80 @@
+"""Keeps the cost of starting a worker process down.
+
+Content objects are created once, at import time, and everything derived
+from them which doesn't depend on a game, such as the starting civil decks
+for each player count, is built lazily and cached. preload() builds all of
+it in the parent process before a pool forks its workers, so that the
+workers share those pages copy-on-write instead of each building and
+holding their own copy.
+
+IMPORT_BUDGET_SECONDS is what a fresh worker may spend importing the engine;
+measure_import_time() checks it from a new interpreter.
+"""
+
+import gc
+import multiprocessing
+import os
+import subprocess
+import sys
+from . import board_initializer, encoding
+from .board import Age
+
+PLAYER_COUNTS = (2, 3, 4)
+"""The player counts the game supports."""
+
+IMPORT_BUDGET_SECONDS = 0.25
+"""How long importing the engine in a new process should take at most."""
+
+_preloaded = set()
+_frozen = False
+
+
+def preload(player_counts=PLAYER_COUNTS, freeze=False):
+  """Builds the cached starting state for each player count.
+
+  Call this in a parent process before forking workers.
+
+  Args:
+    player_counts: The player counts to build tables for.
+    freeze: Whether to move every object alive now into the garbage
+      collector's permanent generation. Collections in forked children then
+      never touch those objects, so their pages stay shared. Nothing frozen
+      is ever collected, even once it becomes garbage, so only ask for this
+      in a short-lived parent that mostly just forks workers. It happens at
+      most once per process, and only if workers are forked.
+  """
+  for player_count in player_counts:
+    if player_count in _preloaded:
+      continue
+    for age in Age:
+      board_initializer.initial_civil_deck(age, player_count)
+    board_initializer.initial_civil_decks(player_count)
+    board_initializer.initial_card_row(player_count)
+    encoding.layout(player_count)
+    _preloaded.add(player_count)
+  global _frozen
+  if (freeze and not _frozen and
+      multiprocessing.get_context().get_start_method() == 'fork'):
+    gc.freeze()
+    _frozen = True
+
+def measure_import_time(module='agebot.self_play'):
+  """Returns how many seconds a new interpreter takes to import a module.
+
+  This only counts the import itself, not starting the interpreter.
+  """
+  code = ('import time\n'
+          't = time.perf_counter()\n'
+          'import {}\n'
+          'print(time.perf_counter() - t)\n').format(module)
+  output = subprocess.run(
+    [sys.executable, '-c', code],
+    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    check=True,
+    capture_output=True,
+    text=True).stdout
+  return float(output.strip().splitlines()[-1])
+
+def within_import_budget(module='agebot.self_play'):
+  """Whether importing a module takes at most IMPORT_BUDGET_SECONDS."""
+  return measure_import_time(module) <= IMPORT_BUDGET_SECONDS
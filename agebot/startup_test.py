@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import unittest
+from . import board_initializer, startup
+
+class StartupTest(unittest.TestCase):
+
+  def test_preload(self):
+    startup.preload()
+    hits = board_initializer.initial_civil_decks.cache_info().hits
+    for player_count in startup.PLAYER_COUNTS:
+      board_initializer.initial_card_row(player_count)
+      board_initializer.initial_civil_decks(player_count)
+    self.assertEqual(
+      board_initializer.initial_civil_decks.cache_info().hits,
+      hits + len(startup.PLAYER_COUNTS))
+
+  def test_measure_import_time(self):
+    seconds = startup.measure_import_time('agebot.board')
+    self.assertGreater(seconds, 0)
+
+  def test_within_import_budget(self):
+    self.assertTrue(startup.within_import_budget())
+
+  def test_preload_freezes_at_most_once(self):
+    # Freezing can't be undone, so check it in a fresh interpreter.
+    code = ('import gc, multiprocessing\n'
+            'multiprocessing.set_start_method("fork")\n'
+            'from agebot import startup\n'
+            'startup.preload(freeze=True)\n'
+            'frozen = gc.get_freeze_count()\n'
+            'garbage = [[] for _ in range(1000)]\n'
+            'startup.preload(freeze=True)\n'
+            'print(frozen > 0, gc.get_freeze_count() == frozen)\n')
+    output = subprocess.run(
+      [sys.executable, '-c', code],
+      cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+      check=True,
+      capture_output=True,
+      text=True).stdout
+    self.assertEqual(output.split(), ['True', 'True'])
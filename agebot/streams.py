@@ -0,0 +1,121 @@
+"""Splittable, counter-based random number streams.
+
+A single random.Random shared between games or workers makes results depend
+on who draws first. A CounterRandom is instead identified by a root seed and a
+path, such as (seed, 'game', 17, 'decks'). Its n-th output is a pure function
+of that identity and n, so every game, rollout or search thread can get its
+own independent stream by splitting, and experiments reproduce bit for bit no
+matter how the work is scheduled.
+
+Outputs are generated a block at a time with NumPy and served from a buffer.
+"""
+
+import hashlib
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def _derive_key(seed, path):
+  """Hashes a seed and path into a 64-bit stream key."""
+  digest = hashlib.blake2b(repr((seed,) + path).encode('utf-8'), digest_size=8)
+  return int.from_bytes(digest.digest(), 'little')
+
+def _generate(key, start, count):
+  """Returns outputs start..start+count-1 of the stream with this key.
+
+  Output n is the SplitMix64 finalizer applied to key + (n + 1) * golden.
+  """
+  x = np.arange(start + 1, start + count + 1, dtype=np.uint64)
+  x *= _GOLDEN
+  x += np.uint64(key)
+  x ^= x >> np.uint64(30)
+  x *= _M1
+  x ^= x >> np.uint64(27)
+  x *= _M2
+  x ^= x >> np.uint64(31)
+  return x
+
+
+class CounterRandom:
+  """A reproducible stream of random numbers, identified by a seed and a path.
+
+  This supports the parts of the random.Random interface the engine uses
+  (random, randrange and getrandbits), so it can back an ActualRng.
+  """
+
+  BUFFER_SIZE = 512
+  """How many 64-bit outputs are generated at a time."""
+
+  def __init__(self, seed, path=()):
+    """Creates a stream.
+
+    Args:
+      seed: The root seed, an int.
+      path: A tuple of ints and strings naming this stream below the root.
+    """
+    self._seed = seed
+    self._path = tuple(path)
+    self._key = _derive_key(seed, self._path)
+    self._generated = 0
+    self._buffer = []
+    self._position = 0
+
+  @property
+  def seed(self):
+    return self._seed
+
+  @property
+  def path(self):
+    return self._path
+
+  def split(self, *path):
+    """Returns an independent child stream.
+
+    The child depends only on this stream's seed and path and the path given
+    here, not on how much of this stream has been used.
+    """
+    return CounterRandom(self._seed, self._path + path)
+
+  def _next64(self):
+    if self._position == len(self._buffer):
+      self._buffer = _generate(
+        self._key, self._generated, self.BUFFER_SIZE).tolist()
+      self._generated += self.BUFFER_SIZE
+      self._position = 0
+    value = self._buffer[self._position]
+    self._position += 1
+    return value
+
+  def getrandbits(self, k):
+    """Returns an int with k random bits, for k up to 64."""
+    if not 0 <= k <= 64:
+      raise ValueError('Can only generate up to 64 bits at once, not {}'.format(k))
+    return self._next64() >> (64 - k)
+
+  def random(self):
+    """Returns a float in [0, 1)."""
+    return (self._next64() >> 11) * (1.0 / (1 << 53))
+
+  def randrange(self, start, stop=None):
+    """Returns a uniformly random int in range(start, stop).
+
+    Like random.Random.randrange, randrange(n) means randrange(0, n).
+    """
+    if stop is None:
+      (start, stop) = (0, start)
+    width = stop - start
+    if width <= 0:
+      raise ValueError('Empty range for randrange({}, {})'.format(start, stop))
+    if width > 1 << 64:
+      raise ValueError('Range too large: {}'.format(width))
+
+    # Lemire's method: multiply and keep the high bits, rejecting the few
+    # values which would make some results more likely than others.
+    threshold = ((1 << 64) - width) % width
+    while True:
+      product = self._next64() * width
+      if (product & ((1 << 64) - 1)) >= threshold:
+        return start + (product >> 64)
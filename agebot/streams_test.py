@@ -0,0 +1,49 @@
+import unittest
+from collections import Counter
+from . import immutable, options, streams
+
+class CounterRandomTest(unittest.TestCase):
+
+  def test_same_identity_same_stream(self):
+    a = streams.CounterRandom(42, ('game', 3))
+    b = streams.CounterRandom(42).split('game', 3)
+    self.assertEqual([a.getrandbits(64) for _ in range(1000)],
+                     [b.getrandbits(64) for _ in range(1000)])
+
+  def test_different_paths_differ(self):
+    root = streams.CounterRandom(42)
+    self.assertNotEqual(
+      [root.split('game', 1).getrandbits(64) for _ in range(4)],
+      [root.split('game', 2).getrandbits(64) for _ in range(4)])
+    self.assertNotEqual(
+      streams.CounterRandom(1).getrandbits(64),
+      streams.CounterRandom(2).getrandbits(64))
+
+  def test_split_ignores_parent_position(self):
+    parent = streams.CounterRandom(7)
+    before = parent.split('child').random()
+    for _ in range(2000):
+      parent.random()
+    self.assertEqual(parent.split('child').random(), before)
+
+  def test_randrange(self):
+    rng = streams.CounterRandom(5)
+    counts = Counter(rng.randrange(6) for _ in range(6000))
+    self.assertEqual(set(counts), set(range(6)))
+    for c in counts.values():
+      self.assertLess(abs(c - 1000), 150)
+    self.assertTrue(all(3 <= rng.randrange(3, 5) < 5 for _ in range(100)))
+    with self.assertRaises(ValueError):
+      rng.randrange(0)
+
+  def test_random_range(self):
+    rng = streams.CounterRandom(5)
+    values = [rng.random() for _ in range(2000)]
+    self.assertTrue(all(0.0 <= v < 1.0 for v in values))
+    self.assertLess(abs(sum(values) / len(values) - 0.5), 0.05)
+
+  def test_backs_actual_rng(self):
+    deck = immutable.frozenbag({'a': 3, 'b': 2, 'c': 4})
+    first = options.ActualRng(streams.CounterRandom(9)).split('draw', 1)
+    second = options.ActualRng(streams.CounterRandom(9)).split('draw', 1)
+    self.assertEqual(first.pick_cards(5, deck), second.pick_cards(5, deck))
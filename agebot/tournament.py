@@ -0,0 +1,544 @@
+"""Tournaments between bots, with ratings and early stopping.
+
+Games are played by worker processes. The parent sends each worker small
+task tuples over a queue, and each worker streams results back over its own
+pipe as fixed-size packed records, so the parent can update ratings and
+decide whether to stop while games are still being played.
+
+Ratings are fitted with the Bradley-Terry model, which is what Elo ratings
+estimate: the chance that a beats b is 1 / (1 + 10 ** ((Rb - Ra) / 400)).
+Head-to-head matches can stop early with a sequential probability ratio
+test (SPRT) once the results clearly favour one hypothesis about the Elo
+difference.
+
+A game is won by whoever has more culture when it ends; equal culture is a
+draw. Seats alternate between games so neither bot always moves first, and
+head-to-head matches replay each seed with the seats swapped.
+"""
+
+import math
+import multiprocessing
+import multiprocessing.connection
+import struct
+from collections import namedtuple
+from . import self_play
+from .board import Player, Point
+
+_RESULT = struct.Struct('<IB')
+"""A game result on the wire: game index, and twice the first bot's score."""
+
+_CULTURE = list(Point).index(Point.CULTURE)
+
+MAX_PAIRING_STEPS = 20000
+"""How many pairs a Swiss round tries per rematch limit before allowing more."""
+
+_ELO_PER_NATURAL_UNIT = 400.0 / math.log(10.0)
+
+
+class Pairing(namedtuple('Pairing', ['index', 'first', 'second', 'seed'])):
+  """One scheduled game.
+
+  Fields:
+    index: The game's position in the schedule.
+    first: The name of the bot in the first seat.
+    second: The name of the bot in the second seat.
+    seed: The game's seed.
+  """
+
+
+def game_score(result):
+  """Returns the first seat's score in a GameResult: 1, 0.5 or 0."""
+  first = result.points[0][_CULTURE]
+  second = result.points[1][_CULTURE]
+  if first > second:
+    return 1.0
+  if first < second:
+    return 0.0
+  return 0.5
+
+def play_pairing(pairing, factories, max_rounds=self_play.DEFAULT_MAX_ROUNDS):
+  """Plays one scheduled game and returns the first seat's score.
+
+  Args:
+    pairing: A Pairing.
+    factories: A mapping from bot names to bot factories.
+    max_rounds: How many rounds the game lasts.
+  """
+  result = self_play.play_game(
+    pairing.seed,
+    max_rounds=max_rounds,
+    bot_factories={Player.ONE: factories[pairing.first],
+                   Player.TWO: factories[pairing.second]})
+  return game_score(result)
+
+
+def round_robin(names, games_per_pair, base_seed=0):
+  """Schedules every bot against every other.
+
+  Each pair plays games_per_pair games, alternating seats. Games are
+  interleaved across pairs, so stopping partway leaves a balanced sample.
+
+  Returns:
+    A list of Pairings.
+  """
+  pairs = [(a, b) for (i, a) in enumerate(names) for b in names[i + 1:]]
+  schedule = []
+  for game in range(games_per_pair):
+    for (a, b) in pairs:
+      (first, second) = (a, b) if game % 2 == 0 else (b, a)
+      index = len(schedule)
+      schedule.append(Pairing(index, first, second, base_seed + index))
+  return schedule
+
+def swiss_round(ratings, names, round_number, base_seed=0, byes=None):
+  """Schedules one round of a Swiss tournament.
+
+  Bots are sorted by rating and paired with their nearest neighbours that
+  they haven't played yet, so each game is between bots of similar
+  strength. A rematch is only scheduled if no way to pair everyone without
+  one is found within MAX_PAIRING_STEPS tries. With an odd number of bots, one sits the round out: the
+  lowest rated of those with the fewest byes so far, so nobody gets a second
+  bye before everyone has had one.
+
+  Args:
+    ratings: The Ratings so far. Bots which have played each other in it
+      count as having met.
+    names: The bots taking part.
+    round_number: Which round this is, starting at 0. Used for seeds, game
+      indices and seat colours.
+    byes: A mapping from bot names to how many byes they have had. Missing
+      bots have had none.
+  Returns:
+    A list of Pairings.
+  """
+  ranked = sorted(names, key=ratings.elo, reverse=True)
+  if len(ranked) % 2:
+    byes = byes or {}
+    fewest = min(byes.get(n, 0) for n in ranked)
+    bye = [n for n in ranked if byes.get(n, 0) == fewest][-1]
+    ranked.remove(bye)
+
+  schedule = []
+  for (i, (first, second)) in enumerate(_pair_up(ratings, ranked)):
+    if round_number % 2:
+      (first, second) = (second, first)
+    index = round_number * len(names) + i
+    schedule.append(Pairing(index, first, second, base_seed + index))
+  return schedule
+
+def _pair_up(ratings, ranked):
+  """Pairs off ranked bots with as few rematches as possible.
+
+  Allows at most 0, then 1, ... previous meetings per pair, and at each limit
+  searches depth first for a pairing, trying the nearest-ranked opponent
+  first. Sets of bots which couldn't be paired are remembered, and a limit
+  is given up on after MAX_PAIRING_STEPS tries, so scheduling stays fast
+  even when no pairing within the limit exists. Giving up early can only
+  allow a rematch which a longer search would have avoided.
+  """
+  n = len(ranked)
+  games = [[ratings.games_between(a, b) for b in ranked] for a in ranked]
+
+  def search(remaining, limit, failed, steps):
+    # remaining is a bitmask of indices into ranked.
+    if not remaining:
+      return []
+    if remaining in failed:
+      return None
+    first = (remaining & -remaining).bit_length() - 1
+    rest = remaining & ~(1 << first)
+    for second in range(first + 1, n):
+      if not rest >> second & 1 or games[first][second] > limit:
+        continue
+      if steps[0] >= MAX_PAIRING_STEPS:
+        return None
+      steps[0] += 1
+      pairs = search(rest & ~(1 << second), limit, failed, steps)
+      if pairs is not None:
+        return [(ranked[first], ranked[second])] + pairs
+    failed.add(remaining)
+    return None
+
+  limit = 0
+  while True:
+    pairs = search((1 << n) - 1, limit, set(), [0])
+    if pairs is not None:
+      return pairs
+    limit += 1
+
+
+class Ratings:
+  """Bradley-Terry ratings, refitted incrementally as results arrive.
+
+  Results are kept as total scores per ordered pair. After each result a
+  few minorization-maximization steps are run from the previous fit, which
+  is enough to track the maximum-likelihood ratings closely as results
+  stream in. Ratings are in Elo, centred on an average of 0.
+  """
+
+  def __init__(self, names, iterations_per_update=3):
+    self._names = list(names)
+    self._index = {n: i for (i, n) in enumerate(self._names)}
+    n = len(self._names)
+    # _scores[i][j] is i's total score against j, _games[i][j] the number
+    # of games between them.
+    self._scores = [[0.0] * n for _ in range(n)]
+    self._games = [[0] * n for _ in range(n)]
+    self._strength = [1.0] * n
+    self._iterations = iterations_per_update
+
+  @property
+  def names(self):
+    return tuple(self._names)
+
+  def add(self, first, second, score):
+    """Records a game in which first scored score against second."""
+    (i, j) = (self._index[first], self._index[second])
+    self._scores[i][j] += score
+    self._scores[j][i] += 1.0 - score
+    self._games[i][j] += 1
+    self._games[j][i] += 1
+    self.fit(self._iterations)
+
+  def games(self, name):
+    """How many games a bot has played."""
+    return sum(self._games[self._index[name]])
+
+  def games_between(self, first, second):
+    """How many games two bots have played against each other."""
+    return self._games[self._index[first]][self._index[second]]
+
+  def fit(self, iterations=100):
+    """Runs more steps of the fit."""
+    n = len(self._names)
+    # A virtual draw against every other bot keeps ratings finite for bots
+    # which have won or lost every game.
+    prior = 0.5
+    for _ in range(iterations):
+      for i in range(n):
+        wins = prior * (n - 1)
+        denominator = 0.0
+        for j in range(n):
+          if i == j:
+            continue
+          wins += self._scores[i][j]
+          games = self._games[i][j] + 2 * prior
+          denominator += games / (self._strength[i] + self._strength[j])
+        if denominator > 0:
+          self._strength[i] = wins / denominator
+      mean_log = sum(math.log(s) for s in self._strength) / n
+      self._strength = [s / math.exp(mean_log) for s in self._strength]
+
+  def elo(self, name):
+    """A bot's rating."""
+    return _ELO_PER_NATURAL_UNIT * math.log(self._strength[self._index[name]])
+
+  def interval(self, name, z=1.96):
+    """Returns (low, high) Elo bounds for a bot, from the Fisher information.
+
+    Args:
+      z: The normal quantile of the interval; 1.96 for 95%.
+    """
+    i = self._index[name]
+    information = 0.0
+    for j in range(len(self._names)):
+      if i != j and self._games[i][j]:
+        p = self._strength[i] / (self._strength[i] + self._strength[j])
+        information += self._games[i][j] * p * (1.0 - p)
+    rating = self.elo(name)
+    if information == 0:
+      return (-math.inf, math.inf)
+    margin = z * _ELO_PER_NATURAL_UNIT / math.sqrt(information)
+    return (rating - margin, rating + margin)
+
+  def table(self):
+    """Returns (name, elo, low, high, games) rows, best first."""
+    rows = [(n, self.elo(n)) + self.interval(n) + (self.games(n),)
+            for n in self._names]
+    return sorted(rows, key=lambda r: r[1], reverse=True)
+
+
+def _expected_score(elo):
+  return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+class Sprt:
+  """A sequential probability ratio test on the Elo difference of two bots.
+
+  H0 is that the candidate is elo0 stronger than the baseline, H1 that it
+  is elo1 stronger. The log-likelihood ratio uses the normal approximation
+  to the game score distribution, which handles draws.
+  """
+
+  H0 = 'H0'
+  H1 = 'H1'
+
+  def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+    """Creates a test.
+
+    Args:
+      elo0: The Elo difference under H0.
+      elo1: The Elo difference under H1.
+      alpha: The chance of accepting H1 when H0 holds.
+      beta: The chance of accepting H0 when H1 holds.
+    """
+    self._s0 = _expected_score(elo0)
+    self._s1 = _expected_score(elo1)
+    self._lower = math.log(beta / (1.0 - alpha))
+    self._upper = math.log((1.0 - beta) / alpha)
+    self._wins = 0
+    self._draws = 0
+    self._losses = 0
+
+  @property
+  def bounds(self):
+    return (self._lower, self._upper)
+
+  @property
+  def games(self):
+    return self._wins + self._draws + self._losses
+
+  def add(self, score):
+    """Records one of the candidate's results: 1, 0.5 or 0."""
+    if score == 1.0:
+      self._wins += 1
+    elif score == 0.0:
+      self._losses += 1
+    else:
+      self._draws += 1
+
+  def llr(self):
+    """The log-likelihood ratio of H1 over H0 so far."""
+    n = self.games
+    if n == 0:
+      return 0.0
+    score = (self._wins + 0.5 * self._draws) / n
+    variance = (self._wins * (1.0 - score) ** 2 +
+                self._draws * (0.5 - score) ** 2 +
+                self._losses * score ** 2) / n
+    if variance == 0:
+      # Identical results so far: nudge towards the side they fall on.
+      variance = 1.0 / (4.0 * n)
+    return (n * (self._s1 - self._s0) * (2.0 * score - self._s0 - self._s1) /
+            (2.0 * variance))
+
+  def verdict(self):
+    """Returns H0 or H1 once one is accepted, else None."""
+    llr = self.llr()
+    if llr <= self._lower:
+      return self.H0
+    if llr >= self._upper:
+      return self.H1
+    return None
+
+
+def _worker(factories, max_rounds, tasks, connection):
+  while True:
+    task = tasks.get()
+    if task is None:
+      break
+    pairing = Pairing(*task)
+    score = play_pairing(pairing, factories, max_rounds)
+    connection.send_bytes(_RESULT.pack(pairing.index, int(2 * score)))
+  connection.close()
+
+
+class _WorkerPool:
+  """Worker processes which play Pairings and stream back scores."""
+
+  def __init__(self, factories, max_rounds, workers):
+    self._tasks = multiprocessing.Queue()
+    self._processes = []
+    self._connections = []
+    for _ in range(workers):
+      (receiver, sender) = multiprocessing.Pipe(duplex=False)
+      process = multiprocessing.Process(
+        target=_worker, args=(factories, max_rounds, self._tasks, sender),
+        daemon=True)
+      process.start()
+      sender.close()
+      self._processes.append(process)
+      self._connections.append(receiver)
+
+  def submit(self, pairing):
+    self._tasks.put(tuple(pairing))
+
+  def results(self):
+    """Yields (index, score) for each game as it finishes."""
+    while True:
+      for connection in multiprocessing.connection.wait(self._connections):
+        (index, doubled) = _RESULT.unpack(connection.recv_bytes())
+        yield (index, doubled / 2.0)
+
+  def close(self, wait=True):
+    """Stops the workers, waiting for queued games only if wait is set."""
+    if wait:
+      for _ in self._processes:
+        self._tasks.put(None)
+      for process in self._processes:
+        process.join()
+    else:
+      for process in self._processes:
+        process.terminate()
+        process.join()
+    for connection in self._connections:
+      connection.close()
+    self._tasks.close()
+
+
+def _play_schedule(schedule, factories, max_rounds, workers):
+  """Yields (pairing, score) as the games of a schedule finish."""
+  if workers == 1:
+    for pairing in schedule:
+      yield (pairing, play_pairing(pairing, factories, max_rounds))
+    return
+
+  pool = _WorkerPool(factories, max_rounds, workers)
+  finished = False
+  try:
+    by_index = {}
+    for pairing in schedule:
+      by_index[pairing.index] = pairing
+      pool.submit(pairing)
+    results = pool.results()
+    for _ in schedule:
+      (index, score) = next(results)
+      yield (by_index[index], score)
+    finished = True
+  finally:
+    pool.close(wait=finished)
+
+
+def run_round_robin(factories, games_per_pair, base_seed=0, workers=None,
+                    max_rounds=self_play.DEFAULT_MAX_ROUNDS):
+  """Plays a round-robin tournament.
+
+  Args:
+    factories: A mapping from bot names to picklable bot factories.
+    games_per_pair: How many games each pair of bots plays.
+    base_seed: The seed of the first game.
+    workers: How many processes to use. Defaults to the number of CPUs. If
+      1, games are played in this process.
+    max_rounds: How many rounds each game lasts.
+  Returns:
+    The final Ratings.
+  """
+  names = list(factories)
+  ratings = Ratings(names)
+  schedule = round_robin(names, games_per_pair, base_seed)
+  for (pairing, score) in _play_schedule(
+      schedule, factories, max_rounds, _worker_count(workers)):
+    ratings.add(pairing.first, pairing.second, score)
+  ratings.fit()
+  return ratings
+
+def run_swiss(factories, rounds, base_seed=0, workers=None,
+              max_rounds=self_play.DEFAULT_MAX_ROUNDS):
+  """Plays a Swiss tournament, pairing bots by their ratings each round.
+
+  Returns:
+    The final Ratings.
+  """
+  names = list(factories)
+  ratings = Ratings(names)
+  workers = _worker_count(workers)
+  byes = dict.fromkeys(names, 0)
+  for round_number in range(rounds):
+    schedule = swiss_round(ratings, names, round_number, base_seed, byes)
+    playing = {n for p in schedule for n in (p.first, p.second)}
+    for name in names:
+      if name not in playing:
+        byes[name] += 1
+    for (pairing, score) in _play_schedule(
+        schedule, factories, max_rounds, workers):
+      ratings.add(pairing.first, pairing.second, score)
+  ratings.fit()
+  return ratings
+
+
+class MatchVerdict(namedtuple('MatchVerdict', ['verdict', 'games', 'llr', 'score'])):
+  """The outcome of run_sprt_match().
+
+  Fields:
+    verdict: Sprt.H0, Sprt.H1, or None if max_games ran out first.
+    games: How many games were played.
+    llr: The final log-likelihood ratio.
+    score: The candidate's mean score.
+  """
+
+
+def run_sprt_match(candidate, baseline, sprt=None, max_games=10000,
+                   base_seed=0, workers=None, in_flight=None,
+                   max_rounds=self_play.DEFAULT_MAX_ROUNDS):
+  """Plays a candidate bot against a baseline until an SPRT decides.
+
+  Games are played in pairs with the same seed and the seats swapped, so the
+  luck of the deal mostly cancels out: game i has seed base_seed + i // 2,
+  and the candidate takes the first seat in even games. The test is checked
+  after every result, and games still being played are abandoned as soon as
+  it reaches a verdict.
+
+  Args:
+    candidate: A picklable factory for the candidate bot.
+    baseline: A picklable factory for the baseline bot.
+    sprt: An Sprt. Defaults to Sprt().
+    max_games: Stop after this many games even without a verdict.
+    base_seed: The seed of the first game.
+    workers: How many processes to use. Defaults to the number of CPUs. If
+      1, games are played in this process.
+    in_flight: How many games to keep queued for the workers. Defaults to a
+      few per worker.
+    max_rounds: How many rounds each game lasts.
+  Returns:
+    A MatchVerdict.
+  """
+  if sprt is None:
+    sprt = Sprt()
+  workers = _worker_count(workers)
+  if in_flight is None:
+    in_flight = 4 * workers
+  factories = {'candidate': candidate, 'baseline': baseline}
+
+  def pairing(index):
+    seed = base_seed + index // 2
+    if index % 2 == 0:
+      return Pairing(index, 'candidate', 'baseline', seed)
+    return Pairing(index, 'baseline', 'candidate', seed)
+
+  total_score = 0.0
+  def record(index, score):
+    nonlocal total_score
+    if index % 2:
+      score = 1.0 - score
+    sprt.add(score)
+    total_score += score
+    return sprt.verdict() is not None or sprt.games >= max_games
+
+  if workers == 1:
+    for index in range(max_games):
+      if record(index, play_pairing(pairing(index), factories, max_rounds)):
+        break
+  elif max_games > 0:
+    pool = _WorkerPool(factories, max_rounds, workers)
+    try:
+      submitted = 0
+      while submitted < min(in_flight, max_games):
+        pool.submit(pairing(submitted))
+        submitted += 1
+      for (index, score) in pool.results():
+        if record(index, score):
+          break
+        if submitted < max_games:
+          pool.submit(pairing(submitted))
+          submitted += 1
+    finally:
+      pool.close(wait=False)
+
+  return MatchVerdict(
+    sprt.verdict(), sprt.games, sprt.llr(),
+    total_score / sprt.games if sprt.games else 0.0)
+
+def _worker_count(workers):
+  if workers is None:
+    return multiprocessing.cpu_count()
+  return workers
@@ -0,0 +1,134 @@
+"""A bounded transposition table for search.
+
+Many action orders lead to the same Board. A transposition table remembers
+what the search learned about a Board the first time it saw it, so the next
+time the same Board comes up (say, by building a farm and then a mine instead
+of a mine and then a farm) the search can reuse that result.
+"""
+
+from collections import namedtuple
+
+
+class TableEntry(namedtuple('TableEntry', ['board', 'depth', 'value', 'generation'])):
+  """A stored search result.
+
+  Fields:
+    board: The Board this entry describes.
+    depth: How deeply the board was searched. Deeper results are worth more
+      and are preferred when two boards compete for the same slot.
+    value: Whatever the search wants to remember about the board.
+    generation: The search generation in which this entry was stored.
+  """
+
+
+class TableStats(namedtuple('TableStats', ['hits', 'misses', 'stores', 'replacements', 'rejections'])):
+  """Counters describing how a TranspositionTable has been used.
+
+  Fields:
+    hits: Lookups which found their board.
+    misses: Lookups which didn't.
+    stores: Calls to store() which wrote an entry.
+    replacements: Stores which evicted a different board.
+    rejections: Stores which were dropped to keep a more valuable entry.
+  """
+
+  @property
+  def hit_rate(self):
+    lookups = self.hits + self.misses
+    if lookups == 0:
+      return 0.0
+    return self.hits / lookups
+
+
+class TranspositionTable:
+  """A fixed-size map from Boards to search results.
+
+  Boards are placed into a slot chosen by their Zobrist hash. When two boards
+  want the same slot, the table uses a depth-preferred policy: an entry is
+  only evicted by a result searched at least as deeply, or by any result once
+  the entry is left over from an earlier search generation (see
+  new_generation()).
+  """
+
+  def __init__(self, capacity):
+    """Creates an empty table.
+
+    Args:
+      capacity: The maximum number of entries to keep.
+    """
+    if capacity <= 0:
+      raise ValueError('Capacity must be positive, not {}'.format(capacity))
+    self._slots = [None] * capacity
+    self._generation = 0
+    self._size = 0
+
+    self._hits = 0
+    self._misses = 0
+    self._stores = 0
+    self._replacements = 0
+    self._rejections = 0
+
+  @property
+  def capacity(self):
+    return len(self._slots)
+
+  def __len__(self):
+    return self._size
+
+  @property
+  def stats(self):
+    return TableStats(
+      self._hits, self._misses, self._stores, self._replacements, self._rejections)
+
+  def new_generation(self):
+    """Marks all existing entries as stale, so that new results replace them.
+
+    Call this between searches, for instance at the start of each turn.
+    """
+    self._generation += 1
+
+  def _slot(self, board):
+    return board.zobrist_hash % len(self._slots)
+
+  def lookup(self, board, min_depth=0):
+    """Returns the TableEntry for a board, or None.
+
+    Args:
+      board: The Board to look up.
+      min_depth: Entries searched less deeply than this count as misses.
+    """
+    entry = self._slots[self._slot(board)]
+    if entry is not None and entry.depth >= min_depth and entry.board == board:
+      self._hits += 1
+      return entry
+    self._misses += 1
+    return None
+
+  def store(self, board, value, depth=0):
+    """Remembers a search result for a board.
+
+    Returns:
+      True if the result was stored, False if it was dropped in favour of a
+      more valuable entry already in its slot.
+    """
+    index = self._slot(board)
+    existing = self._slots[index]
+
+    if existing is None:
+      self._size += 1
+    elif existing.board == board:
+      pass
+    elif existing.generation == self._generation and existing.depth > depth:
+      self._rejections += 1
+      return False
+    else:
+      self._replacements += 1
+
+    self._slots[index] = TableEntry(board, depth, value, self._generation)
+    self._stores += 1
+    return True
+
+  def clear(self):
+    """Removes every entry. The counters are kept."""
+    self._slots = [None] * len(self._slots)
+    self._size = 0
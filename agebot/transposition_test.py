@@ -0,0 +1,54 @@
+import unittest
+from .board import Player, Point
+from . import board, board_initializer, buildings, transposition
+
+def rich_board():
+  testing_board = board_initializer.initialize_board()
+  return testing_board.update_tableau(
+    Player.ONE,
+    testing_board.tableau(Player.ONE).add_points({Point.RESOURCES: 10}))
+
+class TranspositionTableTest(unittest.TestCase):
+
+  def test_transpositions_share_an_entry(self):
+    testing_board = rich_board()
+    build_farm = board.BuildAction(buildings.AGRICULTURE)
+    build_mine = board.BuildAction(buildings.BRONZE)
+
+    table = transposition.TranspositionTable(1024)
+    table.store(testing_board._play_action(build_farm)._play_action(build_mine), 'seen')
+
+    entry = table.lookup(
+      testing_board._play_action(build_mine)._play_action(build_farm))
+    self.assertEqual(entry.value, 'seen')
+    self.assertEqual(len(table), 1)
+    self.assertEqual(table.stats.hits, 1)
+
+  def test_miss(self):
+    table = transposition.TranspositionTable(16)
+    self.assertIsNone(table.lookup(rich_board()))
+    self.assertEqual(table.stats.misses, 1)
+    self.assertEqual(table.stats.hit_rate, 0.0)
+
+  def test_min_depth(self):
+    table = transposition.TranspositionTable(16)
+    table.store(rich_board(), 'shallow', depth=1)
+    self.assertIsNone(table.lookup(rich_board(), min_depth=2))
+    self.assertEqual(table.lookup(rich_board(), min_depth=1).value, 'shallow')
+
+  def test_depth_preferred_replacement(self):
+    table = transposition.TranspositionTable(1)
+    first = rich_board()
+    second = first._play_action(board.BuildAction(buildings.BRONZE))
+
+    table.store(first, 'deep', depth=3)
+    self.assertFalse(table.store(second, 'shallow', depth=1))
+    self.assertEqual(table.lookup(first).value, 'deep')
+    self.assertEqual(table.stats.rejections, 1)
+
+    table.new_generation()
+    self.assertTrue(table.store(second, 'shallow', depth=1))
+    self.assertIsNone(table.lookup(first))
+    self.assertEqual(table.lookup(second).value, 'shallow')
+    self.assertEqual(table.stats.replacements, 1)
+    self.assertEqual(len(table), 1)
@@ -0,0 +1,53 @@
+"""Zobrist hashing for game states.
+
+A Zobrist hash is the XOR of one 64-bit key for every (feature, value) pair
+in a state. When a transition changes one feature, the hash is updated by
+XORing out the key for the old value and XORing in the key for the new one,
+so hashes can be maintained in O(1) per change instead of being recomputed
+from the whole state.
+
+Keys are derived from Python hashes, so they are stable within a process but
+not across processes. Don't persist them.
+"""
+
+MASK = (1 << 64) - 1
+
+_GOLDEN = 0x9E3779B97F4A7C15
+
+_feature_keys = {}
+
+def _mix(x):
+  """The SplitMix64 finalizer. Turns a 64-bit integer into a well-mixed one."""
+  x = (x + _GOLDEN) & MASK
+  x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+  x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+  return x ^ (x >> 31)
+
+def feature_key(feature):
+  """Returns the key for a feature.
+
+  Features of different types get different keys even if they hash the
+  same, as interned objects with the same small ID do.
+
+  Args:
+    feature: Any hashable object naming the feature, such as a Building or a
+      ('slot', 3) tuple.
+  """
+  key = _feature_keys.get(feature)
+  if key is None:
+    key = _mix(hash((type(feature), feature)) & MASK)
+    _feature_keys[feature] = key
+  return key
+
+def value_key(key, value):
+  """Returns the key for a feature having an integer value.
+
+  Args:
+    key: The feature's key, as returned by feature_key.
+    value: An int.
+  """
+  return _mix(key ^ ((value * _GOLDEN) & MASK))
+
+def combine(key, sub_hash):
+  """Returns the key for a feature whose value is itself a Zobrist hash."""
+  return _mix(key ^ sub_hash)
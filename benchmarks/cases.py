@@ -0,0 +1,112 @@
+"""Benchmarks of the engine's hot paths."""
+
+import random
+from agebot import (
+  board, board_initializer, buildings, content, events, features, options,
+  records, search_board, self_play, startup)
+from agebot.board import Player, Point
+from .harness import benchmark
+
+
+def _sim_options(seed=0):
+  return options.SimulatorOptions(
+    events.NULL_LOGGER, options.ActualRng(random.Random(seed)))
+
+def _tableau(num_technologies, buildings_per_technology, resources):
+  """Returns a tableau knowing the cheapest techs, with some of each built."""
+  technologies = sorted(content.BUILDING_CARDS, key=lambda t: t.building.price)
+  technologies = technologies[:num_technologies]
+  return board.Tableau(
+    board.DESPOTISM,
+    {t.building: buildings_per_technology for t in technologies},
+    technologies,
+    {Point.RESOURCES: resources, Point.FOOD: resources})
+
+_TABLEAU_SIZES = {
+  'small': (4, 1, 2),
+  'medium': (12, 1, 10),
+  'large': (len(content.BUILDING_CARDS), 2, 40),
+}
+
+def _legal_actions_benchmark(size):
+  def setup():
+    tableau = _tableau(*_TABLEAU_SIZES[size])
+    return tableau.legal_actions
+  setup.__doc__ = 'Tableau.legal_actions on a {} tableau.'.format(size)
+  return setup
+
+for _size in _TABLEAU_SIZES:
+  benchmark('legal_actions_' + _size)(_legal_actions_benchmark(_size))
+
+
+def _rich_board():
+  start = board_initializer.initialize_board().resolve_start_of_turn(_sim_options())
+  return start.update_tableau(
+    Player.ONE, start.tableau(Player.ONE).add_points({Point.RESOURCES: 10}))
+
+@benchmark('play_action_phase')
+def play_action_phase():
+  """Board.play_action_phase with two builds, including the end of turn."""
+  start = _rich_board()
+  actions = [board.BuildAction(buildings.BRONZE),
+             board.BuildAction(buildings.AGRICULTURE)]
+  return lambda: start.play_action_phase(actions)
+
+@benchmark('resolve_end_of_turn_sequence')
+def resolve_end_of_turn_sequence():
+  """Board.resolve_end_of_turn_sequence with no actions played."""
+  return _rich_board().resolve_end_of_turn_sequence
+
+@benchmark('search_board_play_and_undo')
+def search_board_play_and_undo():
+  """SearchBoard.play_action_phase with the same two builds, then undo."""
+  # Compare with play_action_phase, which builds a new Board instead.
+  search = search_board.SearchBoard.from_board(_rich_board())
+  actions = [board.BuildAction(buildings.BRONZE),
+             board.BuildAction(buildings.AGRICULTURE)]
+  def operation():
+    search.play_action_phase(actions)
+    search.undo_to(0)
+  return operation
+
+@benchmark('card_row_shift_left')
+def card_row_shift_left():
+  """CardRow.shift_left on a full card row."""
+  return _rich_board().card_row.shift_left
+
+@benchmark('card_row_replenish')
+def card_row_replenish():
+  """CardRow.replenish after a two-player shift."""
+  shifted = _rich_board().card_row.shift_left()
+  sim_options = _sim_options()
+  return lambda: shifted.replenish(sim_options)
+
+@benchmark('civil_decks_draw')
+def civil_decks_draw():
+  """CivilDecks.draw of four cards from the starting decks."""
+  decks = board_initializer.initial_civil_decks(2)
+  sim_options = _sim_options()
+  return lambda: decks.draw(4, sim_options)
+
+@benchmark('random_game')
+def random_game():
+  """A ten-round game between random bots, from initialize_board."""
+  seeds = iter(range(1 << 30))
+  return lambda: self_play.play_game(next(seeds), max_rounds=10)
+
+@benchmark('featurize_boards')
+def featurize_boards():
+  """Featurizer.featurize on 1000 boards from random games."""
+  boards = []
+  for seed in range(10):
+    game = records.record_game(seed, max_rounds=10)
+    boards.extend(records.replay(game.initial_board, game.seed, game.turns))
+  boards = (boards * 5)[:1000]
+  featurizer = features.Featurizer()
+  return lambda: featurizer.featurize(boards)
+
+@benchmark('import_engine')
+def import_engine():
+  """Importing agebot.self_play in a new interpreter, as a worker does."""
+  # Compare with startup.IMPORT_BUDGET_SECONDS.
+  return startup.measure_import_time
@@ -0,0 +1,167 @@
+"""Times benchmarks and compares the results against a baseline."""
+
+import gc
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+
+class Benchmark(namedtuple('Benchmark', ['name', 'setup', 'description'])):
+  """A benchmark.
+
+  Fields:
+    name: A unique name, used as the key in results files.
+    setup: A function taking no arguments which prepares state and returns
+      the operation to time: a function taking no arguments.
+    description: What one operation does.
+  """
+
+BENCHMARKS = {}
+"""A map from benchmark names to Benchmarks, in registration order."""
+
+def benchmark(name):
+  """A decorator which registers a setup function as a Benchmark."""
+  def register(setup):
+    if name in BENCHMARKS:
+      raise ValueError('Duplicate benchmark {}'.format(name))
+    BENCHMARKS[name] = Benchmark(name, setup, (setup.__doc__ or '').strip())
+    return setup
+  return register
+
+
+def _percentile(sorted_values, fraction):
+  """Returns a percentile by linear interpolation between closest ranks."""
+  if len(sorted_values) == 1:
+    return sorted_values[0]
+  position = fraction * (len(sorted_values) - 1)
+  lower = int(position)
+  upper = min(lower + 1, len(sorted_values) - 1)
+  weight = position - lower
+  return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+def _calibrate(operation, min_sample_seconds):
+  """Returns how many operations make one sample last at least min_sample_seconds."""
+  number = 1
+  while True:
+    start = time.perf_counter()
+    for _ in range(number):
+      operation()
+    if time.perf_counter() - start >= min_sample_seconds or number >= 1 << 20:
+      return number
+    number *= 2
+
+def _peak_memory(setup):
+  """Returns the peak bytes allocated while setting up and running one operation."""
+  tracemalloc.start()
+  try:
+    operation = setup()
+    tracemalloc.reset_peak()
+    operation()
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+def run_benchmark(bench, samples=20, min_sample_seconds=0.01):
+  """Runs one benchmark.
+
+  Returns:
+    A dict of statistics, suitable for writing out as JSON. Times are per
+    operation, in seconds.
+  """
+  operation = bench.setup()
+  number = _calibrate(operation, min_sample_seconds)
+
+  per_op = []
+  gc_was_enabled = gc.isenabled()
+  gc.collect()
+  gc.disable()
+  try:
+    for _ in range(samples):
+      start = time.perf_counter()
+      for _ in range(number):
+        operation()
+      per_op.append((time.perf_counter() - start) / number)
+  finally:
+    if gc_was_enabled:
+      gc.enable()
+
+  per_op.sort()
+  median = statistics.median(per_op)
+  return {
+    'description': bench.description,
+    'samples': samples,
+    'operations_per_sample': number,
+    'ops_per_second': 1.0 / median if median else float('inf'),
+    'seconds_per_op': {
+      'min': per_op[0],
+      'mean': statistics.fmean(per_op),
+      'p50': median,
+      'p90': _percentile(per_op, 0.90),
+      'p99': _percentile(per_op, 0.99),
+      'max': per_op[-1],
+    },
+    'peak_memory_bytes': _peak_memory(bench.setup),
+  }
+
+def run_all(names=None, samples=20, min_sample_seconds=0.01, progress=None):
+  """Runs benchmarks and returns a results document.
+
+  Args:
+    names: The names of the benchmarks to run. Defaults to all of them.
+    samples: How many timed samples to take of each benchmark.
+    min_sample_seconds: Each sample repeats the operation until it lasts at
+      least this long.
+    progress: If set, called with each benchmark's name before it runs.
+  """
+  if names is None:
+    names = list(BENCHMARKS)
+  results = {}
+  for name in names:
+    if progress is not None:
+      progress(name)
+    results[name] = run_benchmark(BENCHMARKS[name], samples, min_sample_seconds)
+  return {
+    'meta': {
+      'python': platform.python_version(),
+      'implementation': platform.python_implementation(),
+      'machine': platform.machine(),
+      'timestamp': time.time(),
+    },
+    'benchmarks': results,
+  }
+
+
+class Regression(namedtuple('Regression', ['name', 'baseline', 'current', 'ratio'])):
+  """A benchmark which got slower.
+
+  Fields:
+    name: The benchmark's name.
+    baseline: The baseline median seconds per operation.
+    current: The current median seconds per operation.
+    ratio: current / baseline.
+  """
+
+def compare(baseline, current, threshold=0.10):
+  """Finds benchmarks whose median time got worse than the baseline.
+
+  Benchmarks missing from either document are ignored.
+
+  Args:
+    baseline: A results document, as returned by run_all().
+    current: Another results document.
+    threshold: How much slower than the baseline counts as a regression,
+      as a fraction. 0.10 means 10% slower.
+  Returns:
+    A list of Regressions.
+  """
+  regressions = []
+  for (name, result) in current['benchmarks'].items():
+    if name not in baseline['benchmarks']:
+      continue
+    before = baseline['benchmarks'][name]['seconds_per_op']['p50']
+    after = result['seconds_per_op']['p50']
+    if before > 0 and after > before * (1 + threshold):
+      regressions.append(Regression(name, before, after, after / before))
+  return regressions
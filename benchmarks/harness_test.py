@@ -0,0 +1,29 @@
+import unittest
+from . import harness
+
+def results(**medians):
+  return {'benchmarks': {
+    name: {'seconds_per_op': {'p50': m}} for (name, m) in medians.items()}}
+
+class HarnessTest(unittest.TestCase):
+
+  def test_compare_flags_slowdowns(self):
+    regressions = harness.compare(
+      results(fast=1.0, slow=1.0, gone=1.0),
+      results(fast=1.05, slow=1.5, new=9.0),
+      threshold=0.10)
+    self.assertEqual([r.name for r in regressions], ['slow'])
+    self.assertAlmostEqual(regressions[0].ratio, 1.5)
+
+  def test_percentile(self):
+    self.assertEqual(harness._percentile([1.0, 2.0, 3.0], 0.5), 2.0)
+    self.assertAlmostEqual(harness._percentile([1.0, 2.0], 0.9), 1.9)
+    self.assertEqual(harness._percentile([4.0], 0.99), 4.0)
+
+  def test_run_benchmark(self):
+    bench = harness.Benchmark('noop', lambda: (lambda: None), 'Nothing.')
+    result = harness.run_benchmark(bench, samples=3, min_sample_seconds=0.0)
+    self.assertEqual(result['samples'], 3)
+    self.assertGreater(result['ops_per_second'], 0)
+    self.assertLessEqual(result['seconds_per_op']['p50'],
+                         result['seconds_per_op']['max'])
@@ -0,0 +1,73 @@
+"""Runs the engine benchmarks.
+
+Usage, from the repository root:
+
+  python -m benchmarks.run --output results.json
+  python -m benchmarks.run --compare baseline.json --threshold 0.1
+
+With --compare, the exit status is 1 if any benchmark's median time per
+operation got worse than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from . import cases, harness  # cases registers the benchmarks.
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('names', nargs='*',
+                      help='Benchmarks to run. Defaults to all of them.')
+  parser.add_argument('--list', action='store_true',
+                      help='List the benchmarks and exit.')
+  parser.add_argument('--output', help='Write the results to this JSON file.')
+  parser.add_argument('--compare', metavar='BASELINE',
+                      help='Compare against a results file from an earlier run.')
+  parser.add_argument('--threshold', type=float, default=0.10,
+                      help='Slowdown that counts as a regression (default 0.10).')
+  parser.add_argument('--samples', type=int, default=20)
+  parser.add_argument('--min-sample-seconds', type=float, default=0.01)
+  args = parser.parse_args(argv)
+
+  if args.list:
+    for bench in harness.BENCHMARKS.values():
+      print('{:32} {}'.format(bench.name, bench.description))
+    return 0
+
+  unknown = [n for n in args.names if n not in harness.BENCHMARKS]
+  if unknown:
+    parser.error('Unknown benchmarks: {}'.format(', '.join(unknown)))
+
+  results = harness.run_all(
+    args.names or None,
+    samples=args.samples,
+    min_sample_seconds=args.min_sample_seconds,
+    progress=lambda name: print('Running {}...'.format(name), file=sys.stderr))
+
+  for (name, result) in results['benchmarks'].items():
+    print('{:32} {:>14.1f} ops/s  p50 {:.3e}s  p99 {:.3e}s  peak {:,} B'.format(
+      name,
+      result['ops_per_second'],
+      result['seconds_per_op']['p50'],
+      result['seconds_per_op']['p99'],
+      result['peak_memory_bytes']))
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(results, f, indent=2, sort_keys=True)
+
+  if args.compare:
+    with open(args.compare) as f:
+      baseline = json.load(f)
+    regressions = harness.compare(baseline, results, args.threshold)
+    for r in regressions:
+      print('REGRESSION {}: {:.3e}s -> {:.3e}s ({:+.0%})'.format(
+        r.name, r.baseline, r.current, r.ratio - 1))
+    if regressions:
+      return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())